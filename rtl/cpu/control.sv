@@ -56,6 +56,14 @@ module control (
 
   reg [2:0] m_cycle, m_cycle_next;
 
+  // debugging code
+`ifndef SYNTHESIS
+  // High during the first M-cycle of every instruction, gives testbenches a
+  // single edge to wait on instead of polling m_cycle every clock
+  wire instr_start;
+  assign instr_start = (m_cycle == 0);
+`endif
+
   logic [7:0] comb_decoded_opcode;
   bus_opcode_t comb_bus_opcode_out;
   idu_op_t comb_idu_op;
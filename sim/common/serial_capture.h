@@ -0,0 +1,124 @@
+// Serial output capture for the Verilator harnesses.
+//
+// Test ROMs print their verdict through the serial port: the byte is written
+// to SB (FF01) and the transfer is started by writing SC (FF02) with bit 7
+// set. SerialCapture watches CPU writes for that sequence and appends each
+// transferred byte to output(), so no link partner or transfer timing is
+// needed.
+//
+// stop_on() registers patterns such as "Passed" or "Failed"; once the output
+// ends with one of them, matched() returns its index and the harness stops.
+// parse_pattern() turns "\xNN" escapes into bytes for ROMs that report with
+// binary sequences (e.g. the mooneye Fibonacci bytes "\x03\x05\x08\x0d\x15\x22").
+
+#pragma once
+
+#include <cctype>
+#include <cstdint>
+#include <cstdio>
+#include <cstdlib>
+#include <string>
+#include <vector>
+
+class SerialCapture
+{
+  public:
+    void stop_on(const std::string &pattern)
+    {
+        if (!pattern.empty()) {
+            patterns_.push_back(pattern);
+        }
+    }
+
+    void clear_patterns()
+    {
+        patterns_.clear();
+        matched_ = -1;
+    }
+
+    // Forget the output and any match; the patterns are kept
+    void clear()
+    {
+        output_.clear();
+        matched_ = -1;
+        sb_ = 0xFF;
+    }
+
+    void observe_write(uint16_t addr, uint8_t value)
+    {
+        if (addr == 0xFF01) {
+            sb_ = value;
+        } else if (addr == 0xFF02 && (value & 0x80)) {
+            output_.push_back(static_cast<char>(sb_));
+            check();
+        }
+    }
+
+    const std::string &output() const { return output_; }
+
+    // Index of the pattern that ended the output, or -1
+    int  matched() const { return matched_; }
+    bool done() const { return matched_ >= 0; }
+
+    const std::string &pattern(int index) const { return patterns_[static_cast<size_t>(index)]; }
+
+    // "\xNN" -> byte, "\\" -> backslash; everything else is taken literally
+    static std::string parse_pattern(const char *text)
+    {
+        std::string pattern;
+        for (const char *p = text; *p; ++p) {
+            if (p[0] == '\\' && p[1] == '\\') {
+                pattern.push_back('\\');
+                ++p;
+            } else if (p[0] == '\\' && p[1] == 'x' && std::isxdigit(static_cast<unsigned char>(p[2])) &&
+                       std::isxdigit(static_cast<unsigned char>(p[3]))) {
+                const char hex[3] = {p[2], p[3], '\0'};
+                pattern.push_back(static_cast<char>(std::strtoul(hex, nullptr, 16)));
+                p += 3;
+            } else {
+                pattern.push_back(*p);
+            }
+        }
+        return pattern;
+    }
+
+    // The inverse of parse_pattern() for printing; newlines are kept
+    static std::string escape(const std::string &bytes)
+    {
+        std::string text;
+        for (const char c : bytes) {
+            if (c == '\\') {
+                text += "\\\\";
+            } else if (std::isprint(static_cast<unsigned char>(c)) || c == '\n') {
+                text.push_back(c);
+            } else {
+                char hex[5];
+                snprintf(hex, sizeof(hex), "\\x%02x", static_cast<uint8_t>(c));
+                text += hex;
+            }
+        }
+        return text;
+    }
+
+  private:
+    void check()
+    {
+        if (matched_ >= 0) {
+            return;
+        }
+        // Bytes arrive one at a time, so a new match can only end here
+        for (size_t i = 0; i < patterns_.size(); ++i) {
+            const std::string &pattern = patterns_[i];
+            if (output_.size() >= pattern.size() &&
+                output_.compare(output_.size() - pattern.size(), pattern.size(), pattern) == 0) {
+                matched_ = static_cast<int>(i);
+                return;
+            }
+        }
+    }
+
+    std::string              output_;
+    std::vector<std::string> patterns_;
+    int                      matched_ = -1;
+    uint8_t                  sb_ = 0xFF;
+};
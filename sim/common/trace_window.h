@@ -0,0 +1,244 @@
+// Windowed and triggered waveform tracing for the Verilator harnesses.
+//
+// Builds with --trace-fst write FST, builds with --trace write VCD. Instead
+// of dumping from cycle 0 to the end, TraceWindow only dumps:
+//
+//   --trace-start N / --trace-stop N   cycles [N, M) (default: everything)
+//   --trace-pc ADDR                    from the first instruction at ADDR
+//   --trace-opcode OP                  from the first instruction OP
+//   --trace-write ADDR                 from the first CPU write to ADDR
+//   --trace-after N                    for N cycles after the trigger
+//   --trace-ring N                     plus at least N cycles before it
+//   --trace-file FILE                  output file
+//
+// With a trigger, nothing is written before it fires unless --trace-ring is
+// given. The ring alternates between two segment files (<stem>.ring0/1)
+// of N cycles each; when the trigger fires the active segment keeps going,
+// so the previous segment plus the active one hold the N cycles before the
+// trigger and everything after it.
+//
+// The harness calls begin_cycle() once per clock, dump() after every eval
+// and observe_instruction()/observe_write() to evaluate the triggers.
+
+#pragma once
+
+#if VM_TRACE
+
+    #if VM_TRACE_FST
+        #include "verilated_fst_c.h"
+    #else
+        #include "verilated_vcd_c.h"
+    #endif
+
+    #include <cstdint>
+    #include <cstdio>
+    #include <cstdlib>
+    #include <cstring>
+    #include <string>
+
+struct TraceOptions
+{
+    std::string file;
+    uint64_t    start = 0;
+    uint64_t    stop = UINT64_MAX;
+    uint64_t    after = UINT64_MAX;
+    uint64_t    ring = 0;
+    int32_t     trigger_pc = -1;
+    int32_t     trigger_opcode = -1;
+    int32_t     trigger_write = -1;
+
+    bool has_trigger() const { return trigger_pc >= 0 || trigger_opcode >= 0 || trigger_write >= 0; }
+
+    // Apply one "--trace-*" option; returns false if *name* is not one
+    bool set(const char *name, const char *value)
+    {
+        const uint64_t number = std::strtoull(value, nullptr, 0);
+        if (std::strcmp(name, "--trace-file") == 0) {
+            file = value;
+        } else if (std::strcmp(name, "--trace-start") == 0) {
+            start = number;
+        } else if (std::strcmp(name, "--trace-stop") == 0) {
+            stop = number;
+        } else if (std::strcmp(name, "--trace-after") == 0) {
+            after = number;
+        } else if (std::strcmp(name, "--trace-ring") == 0) {
+            ring = number;
+        } else if (std::strcmp(name, "--trace-pc") == 0) {
+            trigger_pc = static_cast<int32_t>(number & 0xFFFF);
+        } else if (std::strcmp(name, "--trace-opcode") == 0) {
+            trigger_opcode = static_cast<int32_t>(number & 0xFF);
+        } else if (std::strcmp(name, "--trace-write") == 0) {
+            trigger_write = static_cast<int32_t>(number & 0xFFFF);
+        } else {
+            return false;
+        }
+        return true;
+    }
+};
+
+class TraceWindow
+{
+  public:
+    #if VM_TRACE_FST
+    using File = VerilatedFstC;
+    static constexpr const char *kExtension = ".fst";
+    #else
+    using File = VerilatedVcdC;
+    static constexpr const char *kExtension = ".vcd";
+    #endif
+
+    ~TraceWindow() { finish(); }
+
+    // *default_stem* names the output when --trace-file is not given
+    template <class Model> void attach(Model &model, const TraceOptions &options, const char *default_stem)
+    {
+        options_ = options;
+        if (options_.file.empty()) {
+            options_.file = std::string(default_stem) + kExtension;
+        }
+        Verilated::traceEverOn(true);
+        model.trace(&file_, 99);
+        attached_ = true;
+    }
+
+    void begin_cycle(uint64_t cycle)
+    {
+        cycle_ = cycle;
+        if (!attached_ || state_ == DONE) {
+            return;
+        }
+        if (cycle >= options_.stop) {
+            finish();
+            return;
+        }
+        if (cycle < options_.start) {
+            return;
+        }
+
+        if (!options_.has_trigger()) {
+            if (state_ == IDLE) {
+                open(options_.file);
+                state_ = ACTIVE;
+            }
+        } else if (state_ == TRIGGERED) {
+            if (options_.after != UINT64_MAX && cycle >= trigger_cycle_ + options_.after) {
+                finish();
+            }
+        } else if (options_.ring) {
+            if (state_ == IDLE || cycle >= segment_start_ + options_.ring) {
+                // Start the other segment; it overwrites the one from two rotations ago
+                segment_ = state_ == IDLE ? 0 : 1 - segment_;
+                open(segment_name(segment_));
+                segment_start_ = cycle;
+                segments_++;
+                state_ = RING;
+            }
+        }
+    }
+
+    void dump(uint64_t time)
+    {
+        if (file_.isOpen()) {
+            file_.dump(time);
+        }
+    }
+
+    void observe_instruction(uint16_t pc, uint8_t opcode)
+    {
+        if (pc == options_.trigger_pc) {
+            fire("PC");
+        } else if (opcode == options_.trigger_opcode) {
+            fire("opcode");
+        }
+    }
+
+    void observe_write(uint16_t addr)
+    {
+        if (addr == options_.trigger_write) {
+            fire("write");
+        }
+    }
+
+    void finish()
+    {
+        if (state_ == DONE || !attached_) {
+            return;
+        }
+        if (file_.isOpen()) {
+            file_.close();
+        }
+        if (state_ == RING) {
+            fprintf(stderr, "trace: trigger never fired; last cycles are in %s\n", written().c_str());
+        } else if (state_ == IDLE) {
+            fprintf(stderr, "trace: nothing written (window or trigger not reached)\n");
+        } else {
+            fprintf(stderr, "trace: wrote %s\n", written().c_str());
+        }
+        state_ = DONE;
+    }
+
+  private:
+    enum State
+    {
+        IDLE,      // nothing written yet
+        RING,      // writing ring segments, waiting for the trigger
+        TRIGGERED, // trigger fired, writing until stop/after
+        ACTIVE,    // no trigger, writing until stop
+        DONE,
+    };
+
+    // top_out.fst -> top_out.ring0.fst
+    std::string segment_name(int segment) const
+    {
+        std::string stem = options_.file;
+        const size_t ext = std::strlen(kExtension);
+        if (stem.size() > ext && stem.compare(stem.size() - ext, ext, kExtension) == 0) {
+            stem.resize(stem.size() - ext);
+        }
+        return stem + ".ring" + std::to_string(segment) + kExtension;
+    }
+
+    std::string written() const
+    {
+        if (segments_ == 0) {
+            return options_.file;
+        }
+        if (segments_ == 1) {
+            return segment_name(segment_);
+        }
+        return segment_name(1 - segment_) + " and " + segment_name(segment_);
+    }
+
+    void open(const std::string &name)
+    {
+        if (file_.isOpen()) {
+            file_.close();
+        }
+        file_.open(name.c_str());
+    }
+
+    void fire(const char *reason)
+    {
+        if (!attached_ || (state_ != IDLE && state_ != RING) || !options_.has_trigger() || cycle_ < options_.start) {
+            return;
+        }
+        if (state_ == IDLE) {
+            open(options_.file);
+        }
+        state_ = TRIGGERED;
+        trigger_cycle_ = cycle_;
+        fprintf(stderr, "trace: %s trigger at cycle %llu\n", reason, static_cast<unsigned long long>(cycle_));
+    }
+
+    File         file_;
+    TraceOptions options_;
+    State        state_ = IDLE;
+    bool         attached_ = false;
+    uint64_t     cycle_ = 0;
+    uint64_t     trigger_cycle_ = 0;
+    uint64_t     segment_start_ = 0;
+    int          segment_ = 0;
+    uint64_t     segments_ = 0;
+};
+
+#endif
@@ -0,0 +1,194 @@
+"""Reader for the binary instruction traces written by top_sim.
+
+``Vtop_verilator_bridge --trace-bin FILE`` writes a 16-byte header followed
+by one fixed-width 64-byte record per instruction (``TraceRecord`` in
+top_harness.h). :func:`open_trace` maps the file as a NumPy structured array
+without reading it, so queries over very long runs are plain array
+operations::
+
+    trace = open_trace("boot.trace")
+    trace[trace["pc"] == 0x0028]          # every instruction at 0x0028
+    opcode_histogram(trace)                # executions per opcode
+"""
+
+import argparse
+import struct
+
+import numpy as np
+
+TRACE_MAGIC = b"GBTRACE\0"
+TRACE_VERSION = 1
+MAX_BUS_ACCESSES = 8
+
+BUS_READ = 1
+BUS_WRITE = 2
+
+HEADER = struct.Struct("<8sII")
+
+ACCESS_DTYPE = np.dtype([("addr", "<u2"), ("data", "u1"), ("kind", "u1")])
+
+TRACE_DTYPE = np.dtype(
+    [
+        ("cycle", "<u8"),
+        ("af", "<u2"),
+        ("bc", "<u2"),
+        ("de", "<u2"),
+        ("hl", "<u2"),
+        ("sp", "<u2"),
+        ("pc", "<u2"),
+        ("opcode", "u1", (4,)),
+        ("m_cycles", "u1"),
+        ("halted", "u1"),
+        ("num_accesses", "u1"),
+        ("flags", "u1"),
+        ("reserved", "<u4"),
+        ("accesses", ACCESS_DTYPE, (MAX_BUS_ACCESSES,)),
+    ]
+)
+
+assert TRACE_DTYPE.itemsize == 64
+
+
+def check_header(data):
+    """Validate a trace header and return the record size it announces."""
+    if len(data) < HEADER.size:
+        raise ValueError("Truncated trace header")
+    magic, version, record_size = HEADER.unpack_from(data)
+    if magic != TRACE_MAGIC:
+        raise ValueError("Not a top_sim binary trace")
+    if version != TRACE_VERSION or record_size != TRACE_DTYPE.itemsize:
+        raise ValueError(
+            f"Unsupported trace version {version} (record size {record_size})"
+        )
+    return record_size
+
+
+def open_trace(path):
+    """Memory-map the trace at *path* as an array of ``TRACE_DTYPE`` records."""
+    with open(path, "rb") as f:
+        check_header(f.read(HEADER.size))
+        f.seek(0, 2)
+        size = f.tell() - HEADER.size
+
+    # A trace cut short by a crash may end in a partial record; ignore it
+    count = size // TRACE_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=TRACE_DTYPE)
+    return np.memmap(path, dtype=TRACE_DTYPE, mode="r", offset=HEADER.size, shape=(count,))
+
+
+def read_chunks(stream, chunk_records=4096):
+    """Yield arrays of records from a file-like *stream* (e.g. a pipe)."""
+    check_header(stream.read(HEADER.size))
+    chunk_bytes = chunk_records * TRACE_DTYPE.itemsize
+    while True:
+        data = stream.read(chunk_bytes)
+        count = len(data) // TRACE_DTYPE.itemsize
+        if count:
+            yield np.frombuffer(data, dtype=TRACE_DTYPE, count=count)
+        if len(data) < chunk_bytes:
+            return
+
+
+def opcode_histogram(trace):
+    """Return how often each of the 256 opcodes was executed.
+
+    ``opcode`` holds the bytes at the executing PC *after* each record's
+    instruction, so the final record names an instruction that never ran.
+    """
+    return np.bincount(trace["opcode"][:-1, 0], minlength=256)
+
+
+def bus_accesses(trace, kind=None):
+    """Flatten the bus activity of *trace* into one array of accesses.
+
+    Returns ``(index, accesses)`` where ``index`` is the record each access
+    belongs to. Pass ``kind=BUS_READ`` or ``BUS_WRITE`` to filter.
+    """
+    accesses = trace["accesses"]
+    valid = np.arange(MAX_BUS_ACCESSES) < trace["num_accesses"][:, None]
+    if kind is not None:
+        valid &= accesses["kind"] == kind
+    index = np.nonzero(valid)[0]
+    return index, accesses[valid]
+
+
+# print_state layout: (text, field, hex digits) pieces of one line
+_TEXT_FIELDS = [
+    ("A: ", ("af", 8), 2),
+    (" F: ", ("af", 0), 2),
+    (" B: ", ("bc", 8), 2),
+    (" C: ", ("bc", 0), 2),
+    (" D: ", ("de", 8), 2),
+    (" E: ", ("de", 0), 2),
+    (" H: ", ("hl", 8), 2),
+    (" L: ", ("hl", 0), 2),
+    (" SP: ", ("sp", 0), 4),
+    (" PC: 00:", ("pc", 0), 4),
+    (" (", ("opcode", 0), 2),
+    (" ", ("opcode", 1), 2),
+    (" ", ("opcode", 2), 2),
+    (" ", ("opcode", 3), 2),
+]
+_HEX_DIGITS = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)
+
+
+def _text_template():
+    line = ""
+    offsets = []
+    for text, field, digits in _TEXT_FIELDS:
+        line += text
+        offsets.append((field, digits, len(line)))
+        line += "0" * digits
+    line += ")\n"
+    return np.frombuffer(line.encode(), dtype=np.uint8), offsets
+
+
+_TEXT_TEMPLATE, _TEXT_OFFSETS = _text_template()
+TEXT_LINE_SIZE = len(_TEXT_TEMPLATE)
+
+
+def render_text(trace):
+    """Render records as print_state text lines, vectorised; returns bytes."""
+    out = np.tile(_TEXT_TEMPLATE, (len(trace), 1))
+    for (name, sel), digits, offset in _TEXT_OFFSETS:
+        if name == "opcode":
+            values = trace["opcode"][:, sel].astype(np.uint32)
+        else:
+            values = (trace[name].astype(np.uint32) >> sel) & (0xFFFF if digits == 4 else 0xFF)
+        for d in range(digits):
+            out[:, offset + d] = _HEX_DIGITS[(values >> (4 * (digits - 1 - d))) & 0xF]
+    return out.tobytes()
+
+
+def format_record(rec):
+    """Format one record like print_state in top_harness.h."""
+    af, bc, de, hl = (int(rec[name]) for name in ("af", "bc", "de", "hl"))
+    return (
+        f"A: {af >> 8:02X} F: {af & 0xFF:02X} B: {bc >> 8:02X} C: {bc & 0xFF:02X} "
+        f"D: {de >> 8:02X} E: {de & 0xFF:02X} H: {hl >> 8:02X} L: {hl & 0xFF:02X} "
+        f"SP: {int(rec['sp']):04X} PC: 00:{int(rec['pc']):04X} "
+        f"({' '.join(f'{b:02X}' for b in rec['opcode'])})"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarise a top_sim binary trace.")
+    parser.add_argument("trace", help="File written with --trace-bin.")
+    parser.add_argument(
+        "--pc", type=lambda v: int(v, 0), help="List the instructions executed at this PC."
+    )
+    parser.add_argument("--top", type=int, default=10, help="Number of opcodes to list.")
+    args = parser.parse_args()
+
+    trace = open_trace(args.trace)
+    print(f"{len(trace)} records, {int(trace['cycle'][-1]) if len(trace) else 0} M-cycles")
+
+    if args.pc is not None:
+        for idx in np.nonzero(trace["pc"] == args.pc)[0]:
+            print(f"{idx:10d} {format_record(trace[idx])}")
+    else:
+        hist = opcode_histogram(trace)
+        for opcode in np.argsort(hist)[::-1][: args.top]:
+            if hist[opcode]:
+                print(f"{opcode:02X}: {hist[opcode]}")
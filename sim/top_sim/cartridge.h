@@ -0,0 +1,322 @@
+// Cartridge model for the top_sim harness.
+//
+// Without a ROM file the cartridge is a flat 64 KiB array, as the harness
+// always had: reads and writes on the cartridge bus go straight to it.
+//
+// load() memory-maps a .gb file read-only (nothing is copied, so large ROMs
+// start immediately) and emulates the memory bank controller named in the
+// header: none, MBC1, MBC3 (without the RTC) or MBC5. External RAM is a
+// shared mapping of a save file, created or grown to the size in the header,
+// so it persists across runs like battery-backed RAM.
+
+#pragma once
+
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+#include <array>
+#include <cerrno>
+#include <cstdint>
+#include <cstdio>
+#include <cstring>
+#include <string>
+
+class Cartridge
+{
+  public:
+    enum class Mbc
+    {
+        NONE,
+        MBC1,
+        MBC3,
+        MBC5,
+    };
+
+    Cartridge() = default;
+    Cartridge(const Cartridge &) = delete;
+    Cartridge &operator=(const Cartridge &) = delete;
+
+    ~Cartridge() { unload(); }
+
+    // Backing store while no ROM is loaded
+    uint8_t *flat() { return flat_.data(); }
+    size_t   flat_size() const { return flat_.size(); }
+
+    bool        rom_loaded() const { return rom_ != nullptr; }
+    Mbc         mbc() const { return mbc_; }
+    size_t      rom_size() const { return rom_size_; }
+    size_t      ram_size() const { return ram_size_; }
+    const char *error() const { return error_.c_str(); }
+
+    // Map *rom_path*; *save_path* defaults to the ROM path with ".sav".
+    // Returns false and sets error() on failure.
+    bool load(const char *rom_path, const char *save_path = nullptr)
+    {
+        unload();
+
+        const int fd = open(rom_path, O_RDONLY);
+        if (fd < 0) {
+            return fail(std::string(rom_path) + ": " + std::strerror(errno));
+        }
+        struct stat st{};
+        fstat(fd, &st);
+        void *rom = st.st_size >= 0x150 ? mmap(nullptr, st.st_size, PROT_READ, MAP_PRIVATE, fd, 0) : MAP_FAILED;
+        close(fd);
+        if (rom == MAP_FAILED) {
+            return fail(std::string(rom_path) + ": not a ROM image");
+        }
+        rom_ = static_cast<const uint8_t *>(rom);
+        rom_size_ = static_cast<size_t>(st.st_size);
+        rom_banks_ = (rom_size_ + 0x3FFF) / 0x4000;
+
+        const uint8_t type = rom_[0x147];
+        switch (type) {
+        case 0x00:
+        case 0x08:
+        case 0x09:
+            mbc_ = Mbc::NONE;
+            break;
+        case 0x01:
+        case 0x02:
+        case 0x03:
+            mbc_ = Mbc::MBC1;
+            break;
+        case 0x0F:
+        case 0x10:
+        case 0x11:
+        case 0x12:
+        case 0x13:
+            mbc_ = Mbc::MBC3;
+            break;
+        case 0x19:
+        case 0x1A:
+        case 0x1B:
+        case 0x1C:
+        case 0x1D:
+        case 0x1E:
+            mbc_ = Mbc::MBC5;
+            break;
+        default: {
+            char msg[64];
+            snprintf(msg, sizeof(msg), "unsupported cartridge type 0x%02X", type);
+            unload();
+            return fail(msg);
+        }
+        }
+
+        static constexpr size_t kRamSizes[] = {0, 0x800, 0x2000, 0x8000, 0x20000, 0x10000};
+        const uint8_t ram_code = rom_[0x149];
+        ram_size_ = ram_code < sizeof(kRamSizes) / sizeof(kRamSizes[0]) ? kRamSizes[ram_code] : 0;
+        if (ram_size_) {
+            std::string save = save_path ? save_path : save_name(rom_path);
+            if (!map_save(save)) {
+                unload();
+                return false;
+            }
+        }
+
+        reset();
+        return true;
+    }
+
+    void unload()
+    {
+        if (rom_) {
+            munmap(const_cast<uint8_t *>(rom_), rom_size_);
+            rom_ = nullptr;
+        }
+        if (ram_) {
+            msync(ram_, ram_size_, MS_SYNC);
+            munmap(ram_, ram_size_);
+            ram_ = nullptr;
+        }
+        rom_size_ = ram_size_ = 0;
+        mbc_ = Mbc::NONE;
+    }
+
+    // Bank registers back to their power-on values
+    void reset()
+    {
+        ram_enabled_ = false;
+        rom_bank_ = 1;
+        upper_ = 0;
+        ram_bank_ = 0;
+        mode_ = 0;
+    }
+
+    uint8_t read(uint16_t addr) const
+    {
+        if (!rom_) {
+            return flat_[addr];
+        }
+        if (addr < 0x4000) {
+            return rom_byte(low_bank(), addr);
+        }
+        if (addr < 0x8000) {
+            return rom_byte(high_bank(), addr - 0x4000);
+        }
+        if (addr >= 0xA000 && addr < 0xC000) {
+            const long offset = ram_offset(addr);
+            return offset >= 0 ? ram_[offset] : 0xFF;
+        }
+        return 0xFF;
+    }
+
+    void write(uint16_t addr, uint8_t value)
+    {
+        if (!rom_) {
+            flat_[addr] = value;
+            return;
+        }
+        if (addr >= 0xA000 && addr < 0xC000) {
+            const long offset = ram_offset(addr);
+            if (offset >= 0) {
+                ram_[offset] = value;
+            }
+            return;
+        }
+        if (addr >= 0x8000) {
+            return;
+        }
+
+        // ROM area writes program the bank controller
+        switch (mbc_) {
+        case Mbc::NONE:
+            break;
+        case Mbc::MBC1:
+            if (addr < 0x2000) {
+                ram_enabled_ = (value & 0x0F) == 0x0A;
+            } else if (addr < 0x4000) {
+                rom_bank_ = (value & 0x1F) ? (value & 0x1F) : 1;
+            } else if (addr < 0x6000) {
+                upper_ = value & 0x03;
+            } else {
+                mode_ = value & 0x01;
+            }
+            break;
+        case Mbc::MBC3:
+            if (addr < 0x2000) {
+                ram_enabled_ = (value & 0x0F) == 0x0A;
+            } else if (addr < 0x4000) {
+                rom_bank_ = (value & 0x7F) ? (value & 0x7F) : 1;
+            } else if (addr < 0x6000) {
+                // 0x08-0x0C select RTC registers, which are not modelled
+                ram_bank_ = value;
+            }
+            break;
+        case Mbc::MBC5:
+            if (addr < 0x2000) {
+                ram_enabled_ = (value & 0x0F) == 0x0A;
+            } else if (addr < 0x3000) {
+                rom_bank_ = (rom_bank_ & 0x100) | value;
+            } else if (addr < 0x4000) {
+                rom_bank_ = (rom_bank_ & 0xFF) | ((value & 0x01) << 8);
+            } else if (addr < 0x6000) {
+                ram_bank_ = value & 0x0F;
+            }
+            break;
+        }
+    }
+
+  private:
+    bool fail(const std::string &message)
+    {
+        error_ = message;
+        return false;
+    }
+
+    static std::string save_name(const char *rom_path)
+    {
+        std::string name = rom_path;
+        const size_t dot = name.find_last_of('.');
+        const size_t slash = name.find_last_of('/');
+        if (dot != std::string::npos && (slash == std::string::npos || dot > slash)) {
+            name.resize(dot);
+        }
+        return name + ".sav";
+    }
+
+    bool map_save(const std::string &path)
+    {
+        const int fd = open(path.c_str(), O_RDWR | O_CREAT, 0644);
+        if (fd < 0) {
+            return fail(path + ": " + std::strerror(errno));
+        }
+        struct stat st{};
+        fstat(fd, &st);
+        if (static_cast<size_t>(st.st_size) < ram_size_ && ftruncate(fd, static_cast<off_t>(ram_size_)) != 0) {
+            close(fd);
+            return fail(path + ": " + std::strerror(errno));
+        }
+        void *ram = mmap(nullptr, ram_size_, PROT_READ | PROT_WRITE, MAP_SHARED, fd, 0);
+        close(fd);
+        if (ram == MAP_FAILED) {
+            return fail(path + ": " + std::strerror(errno));
+        }
+        ram_ = static_cast<uint8_t *>(ram);
+        return true;
+    }
+
+    size_t low_bank() const
+    {
+        // MBC1 in mode 1 also applies the upper bits to the 0000-3FFF window
+        return mbc_ == Mbc::MBC1 && mode_ ? (static_cast<size_t>(upper_) << 5) : 0;
+    }
+
+    size_t high_bank() const
+    {
+        switch (mbc_) {
+        case Mbc::NONE:
+            return 1;
+        case Mbc::MBC1:
+            return (static_cast<size_t>(upper_) << 5) | rom_bank_;
+        default:
+            return rom_bank_;
+        }
+    }
+
+    uint8_t rom_byte(size_t bank, size_t offset) const
+    {
+        const size_t pos = (bank % rom_banks_) * 0x4000 + offset;
+        return pos < rom_size_ ? rom_[pos] : 0xFF;
+    }
+
+    // Offset into the save RAM for *addr*, or -1 if it is disabled or unmapped
+    long ram_offset(uint16_t addr) const
+    {
+        if (!ram_ || (mbc_ != Mbc::NONE && !ram_enabled_)) {
+            return -1;
+        }
+        size_t bank = 0;
+        if (mbc_ == Mbc::MBC1) {
+            bank = mode_ ? upper_ : 0;
+        } else if (mbc_ == Mbc::MBC3) {
+            if (ram_bank_ > 0x03) {
+                return -1;
+            }
+            bank = ram_bank_;
+        } else if (mbc_ == Mbc::MBC5) {
+            bank = ram_bank_;
+        }
+        const size_t offset = (bank * 0x2000 + (addr - 0xA000)) % ram_size_;
+        return static_cast<long>(offset);
+    }
+
+    std::array<uint8_t, 65536> flat_{};
+
+    const uint8_t *rom_ = nullptr;
+    size_t         rom_size_ = 0;
+    size_t         rom_banks_ = 0;
+    uint8_t       *ram_ = nullptr;
+    size_t         ram_size_ = 0;
+    Mbc            mbc_ = Mbc::NONE;
+    std::string    error_;
+
+    bool     ram_enabled_ = false;
+    uint16_t rom_bank_ = 1;
+    uint8_t  upper_ = 0;
+    uint8_t  ram_bank_ = 0;
+    uint8_t  mode_ = 0;
+};
@@ -0,0 +1,123 @@
+"""Run top_sim in lockstep with the Python SM83 ISS.
+
+The simulator is started with ``--lockstep`` and streams the binary trace
+records of bintrace.py over a pipe. Every byte the RTL CPU
+reads is fed to the ISS before it executes the same instruction, so the
+comparison covers the CPU alone, whatever the bus and peripherals returned.
+The run stops at the first instruction whose registers, M-cycle count or
+memory writes differ, printing only the last few instructions as context.
+"""
+
+import argparse
+import subprocess
+import sys
+from collections import deque
+from pathlib import Path
+
+from bintrace import BUS_READ, BUS_WRITE, format_record, read_chunks
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "test" / "cocotb_cpu_test"))
+from sm83_iss import SM83  # noqa: E402
+
+REGS = ("AF", "BC", "DE", "HL", "SP", "PC")
+
+DEFAULT_BINARY = Path(__file__).resolve().parent / "obj_dir" / "Vtop_verilator_bridge"
+
+
+def read_records(stream):
+    """Yield ``(record, regs, accesses)`` for every trace record in *stream*."""
+    for chunk in read_chunks(stream):
+        for rec in chunk:
+            regs = {name: int(rec[name.lower()]) for name in REGS}
+            accesses = rec["accesses"][: rec["num_accesses"]].tolist()
+            yield rec, regs, accesses
+
+
+def compare(cpu, regs, m_cycles, cycles, accesses):
+    """Return mismatch strings between the RTL record and the ISS after one step."""
+    errors = []
+    iss = cpu.get_state()
+    for name in REGS:
+        rtl, ref = regs[name], iss[name]
+        if name == "AF":
+            rtl &= 0xFFF0
+        if rtl != ref:
+            errors.append(f"{name} rtl={rtl:04X} iss={ref:04X}")
+    if m_cycles != cycles:
+        errors.append(f"M-cycles rtl={m_cycles} iss={cycles}")
+    for addr, data, kind in accesses:
+        if kind == BUS_WRITE and cpu.mem[addr] != data:
+            errors.append(f"write ({addr:04X}) rtl={data:02X} iss={cpu.mem[addr]:02X}")
+    return errors
+
+
+def inject_reads(cpu, accesses):
+    for addr, data, kind in accesses:
+        if kind == BUS_READ:
+            cpu.mem[addr] = data
+
+
+def run_lockstep(cmd, context=16):
+    """Run *cmd* (the simulator command line) against the ISS.
+
+    Returns the number of instructions compared, or raises SystemExit with
+    a report at the first divergence.
+    """
+    proc = subprocess.Popen(cmd + ["--lockstep"], stdout=subprocess.PIPE, bufsize=1 << 16)
+    history = deque(maxlen=context)
+    cpu = SM83()
+    count = 0
+
+    try:
+        records = read_records(proc.stdout)
+        first = next(records, None)
+        if first is None:
+            raise SystemExit("Simulator produced no lockstep records")
+
+        rec, regs, accesses = first
+        cpu.set_state(regs)
+        inject_reads(cpu, accesses)
+        history.append(format_record(rec))
+
+        for rec, regs, accesses in records:
+            inject_reads(cpu, accesses)
+            cycles = cpu.step()
+            count += 1
+
+            errors = compare(cpu, regs, int(rec["m_cycles"]), cycles, accesses)
+            if errors:
+                report = [f"Divergence at instruction {count}:"]
+                report += [f"  {line}" for line in history]
+                report.append(f"> {format_record(rec)}")
+                report += [f"    {error}" for error in errors]
+                raise SystemExit("\n".join(report))
+
+            history.append(format_record(rec))
+            if rec["halted"]:
+                break
+    finally:
+        proc.kill()
+        proc.wait()
+
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare top_sim against the SM83 ISS.")
+    parser.add_argument(
+        "binary",
+        nargs="?",
+        default=str(DEFAULT_BINARY),
+        help="Verilated top_sim executable.",
+    )
+    parser.add_argument(
+        "-n",
+        "--context",
+        type=int,
+        default=16,
+        help="Number of preceding instructions to show at a divergence.",
+    )
+    args = parser.parse_args()
+
+    count = run_lockstep([args.binary], context=args.context)
+    print(f"{count} instructions matched the ISS")
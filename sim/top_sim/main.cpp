@@ -1,141 +1,123 @@
-#include "Vtop_verilator_bridge.h"
-#include "Vtop_verilator_bridge___024root.h"
-#include "verilated.h"
+#include "top_harness.h"
 
-#if VM_TRACE
-    #include "verilated_vcd_c.h"
-#endif
-
-#include <array>
-#include <cstdint>
-#include <iomanip>
-#include <iostream>
-
-namespace {
-
-#if VM_TRACE
-uint64_t       sim_time = 0;
-VerilatedVcdC *g_trace = nullptr;
-
-void dump_trace(Vtop_verilator_bridge &dut)
-{
-    if (g_trace) {
-        g_trace->dump(sim_time);
-    }
-    sim_time++;
-}
-#endif
-
-void print_state(const Vtop_verilator_bridge &dut)
+int main(int argc, char **argv)
 {
+    Verilated::commandArgs(argc, argv);
 
-    printf(
-        "A: %02X F: %02X B: %02X C: %02X D: %02X E: %02X H: %02X L: %02X SP: %04X PC: 00:%04X (%02X %02X %02X %02X)\n",
-        dut.AF_out >> 8,
-        dut.AF_out & 0xFF,
-        dut.BC_out >> 8,
-        dut.BC_out & 0xFF,
-        dut.DE_out >> 8,
-        dut.DE_out & 0xFF,
-        dut.HL_out >> 8,
-        dut.HL_out & 0xFF,
-        dut.SP_out,
-        dut.executing_pc_out,
-        dut.rootp->top_verilator_bridge__DOT__uut__DOT__bus_inst__DOT__bootrom[static_cast<uint16_t>(dut.executing_pc_out)],
-        dut.rootp->top_verilator_bridge__DOT__uut__DOT__bus_inst__DOT__bootrom[static_cast<uint16_t>(dut.executing_pc_out) + 1],
-        dut.rootp->top_verilator_bridge__DOT__uut__DOT__bus_inst__DOT__bootrom[static_cast<uint16_t>(dut.executing_pc_out) + 2],
-        dut.rootp->top_verilator_bridge__DOT__uut__DOT__bus_inst__DOT__bootrom[static_cast<uint16_t>(dut.executing_pc_out) + 3]);
-}
-
-void tick(Vtop_verilator_bridge &dut, std::array<uint8_t, 65536> &ram)
-{
-    dut.clk = 0;
-    dut.eval();
+    // --lockstep: stream binary TraceRecords to stdout for lockstep.py
+    // --trace-bin <file>: write them to a file (read with bintrace.py)
+    // Either replaces the text state printed for every instruction.
+    // --quiet: print nothing per instruction (used by benchmark.py)
+    // --trace-*: waveform window and triggers, see trace_window.h
+    // --rom <file>: run a .gb image through its MBC, see cartridge.h
+    // --save <file>: external RAM file (default: the ROM path with .sav)
+    // --instructions N: stop after N instructions (default: the length of the
+    //   boot ROM, or no limit while stop patterns are active)
+    // --serial-stop <pattern>: stop once the serial output ends with it,
+    //   repeatable (default with --rom: "Passed" and "Failed"), see serial_capture.h
+    bool          quiet = false;
+    SerialCapture serial;
+    bool          has_serial_stop = false;
+    const char *rom_path = nullptr;
+    const char *save_path = nullptr;
+    uint64_t    max_instructions = 0; // 0: not given, see below
 #if VM_TRACE
-    dump_trace(dut);
+    TraceOptions trace_options;
 #endif
-
-    if (dut.cart_re) {
-        dut.cart_din = ram[static_cast<uint16_t>(dut.cart_addr)];
-    } else {
-        dut.cart_din = 0x00;
-    }
-
-    dut.clk = 1;
-    dut.eval();
+    for (int i = 1; i < argc; ++i) {
+        if (std::strcmp(argv[i], "--quiet") == 0) {
+            quiet = true;
+        } else if (std::strcmp(argv[i], "--rom") == 0 && i + 1 < argc) {
+            rom_path = argv[++i];
+        } else if (std::strcmp(argv[i], "--save") == 0 && i + 1 < argc) {
+            save_path = argv[++i];
+        } else if (std::strcmp(argv[i], "--instructions") == 0 && i + 1 < argc) {
+            max_instructions = std::strtoull(argv[++i], nullptr, 0);
+        } else if (std::strcmp(argv[i], "--serial-stop") == 0 && i + 1 < argc) {
+            serial.stop_on(SerialCapture::parse_pattern(argv[++i]));
+            has_serial_stop = true;
 #if VM_TRACE
-    dump_trace(dut);
+        } else if (std::strncmp(argv[i], "--trace-", 8) == 0 && std::strcmp(argv[i], "--trace-bin") != 0 && i + 1 < argc) {
+            if (!trace_options.set(argv[i], argv[i + 1])) {
+                fprintf(stderr, "Unknown option %s\n", argv[i]);
+                return 1;
+            }
+            i++;
 #endif
-
-    if (dut.cart_we) {
-        ram[static_cast<uint16_t>(dut.cart_addr)] = static_cast<uint8_t>(dut.cart_dout);
+        } else if (std::strcmp(argv[i], "--lockstep") == 0) {
+            g_record_out = stdout;
+        } else if (std::strcmp(argv[i], "--trace-bin") == 0 && i + 1 < argc) {
+            g_record_out = fopen(argv[++i], "wb");
+            if (!g_record_out) {
+                perror(argv[i]);
+                return 1;
+            }
+        }
     }
-}
-
-void reset(Vtop_verilator_bridge &dut, std::array<uint8_t, 65536> &ram)
-{
-    dut.rst = 1;
-    dut.cart_din = 0xFF;
-
-    tick(dut, ram);
-    tick(dut, ram);
-    dut.rst = 0;
-    tick(dut, ram);
-}
-
-void step_instruction(Vtop_verilator_bridge &dut, std::array<uint8_t, 65536> &ram)
-{
-    tick(dut, ram);
-    auto cur_copcode = dut.rootp->top_verilator_bridge__DOT__uut__DOT__CPU__DOT__opcode;
-    auto pc = dut.rootp->top_verilator_bridge__DOT__uut__DOT__CPU__DOT__reg_file__DOT__PC_reg;
-    // printf("Executing instruction: 0x%02X at PC=0x%04X\n", cur_copcode, pc);
-
-    while (static_cast<uint16_t>(dut.m_cycle_out) != 0) {
-        tick(dut, ram);
-    };
-}
-
-void disable_bootrom(Vtop_verilator_bridge &dut)
-{
-    dut.rootp->top_verilator_bridge__DOT__uut__DOT__bus_inst__DOT__bootrom_mapped = 0;
-    dut.eval();
-}
-
-} // namespace
-
-int main(int argc, char **argv)
-{
-    Verilated::commandArgs(argc, argv);
+    const bool binary_trace = g_record_out != nullptr;
+    if (rom_path && !has_serial_stop) {
+        serial.stop_on("Passed");
+        serial.stop_on("Failed");
+    }
+    if (max_instructions == 0) {
+        // A serial match or HALT ends a test ROM run
+        max_instructions = rom_path || has_serial_stop ? UINT64_MAX : 47932 + 5;
+    }
+    g_serial = &serial;
 
-    Vtop_verilator_bridge      dut;
-    std::array<uint8_t, 65536> ram{};
+    Vtop_verilator_bridge dut;
+    Cartridge             cart;
 
 #if VM_TRACE
-    Verilated::traceEverOn(true);
-    VerilatedVcdC trace;
-    g_trace = &trace;
-    dut.trace(&trace, 99);
-    trace.open("top_out.vcd");
+    g_trace.attach(dut, trace_options, "top_out");
 #endif
 
-    ram.fill(0x00);
+    if (rom_path) {
+        if (!cart.load(rom_path, save_path)) {
+            fprintf(stderr, "%s\n", cart.error());
+            return 1;
+        }
+    } else {
+        // Set Nintendo logo in the flat cartridge
+        const std::array<uint8_t, 48> nintendo_logo = {0xCE, 0xED, 0x66, 0x66, 0xCC, 0x0D, 0x00, 0x0B, 0x03, 0x73, 0x00, 0x83, 0x00, 0x0C, 0x00, 0x0D,
+                                                       0x00, 0x08, 0x11, 0x1F, 0x88, 0x89, 0x00, 0x0E, 0xDC, 0xCC, 0x6E, 0xE6, 0xDD, 0xDD, 0xD9, 0x99,
+                                                       0xBB, 0xBB, 0x67, 0x63, 0x6E, 0x0E, 0xEC, 0xCC, 0xDD, 0xDC, 0x99, 0x9F, 0xBB, 0xB9, 0x33, 0x3E};
 
-    // Set Nintendo logo in ram
-    const std::array<uint8_t, 48> nintendo_logo = {0xCE, 0xED, 0x66, 0x66, 0xCC, 0x0D, 0x00, 0x0B, 0x03, 0x73, 0x00, 0x83, 0x00, 0x0C, 0x00, 0x0D,
-                                                   0x00, 0x08, 0x11, 0x1F, 0x88, 0x89, 0x00, 0x0E, 0xDC, 0xCC, 0x6E, 0xE6, 0xDD, 0xDD, 0xD9, 0x99,
-                                                   0xBB, 0xBB, 0x67, 0x63, 0x6E, 0x0E, 0xEC, 0xCC, 0xDD, 0xDC, 0x99, 0x9F, 0xBB, 0xB9, 0x33, 0x3E};
+        std::copy(nintendo_logo.begin(), nintendo_logo.end(), cart.flat() + 0x0104);
+    }
 
-    std::copy(nintendo_logo.begin(), nintendo_logo.end(), ram.begin() + 0x0104);
+    TraceRecord record{};
+    if (binary_trace) {
+        write_trace_header(g_record_out);
+        // The first record carries the opcode fetch done while leaving reset
+        g_record = &record;
+    }
 
-    reset(dut, ram);
+    reset(dut, cart);
     // disable_bootrom(dut);
 
-    print_state(dut);
-
-    for (int i = 0; i < 47932 + 5; ++i) {
-        step_instruction(dut, ram);
+    if (binary_trace) {
+        emit_record(dut, cart, 0);
+    } else if (!quiet) {
         print_state(dut);
-        if (dut.halted_out) {
+    }
+
+    uint64_t instructions = 0;
+    uint64_t total_m_cycles = 0;
+    for (uint64_t i = 0; i < max_instructions; ++i) {
+        const int m_cycles = step_instruction(dut, cart);
+        instructions++;
+        total_m_cycles += static_cast<uint64_t>(m_cycles);
+#if VM_TRACE
+        g_trace.observe_instruction(static_cast<uint16_t>(dut.executing_pc_out),
+                                    dut.rootp->top_verilator_bridge__DOT__uut__DOT__CPU__DOT__opcode);
+#endif
+        if (binary_trace) {
+            emit_record(dut, cart, m_cycles);
+        } else if (!quiet) {
+            print_state(dut);
+        }
+        if (dut.halted_out || serial.done()) {
             break;
         }
     }
@@ -151,9 +133,22 @@ int main(int argc, char **argv)
     // }
 
 #if VM_TRACE
-    trace.close();
-    g_trace = nullptr;
+    g_trace.finish();
 #endif
+    g_record = nullptr;
+    g_serial = nullptr;
+    if (g_record_out && g_record_out != stdout) {
+        fclose(g_record_out);
+    }
+    fflush(stdout);
+    fprintf(stderr, "sim stats: %llu instructions, %llu M-cycles\n", static_cast<unsigned long long>(instructions),
+            static_cast<unsigned long long>(total_m_cycles));
+    if (!serial.output().empty()) {
+        fprintf(stderr, "serial: %s\n", SerialCapture::escape(serial.output()).c_str());
+    }
+    if (serial.done()) {
+        fprintf(stderr, "serial: stopped on \"%s\"\n", SerialCapture::escape(serial.pattern(serial.matched())).c_str());
+    }
     dut.final();
     return 0;
 }
@@ -0,0 +1,245 @@
+// The top_sim harness: clocking, cartridge bus and trace helpers shared by
+// the standalone runner (main.cpp) and the Python library (top_lib.cpp).
+
+#pragma once
+
+#include "Vtop_verilator_bridge.h"
+#include "Vtop_verilator_bridge___024root.h"
+#include "verilated.h"
+
+#include "cartridge.h"
+#include "serial_capture.h"
+#include "trace_window.h"
+
+#include <array>
+#include <cstdint>
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+#include <iomanip>
+#include <iostream>
+
+namespace {
+
+constexpr int kMaxBusAccesses = 8;
+
+enum : uint8_t
+{
+    BUS_READ = 1,
+    BUS_WRITE = 2,
+};
+
+#pragma pack(push, 1)
+struct BusAccess
+{
+    uint16_t addr;
+    uint8_t  data;
+    uint8_t  kind;
+};
+
+struct TraceHeader
+{
+    char     magic[8];
+    uint32_t version;
+    uint32_t record_size;
+};
+
+// One instruction of a binary trace: the state after the instruction (pc is
+// the executing PC of the next one, opcode the bytes there) and every CPU bus
+// access it made. Keep in sync with TRACE_DTYPE in bintrace.py.
+struct TraceRecord
+{
+    uint64_t  cycle; // M-cycles since reset at the end of the instruction
+    uint16_t  af, bc, de, hl, sp, pc;
+    uint8_t   opcode[4];
+    uint8_t   m_cycles;
+    uint8_t   halted;
+    uint8_t   num_accesses;
+    uint8_t   flags;
+    uint32_t  reserved;
+    BusAccess accesses[kMaxBusAccesses];
+};
+#pragma pack(pop)
+
+static_assert(sizeof(TraceHeader) == 16, "TraceHeader layout changed");
+static_assert(sizeof(TraceRecord) == 64, "TraceRecord layout changed");
+
+constexpr uint32_t kTraceVersion = 1;
+
+// Non-null while CPU bus accesses are being recorded
+TraceRecord *g_record = nullptr;
+FILE        *g_record_out = nullptr;
+uint64_t     g_cycles = 0;
+
+// Clock cycles (M-cycles) since the start, including reset
+uint64_t g_ticks = 0;
+
+// Non-null while serial output is being captured
+SerialCapture *g_serial = nullptr;
+
+#if VM_TRACE
+uint64_t    sim_time = 0;
+TraceWindow g_trace;
+
+void dump_trace(Vtop_verilator_bridge &dut)
+{
+    g_trace.dump(sim_time);
+    sim_time++;
+}
+#endif
+
+void print_state(const Vtop_verilator_bridge &dut)
+{
+
+    printf(
+        "A: %02X F: %02X B: %02X C: %02X D: %02X E: %02X H: %02X L: %02X SP: %04X PC: 00:%04X (%02X %02X %02X %02X)\n",
+        dut.AF_out >> 8,
+        dut.AF_out & 0xFF,
+        dut.BC_out >> 8,
+        dut.BC_out & 0xFF,
+        dut.DE_out >> 8,
+        dut.DE_out & 0xFF,
+        dut.HL_out >> 8,
+        dut.HL_out & 0xFF,
+        dut.SP_out,
+        dut.executing_pc_out,
+        dut.rootp->top_verilator_bridge__DOT__uut__DOT__bus_inst__DOT__bootrom[static_cast<uint16_t>(dut.executing_pc_out)],
+        dut.rootp->top_verilator_bridge__DOT__uut__DOT__bus_inst__DOT__bootrom[static_cast<uint16_t>(dut.executing_pc_out) + 1],
+        dut.rootp->top_verilator_bridge__DOT__uut__DOT__bus_inst__DOT__bootrom[static_cast<uint16_t>(dut.executing_pc_out) + 2],
+        dut.rootp->top_verilator_bridge__DOT__uut__DOT__bus_inst__DOT__bootrom[static_cast<uint16_t>(dut.executing_pc_out) + 3]);
+}
+
+void log_bus(Vtop_verilator_bridge &dut)
+{
+    // Settle cart_din so cpu_din_out is the value the CPU latches on this edge
+    dut.eval();
+
+    if (dut.rst || !(dut.cpu_re_out || dut.cpu_we_out) || g_record->num_accesses == kMaxBusAccesses) {
+        return;
+    }
+
+    BusAccess &access = g_record->accesses[g_record->num_accesses++];
+    access.addr = static_cast<uint16_t>(dut.cpu_addr_out);
+    if (dut.cpu_we_out) {
+        access.data = static_cast<uint8_t>(dut.cpu_dout_out);
+        access.kind = BUS_WRITE;
+    } else {
+        access.data = static_cast<uint8_t>(dut.cpu_din_out);
+        access.kind = BUS_READ;
+    }
+}
+
+// Best-effort view of memory for the trace: the boot ROM while it is mapped,
+// otherwise the cartridge (internal RAMs are not visible from here)
+uint8_t peek(const Vtop_verilator_bridge &dut, const Cartridge &cart, uint16_t addr)
+{
+    if (addr < 0x100 && dut.rootp->top_verilator_bridge__DOT__uut__DOT__bus_inst__DOT__bootrom_mapped) {
+        return dut.rootp->top_verilator_bridge__DOT__uut__DOT__bus_inst__DOT__bootrom[addr];
+    }
+    return cart.read(addr);
+}
+
+void write_trace_header(FILE *out)
+{
+    TraceHeader header{{'G', 'B', 'T', 'R', 'A', 'C', 'E', '\0'}, kTraceVersion, sizeof(TraceRecord)};
+    fwrite(&header, sizeof(header), 1, out);
+}
+
+void emit_record(const Vtop_verilator_bridge &dut, const Cartridge &cart, int m_cycles)
+{
+    TraceRecord &rec = *g_record;
+    g_cycles += static_cast<uint64_t>(m_cycles);
+
+    rec.cycle = g_cycles;
+    rec.af = static_cast<uint16_t>(dut.AF_out);
+    rec.bc = static_cast<uint16_t>(dut.BC_out);
+    rec.de = static_cast<uint16_t>(dut.DE_out);
+    rec.hl = static_cast<uint16_t>(dut.HL_out);
+    rec.sp = static_cast<uint16_t>(dut.SP_out);
+    rec.pc = static_cast<uint16_t>(dut.executing_pc_out);
+    rec.opcode[0] = dut.rootp->top_verilator_bridge__DOT__uut__DOT__CPU__DOT__opcode;
+    for (int i = 1; i < 4; ++i) {
+        rec.opcode[i] = peek(dut, cart, static_cast<uint16_t>(rec.pc + i));
+    }
+    rec.m_cycles = static_cast<uint8_t>(m_cycles);
+    rec.halted = dut.halted_out ? 1 : 0;
+
+    fwrite(&rec, sizeof(rec), 1, g_record_out);
+    std::memset(&rec, 0, sizeof(rec));
+}
+
+void tick(Vtop_verilator_bridge &dut, Cartridge &cart)
+{
+#if VM_TRACE
+    g_trace.begin_cycle(g_ticks);
+#endif
+    g_ticks++;
+
+    dut.clk = 0;
+    dut.eval();
+#if VM_TRACE
+    dump_trace(dut);
+    if (dut.cpu_we_out) {
+        g_trace.observe_write(static_cast<uint16_t>(dut.cpu_addr_out));
+    }
+#endif
+    if (g_serial && dut.cpu_we_out) {
+        g_serial->observe_write(static_cast<uint16_t>(dut.cpu_addr_out), static_cast<uint8_t>(dut.cpu_dout_out));
+    }
+
+    if (dut.cart_re) {
+        dut.cart_din = cart.read(static_cast<uint16_t>(dut.cart_addr));
+    } else {
+        dut.cart_din = 0x00;
+    }
+
+    if (g_record) {
+        log_bus(dut);
+    }
+
+    dut.clk = 1;
+    dut.eval();
+#if VM_TRACE
+    dump_trace(dut);
+#endif
+
+    if (dut.cart_we) {
+        cart.write(static_cast<uint16_t>(dut.cart_addr), static_cast<uint8_t>(dut.cart_dout));
+    }
+}
+
+void reset(Vtop_verilator_bridge &dut, Cartridge &cart)
+{
+    dut.rst = 1;
+    dut.cart_din = 0xFF;
+    cart.reset();
+
+    tick(dut, cart);
+    tick(dut, cart);
+    dut.rst = 0;
+    tick(dut, cart);
+}
+
+int step_instruction(Vtop_verilator_bridge &dut, Cartridge &cart)
+{
+    int m_cycles = 1;
+    tick(dut, cart);
+    auto cur_copcode = dut.rootp->top_verilator_bridge__DOT__uut__DOT__CPU__DOT__opcode;
+    auto pc = dut.rootp->top_verilator_bridge__DOT__uut__DOT__CPU__DOT__reg_file__DOT__PC_reg;
+    // printf("Executing instruction: 0x%02X at PC=0x%04X\n", cur_copcode, pc);
+
+    while (static_cast<uint16_t>(dut.m_cycle_out) != 0) {
+        tick(dut, cart);
+        m_cycles++;
+    };
+
+    return m_cycles;
+}
+
+void disable_bootrom(Vtop_verilator_bridge &dut)
+{
+    dut.rootp->top_verilator_bridge__DOT__uut__DOT__bus_inst__DOT__bootrom_mapped = 0;
+    dut.eval();
+}
+
+} // namespace
@@ -0,0 +1,197 @@
+// C API over the top_sim harness, built as obj_lib/libtop_sim.so by
+// `make lib` and loaded from Python by top_model.py.
+//
+// Until top_load_rom() maps a .gb image, the cartridge is the harness's own
+// flat 64 KiB array; top_cart() returns its address so Python can map it as a
+// NumPy array or memoryview and read or write it in place between calls.
+//
+// Serial output is captured per instance (see serial_capture.h); the
+// capture is made current at the start of every call that clocks the model.
+
+#include "top_harness.h"
+
+struct TopSim
+{
+    Vtop_verilator_bridge dut;
+    Cartridge             cart;
+    SerialCapture         serial;
+    uint64_t              instructions = 0;
+    uint64_t              m_cycles = 0;
+};
+
+extern "C"
+{
+
+TopSim *top_create(void)
+{
+    return new TopSim();
+}
+
+void top_destroy(TopSim *sim)
+{
+    if (g_serial == &sim->serial) {
+        g_serial = nullptr;
+    }
+    sim->dut.final();
+    delete sim;
+}
+
+uint8_t *top_cart(TopSim *sim)
+{
+    return sim->cart.flat();
+}
+
+size_t top_cart_size(TopSim *sim)
+{
+    return sim->cart.flat_size();
+}
+
+// Map *rom* (and *save*, or NULL for the default) as the cartridge. Returns 0,
+// or -1 with the reason in top_error().
+int top_load_rom(TopSim *sim, const char *rom, const char *save)
+{
+    return sim->cart.load(rom, save) ? 0 : -1;
+}
+
+// Back to the flat array
+void top_unload_rom(TopSim *sim)
+{
+    sim->cart.unload();
+}
+
+const char *top_error(TopSim *sim)
+{
+    return sim->cart.error();
+}
+
+void top_reset(TopSim *sim)
+{
+    sim->serial.clear();
+    g_serial = &sim->serial;
+    reset(sim->dut, sim->cart);
+    sim->instructions = 0;
+    sim->m_cycles = 0;
+}
+
+void top_tick(TopSim *sim, uint64_t n)
+{
+    g_serial = &sim->serial;
+    for (uint64_t i = 0; i < n; ++i) {
+        tick(sim->dut, sim->cart);
+    }
+    sim->m_cycles += n;
+}
+
+// Run up to *n* instructions, stopping early when the CPU halts or the serial
+// output matches a stop pattern. Returns the number executed.
+uint64_t top_step_instructions(TopSim *sim, uint64_t n)
+{
+    g_serial = &sim->serial;
+    uint64_t done = 0;
+    while (done < n && !sim->dut.halted_out && !sim->serial.done()) {
+        sim->m_cycles += static_cast<uint64_t>(step_instruction(sim->dut, sim->cart));
+        done++;
+    }
+    sim->instructions += done;
+    return done;
+}
+
+uint64_t top_instructions(TopSim *sim)
+{
+    return sim->instructions;
+}
+
+uint64_t top_m_cycles(TopSim *sim)
+{
+    return sim->m_cycles;
+}
+
+int top_halted(TopSim *sim)
+{
+    return sim->dut.halted_out ? 1 : 0;
+}
+
+uint16_t top_executing_pc(TopSim *sim)
+{
+    return static_cast<uint16_t>(sim->dut.executing_pc_out);
+}
+
+// Register order of top_get_regs()/top_set_reg(): AF, BC, DE, HL, SP, PC
+void top_get_regs(TopSim *sim, uint16_t *regs)
+{
+    regs[0] = static_cast<uint16_t>(sim->dut.AF_out);
+    regs[1] = static_cast<uint16_t>(sim->dut.BC_out);
+    regs[2] = static_cast<uint16_t>(sim->dut.DE_out);
+    regs[3] = static_cast<uint16_t>(sim->dut.HL_out);
+    regs[4] = static_cast<uint16_t>(sim->dut.SP_out);
+    regs[5] = static_cast<uint16_t>(sim->dut.PC_out);
+}
+
+int top_set_reg(TopSim *sim, int index, uint16_t value)
+{
+    auto *root = sim->dut.rootp;
+    switch (index) {
+    case 0:
+        root->top_verilator_bridge__DOT__uut__DOT__CPU__DOT__reg_file__DOT__AF_reg = value & 0xFFF0;
+        break;
+    case 1:
+        root->top_verilator_bridge__DOT__uut__DOT__CPU__DOT__reg_file__DOT__BC_reg = value;
+        break;
+    case 2:
+        root->top_verilator_bridge__DOT__uut__DOT__CPU__DOT__reg_file__DOT__DE_reg = value;
+        break;
+    case 3:
+        root->top_verilator_bridge__DOT__uut__DOT__CPU__DOT__reg_file__DOT__HL_reg = value;
+        break;
+    case 4:
+        root->top_verilator_bridge__DOT__uut__DOT__CPU__DOT__reg_file__DOT__SP_reg = value;
+        break;
+    case 5:
+        root->top_verilator_bridge__DOT__uut__DOT__CPU__DOT__reg_file__DOT__PC_reg = value;
+        break;
+    default:
+        return -1;
+    }
+    sim->dut.eval();
+    return 0;
+}
+
+// Bytes sent over the serial port since the last reset or top_serial_clear()
+const char *top_serial(TopSim *sim)
+{
+    return sim->serial.output().data();
+}
+
+size_t top_serial_size(TopSim *sim)
+{
+    return sim->serial.output().size();
+}
+
+void top_serial_clear(TopSim *sim)
+{
+    sim->serial.clear();
+}
+
+// Stop top_step_instructions() once the serial output ends with *pattern*
+void top_serial_stop_on(TopSim *sim, const char *pattern, size_t size)
+{
+    sim->serial.stop_on(std::string(pattern, size));
+}
+
+void top_serial_clear_patterns(TopSim *sim)
+{
+    sim->serial.clear_patterns();
+}
+
+// Index of the matched stop pattern in registration order, or -1
+int top_serial_matched(TopSim *sim)
+{
+    return sim->serial.matched();
+}
+
+void top_disable_bootrom(TopSim *sim)
+{
+    disable_bootrom(sim->dut);
+}
+
+} // extern "C"
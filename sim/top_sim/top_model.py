@@ -0,0 +1,218 @@
+"""Drive the Verilated ``top`` from Python through libtop_sim.so.
+
+Build the library with ``make lib``. Everything runs in-process at Verilator
+speed: there is no VPI and no per-cycle callback into Python. The cartridge
+is the harness's own 64 KiB buffer, exposed without copying as
+:attr:`TopModel.cart` (a NumPy array) and :attr:`TopModel.cart_view` (a
+memoryview)::
+
+    model = TopModel()
+    model.cart[0x0104:0x0134] = NINTENDO_LOGO
+    model.reset()
+    model.step_instructions(1000)
+    print(model.regs())
+
+:meth:`TopModel.load_rom` instead maps a ``.gb`` image and emulates its
+memory bank controller (see ``cartridge.h``); :attr:`~TopModel.cart` is then
+unused until :meth:`~TopModel.unload_rom`.
+
+Bytes the program sends over the serial port collect in
+:attr:`TopModel.serial`. Test ROMs print their verdict there, so a run can
+stop as soon as it appears instead of using a fixed instruction budget::
+
+    model.load_rom("cpu_instrs.gb")
+    model.reset()
+    model.stop_on("Passed", "Failed")
+    model.step_instructions(100_000_000)
+    print(model.serial.decode(), model.matched)
+"""
+
+import ctypes
+import os
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_LIBRARY = Path(__file__).resolve().parent / "obj_lib" / "libtop_sim.so"
+
+REGS = ("AF", "BC", "DE", "HL", "SP", "PC")
+
+
+def _load(path):
+    lib = ctypes.CDLL(str(path))
+    handle = ctypes.c_void_p
+
+    signatures = {
+        "top_create": ([], handle),
+        "top_destroy": ([handle], None),
+        "top_cart": ([handle], ctypes.POINTER(ctypes.c_uint8)),
+        "top_cart_size": ([handle], ctypes.c_size_t),
+        "top_load_rom": ([handle, ctypes.c_char_p, ctypes.c_char_p], ctypes.c_int),
+        "top_unload_rom": ([handle], None),
+        "top_error": ([handle], ctypes.c_char_p),
+        "top_reset": ([handle], None),
+        "top_tick": ([handle, ctypes.c_uint64], None),
+        "top_step_instructions": ([handle, ctypes.c_uint64], ctypes.c_uint64),
+        "top_instructions": ([handle], ctypes.c_uint64),
+        "top_m_cycles": ([handle], ctypes.c_uint64),
+        "top_halted": ([handle], ctypes.c_int),
+        "top_executing_pc": ([handle], ctypes.c_uint16),
+        "top_get_regs": ([handle, ctypes.POINTER(ctypes.c_uint16)], None),
+        "top_set_reg": ([handle, ctypes.c_int, ctypes.c_uint16], ctypes.c_int),
+        "top_disable_bootrom": ([handle], None),
+        "top_serial": ([handle], ctypes.c_void_p),
+        "top_serial_size": ([handle], ctypes.c_size_t),
+        "top_serial_clear": ([handle], None),
+        "top_serial_stop_on": ([handle, ctypes.c_char_p, ctypes.c_size_t], None),
+        "top_serial_clear_patterns": ([handle], None),
+        "top_serial_matched": ([handle], ctypes.c_int),
+    }
+    for name, (argtypes, restype) in signatures.items():
+        func = getattr(lib, name)
+        func.argtypes = argtypes
+        func.restype = restype
+    return lib
+
+
+class _Instance:
+    """Owns one C++ TopSim and destroys it when the last reference goes."""
+
+    def __init__(self, lib):
+        self.lib = lib
+        self.sim = lib.top_create()
+
+    def __del__(self):
+        self.lib.top_destroy(self.sim)
+
+
+class TopModel:
+    """One instance of the Verilated ``top`` with its cartridge memory.
+
+    :attr:`cart` and :attr:`cart_view` point into the C++ model. Arrays or
+    slices taken from them keep the model's memory alive, so they stay valid
+    after :meth:`close`, which only drops this object's own references: the
+    C++ model is destroyed once neither the TopModel nor any such view is
+    left.
+    """
+
+    def __init__(self, library=DEFAULT_LIBRARY):
+        self._sim = None
+        self._lib = _load(library)
+        self._instance = _Instance(self._lib)
+        self._sim = self._instance.sim
+        self._patterns = []
+        size = self._lib.top_cart_size(self._sim)
+        pointer = self._lib.top_cart(self._sim)
+        buffer = ctypes.cast(pointer, ctypes.POINTER(ctypes.c_uint8 * size)).contents
+        # Every view of the buffer references it, and through it the model
+        buffer._instance = self._instance
+        self.cart_view = memoryview(buffer).cast("B")
+        self.cart = np.frombuffer(buffer, dtype=np.uint8)
+
+    def close(self):
+        if getattr(self, "_sim", None) is not None:
+            self.cart = self.cart_view = None
+            self._instance = None
+            self._sim = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def load_rom(self, path, save=None):
+        """Map the ROM at *path*; external RAM persists in *save*.
+
+        *save* defaults to *path* with a ``.sav`` suffix. Call :meth:`reset`
+        afterwards.
+        """
+        save = None if save is None else os.fsencode(save)
+        if self._lib.top_load_rom(self._sim, os.fsencode(path), save):
+            raise OSError(self._lib.top_error(self._sim).decode())
+
+    def unload_rom(self):
+        """Go back to the flat :attr:`cart` buffer."""
+        self._lib.top_unload_rom(self._sim)
+
+    def reset(self):
+        """Reset the design; the CPU fetches the first boot ROM opcode."""
+        self._lib.top_reset(self._sim)
+
+    def tick(self, n=1):
+        """Advance *n* clock cycles (M-cycles)."""
+        self._lib.top_tick(self._sim, n)
+
+    def step_instructions(self, n=1):
+        """Run up to *n* instructions, stopping at HALT or a serial match.
+
+        Returns how many ran.
+        """
+        return self._lib.top_step_instructions(self._sim, n)
+
+    def stop_on(self, *patterns):
+        """Stop :meth:`step_instructions` once :attr:`serial` ends with a pattern.
+
+        Patterns are ``str`` (encoded as Latin-1) or ``bytes`` and add to
+        those already registered.
+        """
+        for pattern in patterns:
+            if isinstance(pattern, str):
+                pattern = pattern.encode("latin-1")
+            self._lib.top_serial_stop_on(self._sim, pattern, len(pattern))
+            self._patterns.append(pattern)
+
+    def clear_stop_patterns(self):
+        self._lib.top_serial_clear_patterns(self._sim)
+        self._patterns = []
+
+    @property
+    def serial(self):
+        """Bytes sent over the serial port since :meth:`reset`."""
+        size = self._lib.top_serial_size(self._sim)
+        return ctypes.string_at(self._lib.top_serial(self._sim), size) if size else b""
+
+    def clear_serial(self):
+        """Forget the serial output and any match, e.g. between test cases."""
+        self._lib.top_serial_clear(self._sim)
+
+    @property
+    def matched(self):
+        """The stop pattern that ended the serial output (as bytes), or None."""
+        index = self._lib.top_serial_matched(self._sim)
+        return self._patterns[index] if index >= 0 else None
+
+    def disable_bootrom(self):
+        self._lib.top_disable_bootrom(self._sim)
+
+    @property
+    def instructions(self):
+        return self._lib.top_instructions(self._sim)
+
+    @property
+    def m_cycles(self):
+        return self._lib.top_m_cycles(self._sim)
+
+    @property
+    def halted(self):
+        return bool(self._lib.top_halted(self._sim))
+
+    @property
+    def executing_pc(self):
+        return self._lib.top_executing_pc(self._sim)
+
+    def regs(self):
+        """Return ``{"AF": .., "BC": .., "DE": .., "HL": .., "SP": .., "PC": ..}``."""
+        values = (ctypes.c_uint16 * len(REGS))()
+        self._lib.top_get_regs(self._sim, values)
+        return dict(zip(REGS, values))
+
+    def __getitem__(self, name):
+        return self.regs()[name]
+
+    def __setitem__(self, name, value):
+        if self._lib.top_set_reg(self._sim, REGS.index(name), value & 0xFFFF):
+            raise KeyError(name)
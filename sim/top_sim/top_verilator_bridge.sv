@@ -18,7 +18,14 @@ module top_verilator_bridge (
     output logic [15:0] PC_out,
     output logic [15:0] executing_pc_out,
     output logic [2:0] m_cycle_out,
-    output logic halted_out
+    output logic halted_out,
+
+    // CPU side of the bus, before address decoding
+    output logic cpu_re_out,
+    output logic cpu_we_out,
+    output logic [15:0] cpu_addr_out,
+    output logic [7:0] cpu_din_out,
+    output logic [7:0] cpu_dout_out
 );
 
   bus_if cart_bus ();
@@ -50,6 +57,12 @@ module top_verilator_bridge (
 `endif
     m_cycle_out = uut.CPU.control_unit.m_cycle;
     halted_out = uut.CPU.control_unit.halt;
+
+    cpu_re_out = uut.cpu_bus.re;
+    cpu_we_out = uut.cpu_bus.we;
+    cpu_addr_out = uut.cpu_bus.addr;
+    cpu_din_out = uut.cpu_bus.din;
+    cpu_dout_out = uut.cpu_bus.dout;
   end
 
 endmodule
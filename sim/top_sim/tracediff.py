@@ -0,0 +1,164 @@
+"""Find the first divergence between two top_sim traces.
+
+Either side may be a text log in the print_state format (``A: .. F: .. ...
+PC: 00:xxxx (..)``, one line per instruction) or a binary trace written
+with ``--trace-bin``. Both files are memory-mapped and compared one chunk at
+a time: a chunk that is byte-identical on both sides is skipped with a
+single comparison, and only a chunk that differs is compared line by line.
+Memory use therefore depends on the chunk size, not on the log size.
+"""
+
+import argparse
+import mmap
+import sys
+from collections import deque
+
+from bintrace import HEADER, TRACE_MAGIC, open_trace, render_text
+
+CHUNK_BYTES = 1 << 22
+
+
+class TextLog:
+    """A print_state text log, read in chunks of whole lines."""
+
+    def __init__(self, path, chunk_bytes=CHUNK_BYTES):
+        self.path = path
+        self.chunk_bytes = chunk_bytes
+        self.pos = 0
+        with open(path, "rb") as f:
+            try:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                self._mm = b""
+
+    def _slice(self, end):
+        data = self._mm[self.pos : end]
+        self.pos = end
+        if data and not data.endswith(b"\n"):
+            data += b"\n"
+        return data
+
+    def next_chunk(self):
+        """Return the next ``chunk_bytes`` or so of whole lines (b"" at the end)."""
+        mm = self._mm
+        end = min(self.pos + self.chunk_bytes, len(mm))
+        if end < len(mm):
+            nl = mm.rfind(b"\n", self.pos, end)
+            if nl < 0:
+                nl = mm.find(b"\n", end)
+            end = len(mm) if nl < 0 else nl + 1
+        return self._slice(end)
+
+    def take(self, lines, expect=None):
+        """Return the next *lines* lines; *expect* is tried first as a fast path."""
+        mm = self._mm
+        if expect is not None and mm[self.pos : self.pos + len(expect)] == expect:
+            self.pos += len(expect)
+            return expect
+
+        end = self.pos
+        for _ in range(lines):
+            if end >= len(mm):
+                break
+            nl = mm.find(b"\n", end)
+            end = len(mm) if nl < 0 else nl + 1
+        return self._slice(end)
+
+
+class BinaryTrace:
+    """A ``--trace-bin`` trace, rendered to print_state lines on the fly."""
+
+    def __init__(self, path, chunk_records=CHUNK_BYTES // 64):
+        self.path = path
+        self.chunk_records = chunk_records
+        self.trace = open_trace(path)
+        self.pos = 0
+
+    def next_chunk(self):
+        return self.take(self.chunk_records)
+
+    def take(self, lines, expect=None):
+        records = self.trace[self.pos : self.pos + lines]
+        self.pos += len(records)
+        return render_text(records)
+
+
+def open_log(path):
+    with open(path, "rb") as f:
+        magic = f.read(HEADER.size)[:8]
+    return BinaryTrace(path) if magic == TRACE_MAGIC else TextLog(path)
+
+
+def normalise(line, ignore_mem=False):
+    line = line.rstrip(b"\r ")
+    if ignore_mem:
+        line = line.split(b" (", 1)[0]
+    return line
+
+
+def diff_logs(a, b, context=8, ignore_mem=False):
+    """Compare two logs; return None if they match or a report of the first difference."""
+    history = deque(maxlen=context)
+    line_no = 0
+
+    while True:
+        chunk_a = a.next_chunk()
+        if not chunk_a:
+            # a ended; anything left in b is extra
+            extra = b.take(1)
+            if extra:
+                return _report(a, b, line_no, history, None, extra.rstrip(b"\n"), context)
+            return None
+
+        count = chunk_a.count(b"\n")
+        chunk_b = b.take(count, expect=chunk_a)
+
+        if chunk_a == chunk_b:
+            line_no += count
+            history.extend(chunk_a.rsplit(b"\n", context + 1)[-context - 1 : -1])
+            continue
+
+        lines_a = chunk_a.split(b"\n")[:-1]
+        lines_b = chunk_b.split(b"\n")[:-1]
+        for i, line_a in enumerate(lines_a):
+            if i >= len(lines_b):
+                return _report(a, b, line_no + i, history, line_a, None, context)
+            if normalise(line_a, ignore_mem) != normalise(lines_b[i], ignore_mem):
+                after = (lines_a[i + 1 : i + 3], lines_b[i + 1 : i + 3])
+                return _report(a, b, line_no + i, history, line_a, lines_b[i], context, after)
+            history.append(line_a)
+        line_no += count
+
+
+def _report(a, b, index, history, line_a, line_b, context, after=((), ())):
+    out = [f"First difference at line {index + 1} (instruction {index}):"]
+    out += [f"  {line.decode(errors='replace')}" for line in list(history)[-context:]]
+    out.append(f"- {line_a.decode(errors='replace') if line_a is not None else '<end of log>'}  [{a.path}]")
+    out.append(f"+ {line_b.decode(errors='replace') if line_b is not None else '<end of log>'}  [{b.path}]")
+    for line in after[0]:
+        out.append(f"- {line.decode(errors='replace')}")
+    for line in after[1]:
+        out.append(f"+ {line.decode(errors='replace')}")
+    return "\n".join(out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find the first divergence between two traces.")
+    parser.add_argument("a", help="Text log or binary trace (e.g. from top_sim).")
+    parser.add_argument("b", help="Text log or binary trace (e.g. the reference).")
+    parser.add_argument(
+        "-C", "--context", type=int, default=8, help="Matching lines to show before the difference."
+    )
+    parser.add_argument(
+        "--ignore-mem",
+        action="store_true",
+        help="Ignore the memory bytes in parentheses at the end of each line.",
+    )
+    args = parser.parse_args()
+
+    report = diff_logs(open_log(args.a), open_log(args.b), args.context, args.ignore_mem)
+    if report is None:
+        print("Traces match")
+        sys.exit(0)
+    print(report)
+    sys.exit(1)
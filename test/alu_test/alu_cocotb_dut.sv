@@ -0,0 +1,58 @@
+`timescale 1ns / 1ps
+
+import alu_pkg::*;
+
+// Sweeps every {carry_in, A, B} combination through the ALU for the op on
+// `op`, one per clock, and stores {flags_out, res} in `results`. Pulse `start`
+// and wait for `done`; the results are then written to
+// alu_results_<op>.hex so the testbench can check all of them at once.
+module alu_cocotb_dut (
+    input logic clk,
+    input logic rst,
+    input logic [4:0] op,
+    input logic start,
+    output logic done
+);
+
+  logic running;
+  logic [16:0] idx;  // {carry_in, A, B}
+  logic [7:0] res;
+  flags_t flags_out;
+
+  reg [11:0] results[131072];
+
+  ALU uut (
+      .en(1'b1),
+      .A(idx[15:8]),
+      .B(idx[7:0]),
+      .flags_in({3'b000, idx[16]}),
+      .op(alu_op_t'(op)),
+      .bit_idx(3'b000),
+      .res(res),
+      .flags_out(flags_out)
+  );
+
+  always @(posedge clk) begin
+    if (rst) begin
+      running <= 0;
+      done <= 0;
+      idx <= 0;
+    end else if (start && !running) begin
+      running <= 1;
+      done <= 0;
+      idx <= 0;
+    end else if (running) begin
+      results[idx] <= {flags_out, res};
+      idx <= idx + 1;
+      if (idx == 17'h1FFFF) begin
+        running <= 0;
+        done <= 1;
+      end
+    end
+  end
+
+  always @(posedge done) begin
+    $writememh($sformatf("alu_results_%0d.hex", op), results);
+  end
+
+endmodule
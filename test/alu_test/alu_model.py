@@ -0,0 +1,67 @@
+"""Vectorised NumPy reference for the 8-bit ALU operations.
+
+Every function works on whole arrays at once, so the reference for all
+256 x 256 x 2 operand combinations of an op is a handful of array operations.
+"""
+
+import numpy as np
+
+ALU_OPS = ["ADD", "ADC", "SUB", "SBC", "AND", "XOR", "OR", "CP"]
+
+# Flag bits as packed in alu_pkg::flags_t ({Z, N, H, C})
+FLAG_Z = 0b1000
+FLAG_N = 0b0100
+FLAG_H = 0b0010
+FLAG_C = 0b0001
+
+SWEEP_SIZE = 2 * 256 * 256
+
+
+def sweep_operands():
+    """Return (a, b, carry_in) for every sweep index ``{carry_in, a, b}``."""
+    idx = np.arange(SWEEP_SIZE, dtype=np.int32)
+    return (idx >> 8) & 0xFF, idx & 0xFF, idx >> 16
+
+
+def alu_reference(op, a, b, c):
+    """Return (res, flags) arrays for ALU *op* as seen on the ALU outputs.
+
+    ``CP`` drives ``res`` to 0 in the RTL; only its flags matter.
+    """
+    a = np.asarray(a, dtype=np.int32)
+    b = np.asarray(b, dtype=np.int32)
+    c = np.asarray(c, dtype=np.int32)
+    n = 0
+
+    if op in ("ADD", "ADC"):
+        cin = c if op == "ADC" else 0
+        full = a + b + cin
+        half = (a & 0xF) + (b & 0xF) + cin > 0xF
+        carry = full > 0xFF
+    elif op in ("SUB", "SBC", "CP"):
+        cin = c if op == "SBC" else 0
+        full = a - b - cin
+        half = (a & 0xF) < (b & 0xF) + cin
+        carry = a < b + cin
+        n = FLAG_N
+    else:
+        if op == "AND":
+            full = a & b
+        elif op == "XOR":
+            full = a ^ b
+        else:
+            full = a | b
+        half = np.full(a.shape, op == "AND")
+        carry = np.zeros(a.shape, dtype=bool)
+
+    res = full & 0xFF
+    flags = (
+        np.where(res == 0, FLAG_Z, 0)
+        | n
+        | np.where(half, FLAG_H, 0)
+        | np.where(carry, FLAG_C, 0)
+    )
+    if op == "CP":
+        res = np.zeros_like(res)
+
+    return res.astype(np.uint8), flags.astype(np.uint8)
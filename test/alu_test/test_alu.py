@@ -0,0 +1,112 @@
+import os
+import sys
+from pathlib import Path
+
+import cocotb
+import numpy as np
+from alu_model import ALU_OPS, SWEEP_SIZE, alu_reference, sweep_operands
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, Timer
+from cocotb_tools.runner import get_runner
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from build_cache import cached_build  # noqa: E402
+
+MAX_REPORT = 16
+
+
+def read_results(path):
+    """Parse a $writememh dump of {flags, res} words into two uint8 arrays."""
+    words = []
+    with open(path) as f:
+        for line in f:
+            line = line.split("//")[0].strip()
+            if line and not line.startswith("@"):
+                words.append(line)
+    raw = np.array([int(w, 16) if "x" not in w.lower() else 0xFFFF for w in words], dtype=np.int32)
+    assert raw.size == SWEEP_SIZE, f"expected {SWEEP_SIZE} results, got {raw.size}"
+    return (raw & 0xFF).astype(np.uint8), ((raw >> 8) & 0xF).astype(np.uint8)
+
+
+async def reset_dut(dut):
+    dut.op.value = 0
+    dut.start.value = 0
+    dut.rst.value = 1
+    await RisingEdge(dut.clk)
+    await RisingEdge(dut.clk)
+    dut.rst.value = 0
+    await RisingEdge(dut.clk)
+
+
+@cocotb.test()
+async def test_alu_exhaustive(dut):
+    cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
+    await reset_dut(dut)
+
+    a, b, c = sweep_operands()
+    failures = []
+    checked = 0
+
+    for op_idx, op in enumerate(ALU_OPS):
+        dut.op.value = op_idx
+        dut.start.value = 1
+        await RisingEdge(dut.clk)
+        dut.start.value = 0
+        await RisingEdge(dut.done)
+        await Timer(1, unit="ns")
+
+        res, flags = read_results(f"alu_results_{op_idx}.hex")
+        exp_res, exp_flags = alu_reference(op, a, b, c)
+
+        bad = np.flatnonzero((res != exp_res) | (flags != exp_flags))
+        checked += SWEEP_SIZE
+        dut._log.info("%s: %d/%d mismatches", op, bad.size, SWEEP_SIZE)
+        for i in bad[:MAX_REPORT]:
+            failures.append(
+                f"{op} A={a[i]:#04x} B={b[i]:#04x} C={c[i]}: "
+                f"res={res[i]:#04x}/{exp_res[i]:#04x} flags={flags[i]:04b}/{exp_flags[i]:04b}"
+            )
+        if bad.size > MAX_REPORT:
+            failures.append(f"{op}: ... and {bad.size - MAX_REPORT} more")
+
+    report = "\n".join(failures)
+    assert not failures, f"ALU mismatches (got/expected) out of {checked} checks:\n{report}"
+
+
+def test_alu_pytest():
+    sim = os.getenv("SIM", "verilator")
+
+    proj_path = Path(__file__).resolve().parents[2]
+    sources = [
+        proj_path / "rtl" / "cpu" / "alu_pkg.sv",
+        proj_path / "rtl" / "cpu" / "alu.sv",
+        proj_path / "test" / "alu_test" / "alu_cocotb_dut.sv",
+    ]
+
+    runner = get_runner(sim)
+    build_args = ["-Wall"]
+    if sim == "icarus":
+        build_args = ["-g2012", "-Wall"]
+    elif sim == "verilator":
+        build_args += ["-Wno-DECLFILENAME", "-Wno-IMPORTSTAR", "-Wno-fatal"]
+
+    build_dir = cached_build(
+        sim,
+        sources=sources,
+        hdl_toplevel="alu_cocotb_dut",
+        waves=False,
+        build_args=build_args,
+    )
+
+    runner.test(
+        hdl_toplevel="alu_cocotb_dut",
+        hdl_toplevel_lang="verilog",
+        build_dir=build_dir,
+        test_module=Path(__file__).stem,
+        waves=False,
+        gui=False,
+    )
+
+
+if __name__ == "__main__":
+    test_alu_pytest()
@@ -0,0 +1,258 @@
+"""Simulation throughput benchmarks with a persistent history.
+
+Each workload reports simulated clock cycles and instructions, together
+with the wall time they took:
+
+``cpu_icarus`` / ``cpu_verilator``
+    The cocotb CPU suite (run_tests.py) under each simulator. Cycles and
+    wall time are summed over the testcases of results.xml, so simulator
+    start-up and the build are not counted. The testbenches do not count
+    instructions, so ``instructions`` is recorded as ``null``.
+``top_sim``
+    The boot ROM run of the Verilated ``top`` (sim/top_sim, ``--quiet``).
+``gbit``
+    The gbit instruction sweep of the Verilated CPU (test/gbit_test).
+
+Every run is appended to ``--history`` (JSON) with the commit and host. A
+workload whose cycles per second dropped more than ``--threshold`` below
+the median of its last runs on the same host is reported as a regression,
+and the script exits with status 1. So does a workload whose suite or
+harness failed; its result is stored with ``"failed": true`` and is left
+out of regression baselines and of :func:`fastest_simulator`.
+
+    python3 benchmark.py                       # all workloads
+    python3 benchmark.py top_sim gbit          # just these
+    python3 benchmark.py cpu_verilator -k "test_cb_*"
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from xml.etree import ElementTree
+
+TEST_DIR = Path(__file__).resolve().parent
+PROJ_DIR = TEST_DIR.parent
+
+# Clock period of the cocotb CPU testbenches (test_utils / test_fixed)
+CPU_CLK_PERIOD_NS = 10
+
+STATS_RE = re.compile(rb"sim stats: (\d+) instructions, (\d+) M-cycles")
+
+DEFAULT_HISTORY = TEST_DIR / "logs" / "benchmark_history.json"
+# Runs of the same workload and host the regression baseline is taken from
+BASELINE_RUNS = 5
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJ_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _result(wall, cycles, instructions=None, failed=False):
+    result = {
+        "wall_s": round(wall, 4),
+        "cycles": cycles,
+        "cycles_per_s": round(cycles / wall, 1) if wall else None,
+        "instructions": instructions,
+        "instructions_per_s": (
+            round(instructions / wall, 1) if wall and instructions is not None else None
+        ),
+    }
+    if failed:
+        result["failed"] = True
+    return result
+
+
+def _usable(result):
+    """True if *result* may serve as a baseline or for simulator selection."""
+    return bool(result.get("cycles_per_s")) and not result.get("failed")
+
+
+def run_harness(cmd, cwd):
+    """Run a Verilated harness; return its result from the stats line on stderr."""
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    wall = time.perf_counter() - start
+
+    match = STATS_RE.search(proc.stderr)
+    if match is None:
+        raise RuntimeError(f"{cmd[0]} printed no sim stats (exit status {proc.returncode})")
+    return _result(wall, int(match.group(2)), int(match.group(1)), failed=proc.returncode != 0)
+
+
+def results_xml_totals(results_file):
+    """Return ``(real seconds, sim ns)`` summed over the testcases of *results_file*."""
+    real = sim_ns = 0.0
+    for case in ElementTree.parse(results_file).getroot().iter("testcase"):
+        real += float(case.get("time", 0))
+        sim_ns += float(case.get("sim_time_ns", 0))
+    return real, sim_ns
+
+
+def run_cpu_suite(sim, testcases=()):
+    cwd = TEST_DIR / "cocotb_cpu_test"
+    results_file = cwd / "sim_build" / "results.xml"
+    results_file.unlink(missing_ok=True)
+
+    env = dict(os.environ, SIM=sim)
+    proc = subprocess.run(
+        [sys.executable, "run_tests.py", *testcases], cwd=cwd, env=env, stdout=subprocess.DEVNULL
+    )
+    if not results_file.is_file():
+        raise RuntimeError(f"CPU suite under {sim} wrote no {results_file}")
+
+    real, sim_ns = results_xml_totals(results_file)
+    # No instruction count: the cocotb testbenches only track clock cycles
+    return _result(real, int(sim_ns / CPU_CLK_PERIOD_NS), failed=proc.returncode != 0)
+
+
+WORKLOADS = {
+    "cpu_icarus": lambda args: run_cpu_suite("icarus", args.testcases),
+    "cpu_verilator": lambda args: run_cpu_suite("verilator", args.testcases),
+    "top_sim": lambda args: run_harness(
+        ["./obj_dir/Vtop_verilator_bridge", "--quiet"], PROJ_DIR / "sim" / "top_sim"
+    ),
+    "gbit": lambda args: run_harness(
+        ["./obj_dir/Vcpu_verilator_bridge", "--keep-going"], TEST_DIR / "gbit_test"
+    ),
+}
+
+
+def load_history(path):
+    path = Path(path)
+    if not path.is_file():
+        return []
+    return json.loads(path.read_text())
+
+
+def find_regressions(history, run, threshold):
+    """Compare *run* against earlier runs on the same host.
+
+    Returns ``[(workload, rate, baseline)]`` for every workload whose cycles
+    per second fell more than *threshold* (a fraction) below the median of
+    the last BASELINE_RUNS runs. Failed runs are neither compared nor used
+    as a baseline.
+    """
+    regressions = []
+    for name, result in run["results"].items():
+        previous = [
+            past["results"][name]["cycles_per_s"]
+            for past in history
+            if past.get("host") == run["host"]
+            and name in past.get("results", {})
+            and _usable(past["results"][name])
+        ][-BASELINE_RUNS:]
+        if not previous or not _usable(result):
+            continue
+        rate = result["cycles_per_s"]
+        baseline = statistics.median(previous)
+        if rate < baseline * (1 - threshold):
+            regressions.append((name, rate, baseline))
+    return regressions
+
+
+def fastest_simulator(suite, default, path=DEFAULT_HISTORY):
+    """Return the simulator with the best recent cycles/s for *suite* on this host.
+
+    Looks at the ``<suite>_<sim>`` workloads of the latest run in the
+    history that measured more than one of them without failing; *default*
+    when there is none.
+    """
+    host = platform.node()
+    for run in reversed(load_history(path)):
+        if run.get("host") != host:
+            continue
+        rates = {
+            name[len(suite) + 1 :]: result["cycles_per_s"]
+            for name, result in run.get("results", {}).items()
+            if name.startswith(suite + "_") and _usable(result)
+        }
+        if len(rates) > 1:
+            return max(rates, key=rates.get)
+    return default
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure simulation throughput.",
+        epilog="cpu_icarus and cpu_verilator record instructions as null: the cocotb "
+        "testbenches only count clock cycles. Failed runs are stored but not used as "
+        "baselines or for simulator selection.",
+    )
+    parser.add_argument(
+        "workloads",
+        nargs="*",
+        help=f"Workloads to run (default: all of {', '.join(WORKLOADS)}).",
+    )
+    parser.add_argument(
+        "-k",
+        "--testcases",
+        action="append",
+        default=[],
+        help="Test name patterns for the cocotb CPU workloads (default: whole suite).",
+    )
+    parser.add_argument("--history", default=str(DEFAULT_HISTORY), help="JSON history file.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.15,
+        help="Slowdown, as a fraction of the baseline, reported as a regression.",
+    )
+    args = parser.parse_args()
+    unknown = set(args.workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown workload(s): {', '.join(sorted(unknown))}")
+
+    run = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "host": platform.node(),
+        "results": {},
+    }
+    for name in args.workloads or WORKLOADS:
+        try:
+            result = WORKLOADS[name](args)
+        except (OSError, RuntimeError) as e:
+            print(f"{name:<14} skipped: {e}")
+            continue
+        run["results"][name] = result
+        ips = result["instructions_per_s"]
+        print(
+            f"{name:<14} {result['wall_s']:9.2f} s {result['cycles_per_s'] or 0:14,.0f} cycles/s"
+            + (f" {ips:14,.0f} instr/s" if ips else f" {'n/a':>14} instr/s")
+            + (" FAILED (not used as a baseline)" if result.get("failed") else "")
+        )
+
+    history = load_history(args.history)
+    regressions = find_regressions(history, run, args.threshold)
+
+    history.append(run)
+    Path(args.history).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.history).write_text(json.dumps(history, indent=1) + "\n")
+
+    for name, rate, baseline in regressions:
+        print(
+            f"REGRESSION {name}: {rate:,.0f} cycles/s vs baseline {baseline:,.0f} "
+            f"({100 * (1 - rate / baseline):.0f}% slower)"
+        )
+    failed = [name for name, result in run["results"].items() if result.get("failed")]
+    return 1 if regressions or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
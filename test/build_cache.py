@@ -0,0 +1,144 @@
+"""Content-addressed cache for cocotb simulator builds.
+
+Every suite builds its toplevel through :func:`cached_build`. The build
+directory is named after a hash of the source *contents*, the simulator, the
+toplevel and the build arguments, so unchanged RTL is never recompiled, no
+matter which suite, checkout or working directory asks for it.
+
+The cache lives in ``$GB_HDL_BUILD_CACHE`` (default ``~/.cache/gb_hdl``).
+Set ``GB_HDL_REBUILD=1`` to force a fresh build. After every new build only
+the ``$GB_HDL_BUILD_CACHE_KEEP`` (default 4) most recently used builds of
+the same simulator and toplevel are kept; older ones are deleted.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import cocotb
+from cocotb_tools.runner import get_runner
+
+CACHE_VERSION = 1
+STAMP_FILE = "build.ok"
+KEY_LENGTH = 20
+DEFAULT_KEEP = 4
+
+
+def cache_root():
+    root = os.getenv("GB_HDL_BUILD_CACHE")
+    if root:
+        return Path(root).expanduser()
+    return Path.home() / ".cache" / "gb_hdl"
+
+
+def _hash_file(h, path):
+    path = Path(path)
+    h.update(path.name.encode())
+    h.update(b"\0")
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    h.update(b"\0")
+
+
+def build_key(sim, hdl_toplevel, sources, build_args=(), waves=False, **build_kwargs):
+    """Return the hex digest identifying a build of *hdl_toplevel*."""
+    h = hashlib.sha256()
+
+    config = {
+        "version": CACHE_VERSION,
+        "cocotb": cocotb.__version__,
+        "sim": sim,
+        "hdl_toplevel": hdl_toplevel,
+        "build_args": [str(arg) for arg in build_args],
+        "waves": bool(waves),
+        "kwargs": {k: repr(v) for k, v in sorted(build_kwargs.items()) if k != "includes"},
+    }
+    h.update(json.dumps(config, sort_keys=True).encode())
+
+    for source in sources:
+        _hash_file(h, source)
+
+    for include in build_kwargs.get("includes", []):
+        for path in sorted(Path(include).glob("*.*v*")):
+            _hash_file(h, path)
+
+    return h.hexdigest()
+
+
+def prune(sim, hdl_toplevel, keep=None):
+    """Delete all but the *keep* most recently used builds of *hdl_toplevel*.
+
+    Builds are ordered by their stamp, which every cache hit touches. A build
+    whose lock is held (it is being built right now) is left alone.
+    """
+    if keep is None:
+        keep = int(os.getenv("GB_HDL_BUILD_CACHE_KEEP", DEFAULT_KEEP))
+    root = cache_root()
+    builds = [
+        path
+        for path in root.glob(f"{sim}-{hdl_toplevel}-" + "?" * KEY_LENGTH)
+        if path.is_dir()
+    ]
+
+    def last_used(path):
+        stamp = path / STAMP_FILE
+        return stamp.stat().st_mtime if stamp.is_file() else 0.0
+
+    for build_dir in sorted(builds, key=last_used, reverse=True)[max(keep, 1) :]:
+        lock_file = build_dir.with_suffix(".lock")
+        with open(lock_file, "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue
+            shutil.rmtree(build_dir, ignore_errors=True)
+            lock_file.unlink(missing_ok=True)
+        print(f"Build cache: removed {build_dir}")
+
+
+def cached_build(sim, hdl_toplevel, sources, build_args=(), waves=False, **build_kwargs):
+    """Build *hdl_toplevel* unless an identical build is already cached.
+
+    Returns the build directory; pass it as ``build_dir`` to ``runner.test``
+    together with ``hdl_toplevel_lang="verilog"``.
+    """
+    key = build_key(sim, hdl_toplevel, sources, build_args, waves, **build_kwargs)
+    build_dir = cache_root() / f"{sim}-{hdl_toplevel}-{key[:KEY_LENGTH]}"
+    stamp = build_dir / STAMP_FILE
+    rebuild = os.getenv("GB_HDL_REBUILD", "0") == "1"
+
+    if stamp.is_file() and not rebuild:
+        print(f"Build cache hit for {hdl_toplevel}: {build_dir}")
+        stamp.touch()
+        return build_dir
+
+    build_dir.parent.mkdir(parents=True, exist_ok=True)
+    with open(build_dir.with_suffix(".lock"), "w") as lock:
+        # Another suite may be building the same key right now; wait for it.
+        fcntl.flock(lock, fcntl.LOCK_EX)
+
+        if stamp.is_file() and not rebuild:
+            print(f"Build cache hit for {hdl_toplevel}: {build_dir}")
+            stamp.touch()
+            return build_dir
+
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+        runner = get_runner(sim)
+        runner.build(
+            sources=sources,
+            hdl_toplevel=hdl_toplevel,
+            always=True,
+            waves=waves,
+            build_args=list(build_args),
+            build_dir=build_dir,
+            **build_kwargs,
+        )
+        stamp.write_text(key + "\n")
+
+    prune(sim, hdl_toplevel)
+    return build_dir
@@ -0,0 +1,37 @@
+`timescale 1ns / 1ps
+
+import boy_pkg::*;
+
+// CPU with its bus flattened into plain ports, the toplevel of the main
+// cocotb suite. Verilator does not accept interface ports on the top-level
+// module, so the bare cpu cannot be simulated there; the Python CPUMemory
+// serves rd_en/wr_en/addr_out/data_out/data_in. The CPU itself is uut, as in
+// cpu_mem_cocotb_dut.
+module cpu_cocotb_dut (
+    input logic clk,
+    input logic rst,
+
+    output logic rd_en,
+    output logic wr_en,
+    output logic [15:0] addr_out,
+    output logic [7:0] data_out,
+    input logic [7:0] data_in,
+    output logic halted
+);
+
+  bus_if cpu_bus ();
+
+  assign cpu_bus.din = data_in;
+  assign rd_en = cpu_bus.re;
+  assign wr_en = cpu_bus.we;
+  assign addr_out = cpu_bus.addr;
+  assign data_out = cpu_bus.dout;
+  assign halted = uut.control_unit.halt;
+
+  cpu uut (
+      .clk(clk),
+      .rst(rst),
+      .cpu_bus(cpu_bus.master)
+  );
+
+endmodule
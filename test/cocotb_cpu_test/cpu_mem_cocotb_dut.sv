@@ -0,0 +1,67 @@
+`timescale 1ns / 1ps
+
+import boy_pkg::*;
+
+// CPU with a 64 KiB memory modelled in HDL, so cocotb only has to touch the
+// design at the start and end of a test. The memory is loaded and dumped in
+// bulk through $readmemh/$writememh, triggered by pulsing mem_load/mem_dump.
+// File names come from the +mem_load_file= and +mem_dump_file= plusargs.
+module cpu_mem_cocotb_dut (
+    input logic clk,
+    input logic rst,
+
+    input logic mem_load,
+    input logic mem_dump,
+
+    output logic rd_en,
+    output logic wr_en,
+    output logic [15:0] addr_out,
+    output logic [7:0] data_out,
+    output logic [7:0] data_in,
+    output logic halted
+);
+
+  bus_if cpu_bus ();
+
+  assign cpu_bus.din = data_in;
+  assign rd_en = cpu_bus.re;
+  assign wr_en = cpu_bus.we;
+  assign addr_out = cpu_bus.addr;
+  assign data_out = cpu_bus.dout;
+  assign halted = uut.control_unit.halt;
+
+  cpu uut (
+      .clk(clk),
+      .rst(rst),
+      .cpu_bus(cpu_bus.master)
+  );
+
+  reg [7:0] mem[65536];
+
+  // Same timing as the Python CPUMemory: serve the bus on the falling edge
+  always @(negedge clk) begin
+    if (rd_en) begin
+      data_in <= mem[addr_out];
+    end else if (wr_en) begin
+      mem[addr_out] <= data_out;
+    end
+  end
+
+  string load_file = "mem_load.hex";
+  string dump_file = "mem_dump.hex";
+
+  initial begin
+    if (!$value$plusargs("mem_load_file=%s", load_file)) load_file = "mem_load.hex";
+    if (!$value$plusargs("mem_dump_file=%s", dump_file)) dump_file = "mem_dump.hex";
+    data_in = 8'h00;
+  end
+
+  always @(posedge mem_load) begin
+    $readmemh(load_file, mem);
+  end
+
+  always @(posedge mem_dump) begin
+    $writememh(dump_file, mem);
+  end
+
+endmodule
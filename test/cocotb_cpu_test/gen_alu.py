@@ -1,118 +1,93 @@
 import gen_utils
 
-def generate():
-    out = [gen_utils.get_test_header()]
+OUTPUT_FILE = "vectors_alu.json"
+
+def build_vectors():
+    vectors = []
     
     # ALU A, r
     for op_idx, op in enumerate(gen_utils.ALU_OPS):
         for r_idx, r in enumerate(gen_utils.REGS_8):
             opcode = (0b10 << 6) | (op_idx << 3) | r_idx
+            # (name, A, operand, F in); with r == A the operand is A itself
             if op == "ADD":
                 if r == "A":
                     variants = [
-                        ("normal", 0x42, 0x42, 0, 0x84, 0x00),
-                        ("half_carry", 0x0F, 0x0F, 0, 0x1E, 0x20),
-                        ("carry", 0xF0, 0xF0, 0, 0xE0, 0x10),
-                        ("zero", 0x00, 0x00, 0, 0x00, 0x80),
+                        ("normal", 0x42, 0x42, 0),
+                        ("half_carry", 0x0F, 0x0F, 0),
+                        ("carry", 0xF0, 0xF0, 0),
+                        ("zero", 0x00, 0x00, 0),
                     ]
                 else:
                     variants = [
-                        ("normal", 0x42, 0x01, 0, 0x43, 0x00),
-                        ("half_carry", 0x42, 0x0F, 0, 0x51, 0x20),
-                        ("carry", 0xF0, 0x11, 0, 0x01, 0x10),
-                        ("zero", 0x00, 0x00, 0, 0x00, 0x80),
+                        ("normal", 0x42, 0x01, 0),
+                        ("half_carry", 0x42, 0x0F, 0),
+                        ("carry", 0xF0, 0x11, 0),
+                        ("zero", 0x00, 0x00, 0),
                     ]
+                check = ("A", "F")
             elif op == "ADC":
-                if r == "A":
-                    variants = [
-                        ("with_carry", 0x42, 0x42, 0x10, 0x85, 0x00),
-                        ("without_carry", 0x42, 0x42, 0x00, 0x84, 0x00),
-                    ]
-                else:
-                    variants = [
-                        ("with_carry", 0x42, 0x01, 0x10, 0x44, 0x00),
-                        ("without_carry", 0x42, 0x01, 0x00, 0x43, 0x00),
-                    ]
+                b_val = 0x42 if r == "A" else 0x01
+                variants = [
+                    ("with_carry", 0x42, b_val, 0x10),
+                    ("without_carry", 0x42, b_val, 0x00),
+                ]
+                check = ("A", "F")
             else:
                 a_val = 0x50
-                b_val = 0x20
-                if r == "A":
-                    b_val = a_val
-                expected = gen_utils.alu_op_expected(op, a_val, b_val)
-                variants = [("", a_val, b_val, 0, expected, None)]
+                b_val = a_val if r == "A" else 0x20
+                variants = [("", a_val, b_val, 0)]
+                check = ("A",)
 
-            for v_name, a_val, b_val, flag_in, expected_a, expected_f in variants:
+            for v_name, a_val, b_val, flag_in in variants:
                 test_name_suffix = f"_{v_name}" if v_name else ""
 
                 if r == "(HL)":
-                    out.append(
-                        f"""
-@cocotb.test()
-async def test_alu_{op.lower()}_a_hl_ind{test_name_suffix}(dut):
-    cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
-    mem = CPUMemory(dut, [{hex(opcode)}, 0x00], data={{0x8000: {hex(b_val)}}})
-    await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = ({hex(a_val)} << 8) | {hex(flag_in)}
-    dut.reg_file.HL_reg.value = 0x8000
-    await do_cycles(dut,2)
-    actual_a = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
-    assert actual_a == {hex(expected_a)}, f"{op} A, (HL) {v_name} failed: expected A={hex(expected_a)}, got {{hex(actual_a)}}"
-"""
-                    )
-                    if expected_f is not None:
-                        out.append(
-                            f"    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F\n"
+                    vectors.append(
+                        gen_utils.reference_vector(
+                            f"alu_{op.lower()}_a_hl_ind{test_name_suffix}",
+                            [opcode, 0x00],
+                            regs={"A": a_val, "F": flag_in, "HL": 0x8000},
+                            data={0x8000: b_val},
+                            check=check,
                         )
-                        out.append(
-                            f'    assert actual_f == {hex(expected_f >> 4)}, f"{op} A, (HL) {v_name} failed: expected F={hex(expected_f >> 4)}, got {{hex(actual_f)}}"\n'
-                        )
-                else:
-                    reg16, shift = gen_utils.get_reg_access(r)
-                    out.append(
-                        f"""
-@cocotb.test()
-async def test_alu_{op.lower()}_a_{r.lower()}{test_name_suffix}(dut):
-    cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
-    mem = CPUMemory(dut, [{hex(opcode)}, 0x00])
-    await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = ({hex(a_val)} << 8) | {hex(flag_in)}
-    if "{r}" != "A":
-        dut.reg_file.{reg16}_reg.value = ({hex(b_val)} << {shift})
-    await do_cycles(dut,1)
-    actual_a = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
-    assert actual_a == {hex(expected_a)}, f"{op} A, {r} {v_name} failed: expected A={hex(expected_a)}, got {{hex(actual_a)}}"
-"""
                     )
-                    if expected_f is not None:
-                        out.append(
-                            f"    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F\n"
-                        )
-                        out.append(
-                            f'    assert actual_f == {hex(expected_f >> 4)}, f"{op} A, {r} {v_name} failed: expected F={hex(expected_f >> 4)}, got {{hex(actual_f)}}"\n'
+                else:
+                    regs = {"A": a_val, "F": flag_in}
+                    if r != "A":
+                        regs[r] = b_val
+                    vectors.append(
+                        gen_utils.reference_vector(
+                            f"alu_{op.lower()}_a_{r.lower()}{test_name_suffix}",
+                            [opcode, 0x00],
+                            regs=regs,
+                            check=check,
                         )
+                    )
 
     # ALU A, n
     for op_idx, op in enumerate(gen_utils.ALU_OPS):
         opcode = (0b11 << 6) | (op_idx << 3) | 0b110
         a_val = 0x50
         n_val = 0x42
-        expected = gen_utils.alu_op_expected(op, a_val, n_val)
-        out.append(
-            f"""
-@cocotb.test()
-async def test_alu_imm_{op.lower()}_a_n(dut):
-    cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
-    mem = CPUMemory(dut, [{hex(opcode)}, {hex(n_val)}, 0x00])
-    await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = {hex(a_val << 8)}
-    await do_cycles(dut,2)
-    actual = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
-    assert actual == {hex(expected)}, f"{op} A, n failed: expected {hex(expected)}, got {{hex(actual)}}"
-"""
+        vectors.append(
+            gen_utils.reference_vector(
+                f"alu_imm_{op.lower()}_a_n",
+                [opcode, n_val, 0x00],
+                regs={"A": a_val},
+                check=("A", "F"),
+            )
         )
 
-    with open("test_alu.py", "w") as f:
-        f.write("".join(out))
+    return vectors
+
+
+def build_source():
+    return gen_utils.dump_vectors(build_vectors())
+
+
+def generate(out_dir="."):
+    gen_utils.write_if_changed(f"{out_dir}/{OUTPUT_FILE}", build_source())
 
 if __name__ == "__main__":
     generate()
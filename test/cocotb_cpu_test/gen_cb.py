@@ -1,47 +1,121 @@
+import numpy as np
+
 import gen_utils
 
+OUTPUT_FILE = "vectors_cb.json"
+
 CB_OPS = ["RLC", "RRC", "RL", "RR", "SLA", "SRA", "SWAP", "SRL"]
 BIT_OPCODE_BASE = 0x40
 RES_OPCODE_BASE = 0x80
 SET_OPCODE_BASE = 0xC0
 
 
-def cb_op_expected(op, val, flags_in_c):
-    c = flags_in_c
-    z, n, h, out_c = 0, 0, 0, 0
-    res = val
-    if op == "RLC":
-        out_c = (val >> 7) & 1
-        res = ((val << 1) | out_c) & 0xFF
-    elif op == "RRC":
-        out_c = val & 1
-        res = ((val >> 1) | (out_c << 7)) & 0xFF
-    elif op == "RL":
-        out_c = (val >> 7) & 1
-        res = ((val << 1) | c) & 0xFF
-    elif op == "RR":
-        out_c = val & 1
-        res = ((val >> 1) | (c << 7)) & 0xFF
-    elif op == "SLA":
-        out_c = (val >> 7) & 1
-        res = (val << 1) & 0xFF
-    elif op == "SRA":
-        out_c = val & 1
-        res = (val >> 1) | (val & 0x80)
-    elif op == "SWAP":
-        res = ((val & 0x0F) << 4) | ((val & 0xF0) >> 4)
-        out_c = 0
-    elif op == "SRL":
-        out_c = val & 1
-        res = (val >> 1) & 0xFF
-
-    z = 1 if res == 0 else 0
-    flags = (z << 7) | (n << 6) | (h << 5) | (out_c << 4)
-    return res, flags
-
-
-def generate():
-    out = [gen_utils.get_test_header()]
+def cb_reference(opcode_cb, val, flags_in_c):
+    """Vectorised model of the whole CB table for exhaustive_vectors.
+
+    Arguments broadcast against each other, so one call can evaluate every
+    CB opcode for every input value and carry. Returns (res, flags) with the
+    flags in the upper nibble. For BIT the result is the unchanged operand.
+    Running 131072 vectors through the ISS would be too slow for test time;
+    test_gen_vectors.py checks this model against it instead.
+    """
+    op = np.asarray(opcode_cb, dtype=np.int32)
+    val = np.asarray(val, dtype=np.int32)
+    c = np.asarray(flags_in_c, dtype=np.int32)
+    op, val, c = np.broadcast_arrays(op, val, c)
+
+    group = op >> 6
+    sub = (op >> 3) & 7
+    mask = 1 << sub
+
+    bit7 = (val >> 7) & 1
+    bit0 = val & 1
+    shift_res = np.select(
+        [sub == i for i in range(8)],
+        [
+            ((val << 1) | bit7) & 0xFF,  # RLC
+            (val >> 1) | (bit0 << 7),  # RRC
+            ((val << 1) | c) & 0xFF,  # RL
+            (val >> 1) | (c << 7),  # RR
+            (val << 1) & 0xFF,  # SLA
+            (val >> 1) | (val & 0x80),  # SRA
+            ((val & 0x0F) << 4) | (val >> 4),  # SWAP
+            val >> 1,  # SRL
+        ],
+    )
+    shift_c = np.select([sub == 6, (sub & 1) == 0], [0, bit7], bit0)
+
+    res = np.select(
+        [group == 0, group == 1, group == 2],
+        [shift_res, val, val & ~mask & 0xFF],
+        val | mask,
+    )
+
+    shift_flags = (np.where(shift_res == 0, 0x80, 0)) | (shift_c << 4)
+    # BIT: Z from the tested bit, N=0, H=1, C untouched
+    bit_flags = np.where(val & mask, 0, 0x80) | 0x20 | (c << 4)
+    flags = np.select([group == 0, group == 1], [shift_flags, bit_flags], c << 4)
+
+    return res.astype(np.uint8), flags.astype(np.uint8)
+
+
+def exhaustive_vectors():
+    """Every CB opcode against every operand value and carry-in (256 x 512)."""
+    opcodes, vals, carries = np.meshgrid(
+        np.arange(256), np.arange(256), np.arange(2), indexing="ij"
+    )
+    opcodes, vals, carries = opcodes.ravel(), vals.ravel(), carries.ravel()
+    res, flags = cb_reference(opcodes, vals, carries)
+
+    vectors = []
+    for opcode_cb, val, c, r, f in zip(
+        opcodes.tolist(), vals.tolist(), carries.tolist(), res.tolist(), flags.tolist()
+    ):
+        reg = gen_utils.REGS_8[opcode_cb & 7]
+        name = f"CB {opcode_cb:02X}/val={val:02X},c={c}"
+        if reg == "(HL)":
+            vectors.append(
+                gen_utils.make_vector(
+                    name,
+                    [0xCB, opcode_cb, 0x00],
+                    cycles=3 if opcode_cb >> 6 == 1 else 4,
+                    regs={"F": c << 4, "HL": 0x8000},
+                    data={0x8000: val},
+                    expected={"mem": {0x8000: r}, "F": f},
+                )
+            )
+        else:
+            vectors.append(
+                gen_utils.make_vector(
+                    name,
+                    [0xCB, opcode_cb, 0x00],
+                    cycles=2,
+                    regs={"F": c << 4, reg: val},
+                    expected={reg: r, "F": f},
+                )
+            )
+    return vectors
+
+
+def reference_cb_vector(name, opcode_cb, r, val, flag_in):
+    """One CB vector on register *r* (or (HL) at 0x8000), expectations from the ISS."""
+    program = [0xCB, opcode_cb, 0x00]
+    if r == "(HL)":
+        return gen_utils.reference_vector(
+            name,
+            program,
+            regs={"F": flag_in, "HL": 0x8000},
+            data={0x8000: val},
+            check=("F",),
+            check_mem=(0x8000,),
+        )
+    return gen_utils.reference_vector(
+        name, program, regs={"F": flag_in, r: val}, check=(r, "F")
+    )
+
+
+def build_vectors():
+    vectors = []
 
     for op_idx, op in enumerate(CB_OPS):
         for r_idx, r in enumerate(gen_utils.REGS_8):
@@ -62,55 +136,8 @@ def generate():
                 test_cases.append(("zero", 0x00, 0))
 
             for v_name, val, flag_in_c in test_cases:
-                expected_res, expected_f = cb_op_expected(op, val, flag_in_c)
-                flag_in = flag_in_c << 4
-
-                test_name = f"test_cb_{op.lower()}_{r.lower().replace('(','').replace(')','')}_{v_name}"
-
-                if r == "(HL)":
-                    out.append(
-                        f"""
-@cocotb.test()
-async def {test_name}(dut):
-    cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
-    mem = CPUMemory(dut, [0xCB, {hex(opcode_cb)}, 0x00], data={{0x8000: {hex(val)}}})
-    await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = {hex(flag_in)}
-    dut.reg_file.HL_reg.value = 0x8000
-    await do_cycles(dut, 4) # CB (1) + (HL) read (1) + ALU (1) + (HL) write (1) = 4 cycles total? 
-    actual_res = mem.data[0x8000]
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
-    assert actual_res == {hex(expected_res)}, f"{op} (HL) failed: expected {hex(expected_res)}, got {{hex(actual_res)}}"
-    assert actual_f == {hex(expected_f >> 4)}, f"{op} (HL) flags failed: expected {hex(expected_f >> 4)}, got {{hex(actual_f)}}"
-"""
-                    )
-                else:
-                    reg16, shift = gen_utils.get_reg_access(r)
-                    out.append(
-                        f"""
-@cocotb.test()
-async def {test_name}(dut):
-    cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
-    mem = CPUMemory(dut, [0xCB, {hex(opcode_cb)}, 0x00])
-    await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = {hex(flag_in)}
-    if "{r}" != "A":
-        dut.reg_file.{reg16}_reg.value = {hex(val)} << {shift}
-    else:
-        dut.reg_file.AF_reg.value = ({hex(val)} << 8) | {hex(flag_in)}
-        
-    await do_cycles(dut, 2) # 1 for CB prefix, 1 for opcode
-    
-    if "{r}" == "A":
-        actual_res = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
-    else:
-        actual_res = (dut.reg_file.{reg16}_reg.value.to_unsigned() >> {shift}) & 0xFF
-        
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
-    assert actual_res == {hex(expected_res)}, f"{op} {r} failed: expected {hex(expected_res)}, got {{hex(actual_res)}}"
-    assert actual_f == {hex(expected_f >> 4)}, f"{op} {r} flags failed: expected {hex(expected_f >> 4)}, got {{hex(actual_f)}}"
-"""
-                    )
+                test_name = f"cb_{op.lower()}_{r.lower().replace('(','').replace(')','')}_{v_name}"
+                vectors.append(reference_cb_vector(test_name, opcode_cb, r, val, flag_in_c << 4))
 
     # BIT b, r and BIT b, (HL)
     bit_indices = range(8)
@@ -125,71 +152,13 @@ async def {test_name}(dut):
             ]
 
             for v_name, val, carry_in in test_cases:
-                expected_z = 1 if ((val >> bit_idx) & 1) == 0 else 0
-                flag_in = carry_in << 4
-
-                test_name = f"test_cb_bit_b{bit_idx}_{r.lower().replace('(', '').replace(')', '')}_{v_name}"
-
-                if r == "(HL)":
-                    out.append(
-                        f"""
-@cocotb.test()
-async def {test_name}(dut):
-    cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
-    mem = CPUMemory(dut, [0xCB, {hex(opcode_cb)}, 0x00], data={{0x8000: {hex(val)}}})
-    await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = {hex(flag_in)}
-    dut.reg_file.HL_reg.value = 0x8000
-    await do_cycles(dut, 3)
-    actual_mem = mem.data[0x8000]
-    actual_n = (dut.reg_file.AF_reg.value.to_unsigned() >> 6) & 0x01
-    actual_h = (dut.reg_file.AF_reg.value.to_unsigned() >> 5) & 0x01
-    actual_z = (dut.reg_file.AF_reg.value.to_unsigned() >> 7) & 0x01
-    assert actual_mem == {hex(val)}, f"BIT {bit_idx}, (HL) should not modify memory: expected {hex(val)}, got {{hex(actual_mem)}}"
-    assert actual_z == {expected_z}, f"BIT {bit_idx}, (HL) Z failed: expected {expected_z}, got {{actual_z}}"
-    assert actual_n == 0, f"BIT {bit_idx}, (HL) N failed: expected 0, got {{actual_n}}"
-    assert actual_h == 1, f"BIT {bit_idx}, (HL) H failed: expected 1, got {{actual_h}}"
-"""
-                    )
-                else:
-                    reg16, shift = gen_utils.get_reg_access(r)
-                    out.append(
-                        f"""
-@cocotb.test()
-async def {test_name}(dut):
-    cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
-    mem = CPUMemory(dut, [0xCB, {hex(opcode_cb)}, 0x00])
-    await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = {hex(flag_in)}
-    if "{r}" != "A":
-        dut.reg_file.{reg16}_reg.value = {hex(val)} << {shift}
-    else:
-        dut.reg_file.AF_reg.value = ({hex(val)} << 8) | {hex(flag_in)}
-
-    await do_cycles(dut, 2)
-
-    if "{r}" == "A":
-        actual_res = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
-    else:
-        actual_res = (dut.reg_file.{reg16}_reg.value.to_unsigned() >> {shift}) & 0xFF
-
-    actual_n = (dut.reg_file.AF_reg.value.to_unsigned() >> 6) & 0x01
-    actual_h = (dut.reg_file.AF_reg.value.to_unsigned() >> 5) & 0x01
-    actual_z = (dut.reg_file.AF_reg.value.to_unsigned() >> 7) & 0x01
-    assert actual_res == {hex(val)}, f"BIT {bit_idx}, {r} should not modify operand: expected {hex(val)}, got {{hex(actual_res)}}"
-    assert actual_z == {expected_z}, f"BIT {bit_idx}, {r} Z failed: expected {expected_z}, got {{actual_z}}"
-    assert actual_n == 0, f"BIT {bit_idx}, {r} N failed: expected 0, got {{actual_n}}"
-    assert actual_h == 1, f"BIT {bit_idx}, {r} H failed: expected 1, got {{actual_h}}"
-"""
-                    )
+                test_name = f"cb_bit_b{bit_idx}_{r.lower().replace('(', '').replace(')', '')}_{v_name}"
+                vectors.append(reference_cb_vector(test_name, opcode_cb, r, val, carry_in << 4))
 
     # RES/SET b, r and RES/SET b, (HL)
-    bitops = [
-        ("res", RES_OPCODE_BASE, lambda value, bit: value & ~(1 << bit)),
-        ("set", SET_OPCODE_BASE, lambda value, bit: value | (1 << bit)),
-    ]
+    bitops = [("res", RES_OPCODE_BASE), ("set", SET_OPCODE_BASE)]
 
-    for op_name, opcode_base, transform in bitops:
+    for op_name, opcode_base in bitops:
         for bit_idx in bit_indices:
             for r_idx, r in enumerate(gen_utils.REGS_8):
                 opcode_cb = opcode_base | (bit_idx << 3) | r_idx
@@ -202,59 +171,19 @@ async def {test_name}(dut):
                 ]
 
                 for v_name, val in test_cases:
-                    expected_res = transform(val, bit_idx) & 0xFF
-                    flag_in_nibble = 0xB
-                    flag_in = flag_in_nibble << 4
-
-                    test_name = f"test_cb_{op_name}_b{bit_idx}_{r.lower().replace('(', '').replace(')', '')}_{v_name}"
-
-                    if r == "(HL)":
-                        out.append(
-                            f"""
-@cocotb.test()
-async def {test_name}(dut):
-    cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
-    mem = CPUMemory(dut, [0xCB, {hex(opcode_cb)}, 0x00], data={{0x8000: {hex(val)}}})
-    await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = {hex(flag_in)}
-    dut.reg_file.HL_reg.value = 0x8000
-    await do_cycles(dut, 4)
-    actual_mem = mem.data[0x8000]
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
-    assert actual_mem == {hex(expected_res)}, f"{op_name.upper()} {bit_idx}, (HL) result failed: expected {hex(expected_res)}, got {{hex(actual_mem)}}"
-    assert actual_f == {hex(flag_in_nibble)}, f"{op_name.upper()} {bit_idx}, (HL) flags failed: expected {hex(flag_in_nibble)}, got {{hex(actual_f)}}"
-"""
-                        )
-                    else:
-                        reg16, shift = gen_utils.get_reg_access(r)
-                        out.append(
-                            f"""
-@cocotb.test()
-async def {test_name}(dut):
-    cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
-    mem = CPUMemory(dut, [0xCB, {hex(opcode_cb)}, 0x00])
-    await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = {hex(flag_in)}
-    if "{r}" != "A":
-        dut.reg_file.{reg16}_reg.value = {hex(val)} << {shift}
-    else:
-        dut.reg_file.AF_reg.value = ({hex(val)} << 8) | {hex(flag_in)}
-
-    await do_cycles(dut, 2)
-
-    if "{r}" == "A":
-        actual_res = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
-    else:
-        actual_res = (dut.reg_file.{reg16}_reg.value.to_unsigned() >> {shift}) & 0xFF
-
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
-    assert actual_res == {hex(expected_res)}, f"{op_name.upper()} {bit_idx}, {r} result failed: expected {hex(expected_res)}, got {{hex(actual_res)}}"
-    assert actual_f == {hex(flag_in_nibble)}, f"{op_name.upper()} {bit_idx}, {r} flags failed: expected {hex(flag_in_nibble)}, got {{hex(actual_f)}}"
-"""
-                        )
-
-    with open("test_cb.py", "w") as f:
-        f.write("".join(out))
+                    test_name = f"cb_{op_name}_b{bit_idx}_{r.lower().replace('(', '').replace(')', '')}_{v_name}"
+                    # Flags must come through unchanged
+                    vectors.append(reference_cb_vector(test_name, opcode_cb, r, val, 0xB0))
+
+    return vectors
+
+
+def build_source():
+    return gen_utils.dump_vectors(build_vectors())
+
+
+def generate(out_dir="."):
+    gen_utils.write_if_changed(f"{out_dir}/{OUTPUT_FILE}", build_source())
 
 
 if __name__ == "__main__":
@@ -1,6 +1,8 @@
 import gen_utils
 
-def generate():
+OUTPUT_FILE = "test_inc_dec.py"
+
+def build_source():
     out = [gen_utils.get_test_header()]
     
     # INC/DEC 16-bit
@@ -16,10 +18,11 @@ async def test_{op.lower()}_16bit_{rr.lower()}(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [{hex(opcode)}, 0x00])
     await reset_cpu(dut)
-    dut.reg_file.{rr}_reg.value = 0x1000
-    await do_cycles(dut,2)
+    dut.uut.reg_file.{rr}_reg.value = 0x1000
+    cycles = await step_instructions(dut)
+    assert cycles == 2, f"expected 2 M-cycles, took {{cycles}}"
     expected = (0x1000 + {expected_change}) & 0xFFFF
-    actual = dut.reg_file.{rr}_reg.value.to_unsigned()
+    actual = dut.uut.reg_file.{rr}_reg.value.to_unsigned()
     assert actual == expected, f"{op} {rr} failed: expected {{hex(expected)}}, got {{hex(actual)}}"
 """
             )
@@ -39,8 +42,9 @@ async def test_{op.lower()}_8bit_hl_ind(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [{hex(opcode)}, 0x00], data={{0x8000: {hex(val)}}})
     await reset_cpu(dut)
-    dut.reg_file.HL_reg.value = 0x8000
-    await do_cycles(dut,3)
+    dut.uut.reg_file.HL_reg.value = 0x8000
+    cycles = await step_instructions(dut)
+    assert cycles == 3, f"expected 3 M-cycles, took {{cycles}}"
     actual = mem.data.get(0x8000, 0)
     assert actual == {hex(expected)}, f"{op} (HL) failed: expected {hex(expected)}, got {{hex(actual)}}"
 """
@@ -56,15 +60,19 @@ async def test_{op.lower()}_8bit_{r.lower()}(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [{hex(opcode)}, 0x00])
     await reset_cpu(dut)
-    dut.reg_file.{reg16}_reg.value = {hex(val << shift)}
-    await do_cycles(dut,1)
-    actual = (dut.reg_file.{reg16}_reg.value.to_unsigned() >> {shift}) & 0xFF
+    dut.uut.reg_file.{reg16}_reg.value = {hex(val << shift)}
+    cycles = await step_instructions(dut)
+    assert cycles == 1, f"expected 1 M-cycles, took {{cycles}}"
+    actual = (dut.uut.reg_file.{reg16}_reg.value.to_unsigned() >> {shift}) & 0xFF
     assert actual == {hex(expected)}, f"{op} {r} failed: expected {hex(expected)}, got {{hex(actual)}}"
 """
                 )
 
-    with open("test_inc_dec.py", "w") as f:
-        f.write("".join(out))
+    return "".join(out)
+
+
+def generate(out_dir="."):
+    gen_utils.write_if_changed(f"{out_dir}/{OUTPUT_FILE}", build_source())
 
 if __name__ == "__main__":
     generate()
@@ -1,3 +1,10 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import sm83_iss
+
 REGS_8 = ["B", "C", "D", "E", "H", "L", "(HL)", "A"]
 REGS_16 = ["BC", "DE", "HL", "SP"]
 ALU_OPS = ["ADD", "ADC", "SUB", "SBC", "AND", "XOR", "OR", "CP"]
@@ -12,20 +19,87 @@ def get_reg_access(r_str):
     elif r_str == "L": return "HL", 0
     return None, 0
 
-def alu_op_expected(op, a, b, flags_in_c=0):
-    if op == "ADD": return (a + b) & 0xFF
-    if op == "ADC": return (a + b + flags_in_c) & 0xFF
-    if op == "SUB": return (a - b) & 0xFF
-    if op == "SBC": return (a - b - flags_in_c) & 0xFF
-    if op == "AND": return (a & b) & 0xFF
-    if op == "XOR": return (a ^ b) & 0xFF
-    if op == "OR": return (a | b) & 0xFF
-    if op == "CP": return a
-    return a
+def make_vector(name, program, cycles, regs=None, data=None, expected=None, steps=1):
+    """Describe one test vector; see test_utils.Vector for the meaning of each field."""
+    expected = dict(expected or {})
+    if "mem" in expected:
+        expected["mem"] = sorted(expected["mem"].items())
+    vector = {
+        "name": name,
+        "program": list(program),
+        "regs": dict(regs or {}),
+        "data": sorted((data or {}).items()),
+        "expected": expected,
+        "cycles": cycles,
+    }
+    if steps != 1:
+        vector["steps"] = steps
+    return vector
+
+
+def reference_vector(name, program, regs=None, data=None, check=(), check_mem=(), steps=1):
+    """Like make_vector, but take the expected values and cycles from the ISS.
+
+    *check* lists the registers and *check_mem* the addresses to compare.
+    """
+    cpu = sm83_iss.SM83()
+    cpu.load(0, program)
+    for addr, value in (data or {}).items():
+        cpu.mem[addr] = value
+    cpu.set_state(regs or {})
+    cycles = cpu.run(steps)
+
+    expected = {reg: cpu.read_reg(reg) for reg in check}
+    if check_mem:
+        expected["mem"] = {addr: cpu.mem[addr] for addr in check_mem}
+    return make_vector(name, program, cycles, regs, data, expected, steps)
+
+
+def dump_vectors(vectors):
+    """Serialise vectors as a JSON array with one vector per line."""
+    lines = [json.dumps(v, separators=(",", ":")) for v in vectors]
+    return "[\n" + ",\n".join(lines) + "\n]\n"
+
 
 def get_test_header():
     return """import cocotb
 from cocotb.clock import Clock
-from test_utils import CPUMemory, reset_cpu, do_cycles
+from test_utils import CPUMemory, reset_cpu, do_cycles, step_instructions
 
 """
+
+
+def file_hash(*paths):
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def write_if_changed(path, content):
+    """Atomically write *content* to *path*, leaving it untouched if identical.
+
+    Returns True when the file was (re)written.
+    """
+    try:
+        with open(path, "r") as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+
+    dir_name = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=dir_name, prefix=".tmp_", suffix=os.path.splitext(path)[1])
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        # mkstemp creates 0600 files; match what open() would have produced
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return True
@@ -1,14 +1,71 @@
+import argparse
+import json
+import os
+
 import gen_loads
 import gen_alu
 import gen_inc_dec
 import gen_cb
+import gen_utils
+import sm83_iss
+
+GENERATORS = [gen_loads, gen_alu, gen_inc_dec, gen_cb]
+MANIFEST_FILE = ".gen_manifest.json"
+
+OUT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def generator_hash(generator):
+    """Hash the generator source together with the shared helpers and the ISS."""
+    return gen_utils.file_hash(generator.__file__, gen_utils.__file__, sm83_iss.__file__)
+
+
+def load_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def is_stale(entry, generator_digest, output_path):
+    if entry is None or entry.get("generator") != generator_digest:
+        return True
+    if not os.path.exists(output_path):
+        return True
+    # Catch hand-edited or truncated outputs as well
+    return entry.get("output") != gen_utils.file_hash(output_path)
+
+
+def main(force=False):
+    manifest_path = os.path.join(OUT_DIR, MANIFEST_FILE)
+    manifest = load_manifest(manifest_path)
+
+    regenerated = []
+    for generator in GENERATORS:
+        output_path = os.path.join(OUT_DIR, generator.OUTPUT_FILE)
+        digest = generator_hash(generator)
+
+        if not force and not is_stale(manifest.get(generator.OUTPUT_FILE), digest, output_path):
+            continue
+
+        generator.generate(OUT_DIR)
+        manifest[generator.OUTPUT_FILE] = {
+            "generator": digest,
+            "output": gen_utils.file_hash(output_path),
+        }
+        regenerated.append(generator.OUTPUT_FILE)
+
+    gen_utils.write_if_changed(manifest_path, json.dumps(manifest, indent=2, sort_keys=True) + "\n")
 
-def main():
-    gen_loads.generate()
-    gen_alu.generate()
-    gen_inc_dec.generate()
-    gen_cb.generate()
-    print("All tests generated successfully!")
+    if regenerated:
+        print("Regenerated:", ", ".join(regenerated))
+        print("All tests generated successfully!")
+    else:
+        print("All tests up to date.")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Generate the cocotb CPU test modules.")
+    parser.add_argument("-f", "--force", action="store_true", help="Regenerate every module.")
+    args = parser.parse_args()
+    main(force=args.force)
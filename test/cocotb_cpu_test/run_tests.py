@@ -1,18 +1,117 @@
+import argparse
 import os
+import re
+import shutil
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from xml.etree import ElementTree
 
-from cocotb_tools.runner import get_runner
+from cocotb_tools.runner import get_results, get_runner
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from benchmark import fastest_simulator  # noqa: E402
+from build_cache import cached_build  # noqa: E402
+from coverage_db import CoverageStore  # noqa: E402
+from timing_report import load_weights, read_results, update_history  # noqa: E402
+from waves_on_failure import rerun_failures, run_suite, waves_setting  # noqa: E402
 
-def test_cpu(testcase_args=None):
-    sim = os.getenv("SIM", "icarus")
 
-    proj_path = Path(__file__).resolve().parent.parent.parent
+def collect_tests(test_modules):
+    """Return the cocotb names of the ``test_*`` tests in *test_modules*.
 
-    sources = [
+    Parametrized tests are expanded into the names cocotb gives them, e.g.
+    ``test_vectors/table=alu``, so they can be sharded and filtered one by one.
+    """
+    import importlib
+
+    all_tests = []
+    for mod_name in test_modules:
+        test_module = importlib.import_module(mod_name)
+        for name in dir(test_module):
+            if not name.startswith("test_"):
+                continue
+            generate_tests = getattr(getattr(test_module, name), "generate_tests", None)
+            if generate_tests is None:
+                all_tests.append(name)
+            else:
+                all_tests.extend(test.name for test in generate_tests())
+    return all_tests
+
+
+def test_filter(names):
+    """Return a COCOTB_TEST_FILTER that selects exactly *names*.
+
+    A name without parameters also selects all of its parametrizations:
+    ``test_vectors`` matches ``test_vectors/table=alu`` and the rest.
+    """
+    alternatives = "|".join(rf"{re.escape(name)}(/.*)?" for name in names)
+    return rf"\.({alternatives})$"
+
+
+def count_tests(results_file):
+    """Return the number of testcases in *results_file* (0 if it is missing)."""
+    if not Path(results_file).is_file():
+        return 0
+    return get_results(results_file)[0]
+
+
+def shard_tests(tests, jobs, weights=None):
+    """Split *tests* into at most *jobs* shards of roughly equal cost.
+
+    Tests are placed longest-first onto the currently lightest shard. Without
+    *weights* every test costs the same and shards differ by at most one test.
+    """
+    weights = weights or {}
+    shards = [[] for _ in range(max(1, min(jobs, len(tests))))]
+    loads = [0.0] * len(shards)
+
+    for name in sorted(tests, key=lambda t: weights.get(t, 1.0), reverse=True):
+        idx = loads.index(min(loads))
+        shards[idx].append(name)
+        loads[idx] += weights.get(name, 1.0)
+
+    return [shard for shard in shards if shard]
+
+
+def merge_results(results_files, merged_file):
+    """Merge cocotb JUnit *results_files* into one ``testsuites`` document."""
+    merged = ElementTree.Element("testsuites", name="results")
+    suites = {}
+
+    for results_file in results_files:
+        if not Path(results_file).is_file():
+            continue
+        for ts in ElementTree.parse(results_file).getroot().iter("testsuite"):
+            existing = suites.get(ts.get("name"))
+            if existing is None:
+                suites[ts.get("name")] = ts
+                merged.append(ts)
+                continue
+            existing.extend(list(ts))
+            for attr in ("tests", "failures", "errors", "skipped"):
+                total = int(existing.get(attr, 0)) + int(ts.get(attr, 0))
+                existing.set(attr, str(total))
+
+    ElementTree.ElementTree(merged).write(merged_file, encoding="UTF-8")
+    return Path(merged_file)
+
+
+# Test modules that target cpu_mem_cocotb_dut instead of cpu_cocotb_dut
+HDL_MEM_TEST_MODULES = ["test_hdl_mem"]
+
+# Plain pytest modules that need no simulator
+PYTEST_MODULES = ["test_iss_vectors"]
+
+# Toplevel of the main suite: the cpu with its bus interface flattened
+CPU_TOPLEVEL = "cpu_cocotb_dut"
+
+
+def cpu_sources(proj_path):
+    return [
+        proj_path / "rtl" / "boy_pkg.sv",
         proj_path / "rtl" / "cpu" / "alu_pkg.sv",
-        proj_path / "rtl" / "cpu_pkg.sv",
+        proj_path / "rtl" / "cpu" / "cpu_pkg.sv",
         proj_path / "rtl" / "cpu" / "alu.sv",
         proj_path / "rtl" / "cpu" / "control.sv",
         proj_path / "rtl" / "cpu" / "idu.sv",
@@ -20,32 +119,125 @@ def test_cpu(testcase_args=None):
         proj_path / "rtl" / "cpu" / "cpu.sv",
     ]
 
+
+def cpu_dut_sources():
+    """Sources of CPU_TOPLEVEL."""
+    test_path = Path(__file__).resolve().parent
+    return cpu_sources(test_path.parent.parent) + [test_path / "cpu_cocotb_dut.sv"]
+
+
+# Verilator lint warnings the CPU RTL is known to trigger
+VERILATOR_WARNINGS = [
+    "-Wno-DECLFILENAME",
+    "-Wno-IMPORTSTAR",
+    "-Wno-UNUSED",
+    "-Wno-UNDRIVEN",
+    "-Wno-LATCH",
+    "-Wno-COMBDLY",
+    "-Wno-ALWCOMBORDER",
+    "-Wno-WIDTHEXPAND",
+]
+
+
+def cpu_simulator():
+    """$SIM if set, otherwise the faster simulator in the benchmark history.
+
+    Without a history Verilator is used when it is installed and Icarus
+    otherwise. Build errors are not a reason to switch: they fail the run.
+    """
+    sim = os.getenv("SIM") or fastest_simulator("cpu", default=None)
+    if sim:
+        return sim
+    return "verilator" if shutil.which("verilator") else "icarus"
+
+
+def cpu_build_args(sim, threads=None, coverage=False):
+    if sim == "icarus":
+        return ["-g2012", "-Wall"]
+    if sim == "verilator":
+        args = ["-Wall", *VERILATOR_WARNINGS]
+        if threads and threads > 1:
+            args += ["--threads", str(threads)]
+        if coverage:
+            args += ["--coverage"]
+        return args
+    return []
+
+
+def _run_shard(sim, build_dir, test_dir, test_modules, shard_idx, testcases, waves=False):
+    shard_dir = Path(test_dir) / f"shard_{shard_idx}"
+    results_file = shard_dir.resolve() / "results.xml"
+
+    runner = get_runner(sim)
+    try:
+        runner.test(
+            hdl_toplevel=CPU_TOPLEVEL,
+            hdl_toplevel_lang="verilog",
+            test_module=test_modules,
+            test_filter=test_filter(testcases),
+            build_dir=build_dir,
+            test_dir=shard_dir,
+            results_xml=str(results_file),
+            waves=waves,
+        )
+    except SystemExit:
+        # A failing shard must not stop the others; failures end up in its results file.
+        pass
+
+    return results_file
+
+
+def merge_coverage(store, dat_file):
+    """Merge *dat_file* into *store* if the simulator wrote one."""
+    if store is None or not Path(dat_file).is_file():
+        return
+    new = store.merge(dat_file)
+    store.save()
+    print(f"Coverage: {len(new)} new points from {dat_file}")
+
+
+def record_times(results_file):
+    """Add the test durations of *results_file* to the timing_report history."""
+    if Path(results_file).is_file():
+        update_history(read_results(results_file, "cpu"))
+
+
+def test_cpu(testcase_args=None, jobs=1, coverage_store=None, threads=None):
+    sim = cpu_simulator()
+    test_dir = Path("sim_build")
+
+    test_path = Path(__file__).resolve().parent
+
+    sources = cpu_dut_sources()
+    waves, rerun = waves_setting()
+
     runner = get_runner(sim)
-    runner.build(
+    build_dir = cached_build(
+        sim,
         sources=sources,
-        hdl_toplevel="cpu",
-        always=False,
-        waves=False,
-        build_args=["-g2012", "-Wall"],
+        hdl_toplevel=CPU_TOPLEVEL,
+        waves=waves,
+        build_args=cpu_build_args(sim, threads, coverage=coverage_store is not None),
     )
     import fnmatch
     import glob
-    import importlib
 
-    test_module_files = glob.glob(str(proj_path / "test" / "test_*.py"))
-    all_test_modules = [
-        f.stem for f in map(Path, test_module_files) if f.stem != "test_utils"
-    ]
+    if str(test_path) not in sys.path:
+        sys.path.insert(0, str(test_path))
+
+    test_module_files = glob.glob(str(test_path / "test_*.py"))
+    all_test_modules = sorted(
+        f.stem
+        for f in map(Path, test_module_files)
+        if f.stem != "test_utils"
+        and f.stem not in HDL_MEM_TEST_MODULES
+        and f.stem not in PYTEST_MODULES
+    )
 
     testcases = None
     if testcase_args:
         # Load all test modules to find all defined functions
-        all_tests = []
-        for mod_name in all_test_modules:
-            test_module = importlib.import_module(mod_name)
-            all_tests.extend(
-                [name for name in dir(test_module) if name.startswith("test_")]
-            )
+        all_tests = collect_tests(all_test_modules)
 
         # Expand any wildcards
         testcases = []
@@ -59,8 +251,148 @@ def test_cpu(testcase_args=None):
                     # If no match but not a wildcard, add it anyway (might be exact)
                     testcases.append(sub_pattern)
     print("all_test_modules:", all_test_modules)
-    runner.test(hdl_toplevel="cpu", test_module=all_test_modules, testcase=testcases)
+
+    # Only Verilator builds with --coverage write coverage.dat
+    store = CoverageStore(coverage_store) if coverage_store else None
+
+    if jobs <= 1:
+        try:
+            runner.test(
+                hdl_toplevel=CPU_TOPLEVEL,
+                hdl_toplevel_lang="verilog",
+                test_module=all_test_modules,
+                test_filter=test_filter(testcases) if testcases else None,
+                build_dir=build_dir,
+                test_dir=test_dir,
+                waves=waves,
+            )
+        finally:
+            record_times(test_dir / "results.xml")
+            if rerun:
+                rerun_failures(
+                    sim,
+                    test_dir / "results.xml",
+                    CPU_TOPLEVEL,
+                    sources,
+                    cpu_build_args(sim, threads),
+                    all_test_modules,
+                    test_dir,
+                )
+            merge_coverage(store, test_dir / "coverage.dat")
+            if store is not None:
+                print(store.format_summary())
+        if testcases and not count_tests(test_dir / "results.xml"):
+            # cocotb only logs "No tests left after filtering" and passes
+            print("No tests matched:", ", ".join(testcases))
+            sys.exit(1)
+        return
+
+    # Historical durations from timing_report.py; unknown tests weigh 1 s
+    shards = shard_tests(
+        testcases or collect_tests(all_test_modules), jobs, weights=load_weights("cpu")
+    )
+    print(f"Running {len(shards)} shards with {jobs} jobs")
+
+    with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+        futures = [
+            pool.submit(
+                _run_shard, sim, build_dir, test_dir, all_test_modules, idx, shard, waves
+            )
+            for idx, shard in enumerate(shards)
+        ]
+        # Merge each shard's coverage as soon as it finishes
+        for future in as_completed(futures):
+            merge_coverage(store, future.result().parent / "coverage.dat")
+        results_files = [future.result() for future in futures]
+
+    merged_file = merge_results(results_files, test_dir / "results.xml")
+    num_tests, num_failed = get_results(merged_file)
+    print(f"Results file: {merged_file}")
+    record_times(merged_file)
+    print(f"Ran {num_tests} tests across {len(shards)} shards, {num_failed} failed")
+    if rerun:
+        rerun_failures(
+            sim,
+            merged_file,
+            CPU_TOPLEVEL,
+            sources,
+            cpu_build_args(sim, threads),
+            all_test_modules,
+            test_dir,
+        )
+    if store is not None:
+        print(store.format_summary())
+
+    missing = [str(f) for f in results_files if not f.is_file()]
+    if missing:
+        print("Shards terminated without results:", ", ".join(missing))
+        sys.exit(1)
+    empty = [str(f) for f in results_files if not count_tests(f)]
+    if empty:
+        print("Shards that selected no tests:", ", ".join(empty))
+        sys.exit(1)
+    if num_failed:
+        sys.exit(1)
+
+
+def test_cpu_hdl_mem(threads=None):
+    """Run the tests that use the HDL-side memory model wrapper."""
+    sim = cpu_simulator()
+    test_path = Path(__file__).resolve().parent
+    sources = cpu_sources(test_path.parent.parent) + [
+        test_path / "cpu_mem_cocotb_dut.sv"
+    ]
+
+    if str(test_path) not in sys.path:
+        sys.path.insert(0, str(test_path))
+
+    run_suite(
+        sim,
+        "cpu_mem_cocotb_dut",
+        sources,
+        cpu_build_args(sim, threads),
+        HDL_MEM_TEST_MODULES,
+        Path("sim_build") / "hdl_mem",
+    )
 
 
 if __name__ == "__main__":
-    test_cpu(sys.argv[1:])
+    parser = argparse.ArgumentParser(description="Run the cocotb CPU test suite.")
+    parser.add_argument(
+        "testcases",
+        nargs="*",
+        help="Test names or fnmatch patterns (comma-separated lists allowed).",
+    )
+    parser.add_argument(
+        "--hdl-mem",
+        action="store_true",
+        help="Run the HDL memory model tests (cpu_mem_cocotb_dut) instead.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of simulator processes to shard the suite across.",
+    )
+    parser.add_argument(
+        "--coverage-store",
+        help="Build with Verilator --coverage and merge each shard's coverage.dat "
+        "into this coverage_db store as it finishes.",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        help="Verilator model threads (--threads); ignored by other simulators.",
+    )
+    args = parser.parse_args()
+
+    if args.hdl_mem:
+        test_cpu_hdl_mem(threads=args.threads)
+    else:
+        test_cpu(
+            args.testcases,
+            jobs=args.jobs,
+            coverage_store=args.coverage_store,
+            threads=args.threads,
+        )
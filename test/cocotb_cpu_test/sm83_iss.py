@@ -0,0 +1,1010 @@
+"""Table-driven SM83 instruction-set simulator used as a golden reference.
+
+Every opcode is a small function in one of two 256-entry dispatch tables
+(``OPS`` and ``CB_OPS``) returning the M-cycles it took; ALU, INC/DEC, DAA
+and CB shift results come from lookup tables that pack ``flags << 8 | res``
+and are built once at import time. Memory is a flat 64 KiB ``bytearray``,
+the same model :class:`test_utils.CPUMemory` presents to the RTL.
+
+Register state uses the names of the ``cpu`` register file (AF, BC, DE, HL,
+SP, PC) plus the 8-bit halves, so vectors and co-simulation can move state
+between the ISS and the RTL directly. Cycle counts are M-cycles and match
+what ``step_instructions`` reports for the RTL.
+"""
+
+from array import array
+
+MEM_SIZE = 0x10000
+
+FLAG_Z = 0x80
+FLAG_N = 0x40
+FLAG_H = 0x20
+FLAG_C = 0x10
+
+IE_ADDR = 0xFFFF
+IF_ADDR = 0xFF0F
+
+REGS_16 = ("AF", "BC", "DE", "HL", "SP", "PC")
+# Register field encoding of the opcodes; index 6 is (HL) and has no register
+R8_NAMES = ("B", "C", "D", "E", "H", "L", "(HL)", "A")
+R8_INDEX = {name: idx for idx, name in enumerate(R8_NAMES) if idx != 6}
+R8_INDEX["F"] = None
+
+ILLEGAL_OPCODES = (0xD3, 0xDB, 0xDD, 0xE3, 0xE4, 0xEB, 0xEC, 0xED, 0xF4, 0xFC, 0xFD)
+
+
+# --- Flag lookup tables --------------------------------------------------------
+
+
+def _zero(res):
+    return FLAG_Z if res == 0 else 0
+
+
+def _build_add_lut():
+    """ADD/ADC, indexed by ``carry << 16 | a << 8 | b``."""
+    lut = array("H", bytes(2 * 0x20000))
+    for c in (0, 1):
+        for a in range(256):
+            base = (c << 16) | (a << 8)
+            for b in range(256):
+                total = a + b + c
+                res = total & 0xFF
+                flags = _zero(res)
+                if (a & 0xF) + (b & 0xF) + c > 0xF:
+                    flags |= FLAG_H
+                if total > 0xFF:
+                    flags |= FLAG_C
+                lut[base | b] = (flags << 8) | res
+    return lut
+
+
+def _build_sub_lut():
+    """SUB/SBC/CP, indexed by ``carry << 16 | a << 8 | b``."""
+    lut = array("H", bytes(2 * 0x20000))
+    for c in (0, 1):
+        for a in range(256):
+            base = (c << 16) | (a << 8)
+            for b in range(256):
+                total = a - b - c
+                res = total & 0xFF
+                flags = _zero(res) | FLAG_N
+                if (a & 0xF) - (b & 0xF) - c < 0:
+                    flags |= FLAG_H
+                if total < 0:
+                    flags |= FLAG_C
+                lut[base | b] = (flags << 8) | res
+    return lut
+
+
+def _build_inc_dec_luts():
+    """INC/DEC r, indexed by the operand. Carry is left to the caller."""
+    inc = array("H", bytes(512))
+    dec = array("H", bytes(512))
+    for v in range(256):
+        res = (v + 1) & 0xFF
+        inc[v] = ((_zero(res) | (FLAG_H if v & 0xF == 0xF else 0)) << 8) | res
+        res = (v - 1) & 0xFF
+        dec[v] = ((_zero(res) | FLAG_N | (FLAG_H if v & 0xF == 0 else 0)) << 8) | res
+    return inc, dec
+
+
+def _build_shift_lut():
+    """RLC..SRL, indexed by ``op << 9 | carry << 8 | val`` with op as in the CB table."""
+    lut = array("H", bytes(2 * 8 * 512))
+    for op in range(8):
+        for c in (0, 1):
+            for v in range(256):
+                bit7 = v >> 7
+                bit0 = v & 1
+                if op == 0:  # RLC
+                    res, cout = ((v << 1) | bit7) & 0xFF, bit7
+                elif op == 1:  # RRC
+                    res, cout = (v >> 1) | (bit0 << 7), bit0
+                elif op == 2:  # RL
+                    res, cout = ((v << 1) | c) & 0xFF, bit7
+                elif op == 3:  # RR
+                    res, cout = (v >> 1) | (c << 7), bit0
+                elif op == 4:  # SLA
+                    res, cout = (v << 1) & 0xFF, bit7
+                elif op == 5:  # SRA
+                    res, cout = (v >> 1) | (v & 0x80), bit0
+                elif op == 6:  # SWAP
+                    res, cout = ((v & 0x0F) << 4) | (v >> 4), 0
+                else:  # SRL
+                    res, cout = v >> 1, bit0
+                flags = _zero(res) | (FLAG_C if cout else 0)
+                lut[(op << 9) | (c << 8) | v] = (flags << 8) | res
+    return lut
+
+
+def _build_daa_lut():
+    """DAA, indexed by ``(F >> 4) << 8 | a`` (only N, H and C of F matter)."""
+    lut = array("H", bytes(2 * 16 * 256))
+    for nhc in range(16):
+        n = nhc & 0x4
+        h = nhc & 0x2
+        c = nhc & 0x1
+        for a in range(256):
+            res = a
+            cout = c
+            if not n:
+                if c or a > 0x99:
+                    res += 0x60
+                    cout = 1
+                if h or (a & 0x0F) > 0x09:
+                    res += 0x06
+            else:
+                if c:
+                    res -= 0x60
+                if h:
+                    res -= 0x06
+            res &= 0xFF
+            flags = _zero(res) | (FLAG_N if n else 0) | (FLAG_C if cout else 0)
+            lut[(nhc << 8) | a] = (flags << 8) | res
+    return lut
+
+
+ADD_LUT = _build_add_lut()
+SUB_LUT = _build_sub_lut()
+INC_LUT, DEC_LUT = _build_inc_dec_luts()
+SHIFT_LUT = _build_shift_lut()
+DAA_LUT = _build_daa_lut()
+ZERO_LUT = bytes(_zero(v) for v in range(256))
+
+
+# --- CPU -----------------------------------------------------------------------
+
+
+class SM83:
+    """SM83 core state plus ``step``/``run``.
+
+    ``r`` holds the 8-bit registers in opcode order (B, C, D, E, H, L, -, A);
+    F is kept separately with its low nibble always clear.
+    """
+
+    def __init__(self, mem=None):
+        self.mem = bytearray(MEM_SIZE) if mem is None else mem
+        self.r = [0] * 8
+        self.f = 0
+        self.sp = 0
+        self.pc = 0
+        self.ime = False
+        self.halted = False
+        # An illegal opcode hangs the CPU, like control_unit.locked
+        self.locked = False
+        self.cycles = 0
+        self.instructions = 0
+        self._ime_pending = False
+
+    # Register pairs
+
+    @property
+    def af(self):
+        return (self.r[7] << 8) | self.f
+
+    @af.setter
+    def af(self, value):
+        self.r[7] = (value >> 8) & 0xFF
+        self.f = value & 0xF0
+
+    @property
+    def bc(self):
+        return (self.r[0] << 8) | self.r[1]
+
+    @bc.setter
+    def bc(self, value):
+        self.r[0] = (value >> 8) & 0xFF
+        self.r[1] = value & 0xFF
+
+    @property
+    def de(self):
+        return (self.r[2] << 8) | self.r[3]
+
+    @de.setter
+    def de(self, value):
+        self.r[2] = (value >> 8) & 0xFF
+        self.r[3] = value & 0xFF
+
+    @property
+    def hl(self):
+        return (self.r[4] << 8) | self.r[5]
+
+    @hl.setter
+    def hl(self, value):
+        self.r[4] = (value >> 8) & 0xFF
+        self.r[5] = value & 0xFF
+
+    # State access
+
+    def get_state(self):
+        """Return ``{AF, BC, DE, HL, SP, PC}``."""
+        return {
+            "AF": self.af,
+            "BC": self.bc,
+            "DE": self.de,
+            "HL": self.hl,
+            "SP": self.sp,
+            "PC": self.pc,
+        }
+
+    def set_state(self, state=None, **regs):
+        """Set registers from a dict and/or keywords using 16- or 8-bit names."""
+        regs = {**(state or {}), **regs}
+        for name, value in regs.items():
+            if name in REGS_16:
+                setattr(self, name.lower(), value & 0xFFFF)
+            elif name == "F":
+                self.f = value & 0xF0
+            elif name in R8_INDEX:
+                self.r[R8_INDEX[name]] = value & 0xFF
+            else:
+                raise KeyError(f"Unknown register {name!r}")
+
+    def read_reg(self, name):
+        if name in REGS_16:
+            return getattr(self, name.lower())
+        if name == "F":
+            return self.f
+        return self.r[R8_INDEX[name]]
+
+    def load(self, addr, data):
+        """Copy *data* into memory starting at *addr*."""
+        self.mem[addr : addr + len(data)] = bytes(data)
+
+    # Execution
+
+    def step(self):
+        """Execute one instruction (or interrupt dispatch) and return its M-cycles."""
+        mem = self.mem
+        pending = mem[IE_ADDR] & mem[IF_ADDR] & 0x1F
+
+        if self.halted:
+            if not pending:
+                self.cycles += 1
+                return 1
+            self.halted = False
+
+        if self.ime and pending:
+            cycles = self._interrupt(pending)
+        elif self.locked:
+            return 0
+        else:
+            ei = self._ime_pending
+            pc = self.pc
+            self.pc = (pc + 1) & 0xFFFF
+            cycles = OPS[mem[pc]](self)
+            if ei and self._ime_pending:
+                # EI takes effect after the instruction following it
+                self.ime = True
+                self._ime_pending = False
+
+        self.cycles += cycles
+        self.instructions += 1
+        return cycles
+
+    def run(self, n):
+        """Execute *n* instructions and return the M-cycles they took."""
+        step = self.step
+        total = 0
+        for _ in range(n):
+            total += step()
+        return total
+
+    def _interrupt(self, pending):
+        bit = (pending & -pending).bit_length() - 1
+        self.mem[IF_ADDR] &= ~(1 << bit) & 0xFF
+        self.ime = False
+        self.push(self.pc)
+        self.pc = 0x40 + 8 * bit
+        return 5
+
+    # Helpers used by the opcode handlers
+
+    def fetch8(self):
+        pc = self.pc
+        self.pc = (pc + 1) & 0xFFFF
+        return self.mem[pc]
+
+    def fetch16(self):
+        lo = self.fetch8()
+        return (self.fetch8() << 8) | lo
+
+    def push(self, value):
+        sp = (self.sp - 1) & 0xFFFF
+        self.mem[sp] = value >> 8
+        sp = (sp - 1) & 0xFFFF
+        self.mem[sp] = value & 0xFF
+        self.sp = sp
+
+    def pop(self):
+        sp = self.sp
+        lo = self.mem[sp]
+        sp = (sp + 1) & 0xFFFF
+        hi = self.mem[sp]
+        self.sp = (sp + 1) & 0xFFFF
+        return (hi << 8) | lo
+
+    def get_rr(self, idx):
+        """16-bit register by opcode field: BC, DE, HL, SP."""
+        if idx == 3:
+            return self.sp
+        r = self.r
+        return (r[2 * idx] << 8) | r[2 * idx + 1]
+
+    def set_rr(self, idx, value):
+        if idx == 3:
+            self.sp = value & 0xFFFF
+            return
+        r = self.r
+        r[2 * idx] = (value >> 8) & 0xFF
+        r[2 * idx + 1] = value & 0xFF
+
+    def cond(self, cc):
+        """Evaluate condition field NZ, Z, NC, C."""
+        flag = FLAG_Z if cc < 2 else FLAG_C
+        return bool(self.f & flag) == bool(cc & 1)
+
+
+# --- Opcode handlers -----------------------------------------------------------
+
+
+def _alu_apply(op_idx):
+    """Return ``apply(cpu, b)`` performing ALU op *op_idx* on A."""
+    if op_idx == 0:  # ADD
+
+        def apply(cpu, b):
+            v = ADD_LUT[(cpu.r[7] << 8) | b]
+            cpu.r[7] = v & 0xFF
+            cpu.f = v >> 8
+
+    elif op_idx == 1:  # ADC
+
+        def apply(cpu, b):
+            v = ADD_LUT[((cpu.f & FLAG_C) << 12) | (cpu.r[7] << 8) | b]
+            cpu.r[7] = v & 0xFF
+            cpu.f = v >> 8
+
+    elif op_idx == 2:  # SUB
+
+        def apply(cpu, b):
+            v = SUB_LUT[(cpu.r[7] << 8) | b]
+            cpu.r[7] = v & 0xFF
+            cpu.f = v >> 8
+
+    elif op_idx == 3:  # SBC
+
+        def apply(cpu, b):
+            v = SUB_LUT[((cpu.f & FLAG_C) << 12) | (cpu.r[7] << 8) | b]
+            cpu.r[7] = v & 0xFF
+            cpu.f = v >> 8
+
+    elif op_idx == 4:  # AND
+
+        def apply(cpu, b):
+            res = cpu.r[7] & b
+            cpu.r[7] = res
+            cpu.f = ZERO_LUT[res] | FLAG_H
+
+    elif op_idx == 5:  # XOR
+
+        def apply(cpu, b):
+            res = cpu.r[7] ^ b
+            cpu.r[7] = res
+            cpu.f = ZERO_LUT[res]
+
+    elif op_idx == 6:  # OR
+
+        def apply(cpu, b):
+            res = cpu.r[7] | b
+            cpu.r[7] = res
+            cpu.f = ZERO_LUT[res]
+
+    else:  # CP
+
+        def apply(cpu, b):
+            cpu.f = SUB_LUT[(cpu.r[7] << 8) | b] >> 8
+
+    return apply
+
+
+def _op_alu_r(apply, src):
+    def op(cpu):
+        apply(cpu, cpu.r[src])
+        return 1
+
+    return op
+
+
+def _op_alu_hl(apply):
+    def op(cpu):
+        apply(cpu, cpu.mem[cpu.hl])
+        return 2
+
+    return op
+
+
+def _op_alu_n(apply):
+    def op(cpu):
+        apply(cpu, cpu.fetch8())
+        return 2
+
+    return op
+
+
+def _op_ld_r_r(dst, src):
+    def op(cpu):
+        cpu.r[dst] = cpu.r[src]
+        return 1
+
+    return op
+
+
+def _op_ld_r_hl(dst):
+    def op(cpu):
+        cpu.r[dst] = cpu.mem[cpu.hl]
+        return 2
+
+    return op
+
+
+def _op_ld_hl_r(src):
+    def op(cpu):
+        cpu.mem[cpu.hl] = cpu.r[src]
+        return 2
+
+    return op
+
+
+def _op_ld_r_n(dst):
+    def op(cpu):
+        cpu.r[dst] = cpu.fetch8()
+        return 2
+
+    return op
+
+
+def _op_ld_hl_n(cpu):
+    cpu.mem[cpu.hl] = cpu.fetch8()
+    return 3
+
+
+def _op_inc_r(dst):
+    def op(cpu):
+        v = INC_LUT[cpu.r[dst]]
+        cpu.r[dst] = v & 0xFF
+        cpu.f = (v >> 8) | (cpu.f & FLAG_C)
+        return 1
+
+    return op
+
+
+def _op_dec_r(dst):
+    def op(cpu):
+        v = DEC_LUT[cpu.r[dst]]
+        cpu.r[dst] = v & 0xFF
+        cpu.f = (v >> 8) | (cpu.f & FLAG_C)
+        return 1
+
+    return op
+
+
+def _op_inc_hl_ind(cpu):
+    hl = cpu.hl
+    v = INC_LUT[cpu.mem[hl]]
+    cpu.mem[hl] = v & 0xFF
+    cpu.f = (v >> 8) | (cpu.f & FLAG_C)
+    return 3
+
+
+def _op_dec_hl_ind(cpu):
+    hl = cpu.hl
+    v = DEC_LUT[cpu.mem[hl]]
+    cpu.mem[hl] = v & 0xFF
+    cpu.f = (v >> 8) | (cpu.f & FLAG_C)
+    return 3
+
+
+def _op_ld_rr_nn(idx):
+    def op(cpu):
+        cpu.set_rr(idx, cpu.fetch16())
+        return 3
+
+    return op
+
+
+def _op_inc_rr(idx):
+    def op(cpu):
+        cpu.set_rr(idx, cpu.get_rr(idx) + 1)
+        return 2
+
+    return op
+
+
+def _op_dec_rr(idx):
+    def op(cpu):
+        cpu.set_rr(idx, cpu.get_rr(idx) - 1)
+        return 2
+
+    return op
+
+
+def _op_add_hl_rr(idx):
+    def op(cpu):
+        hl = cpu.hl
+        rr = cpu.get_rr(idx)
+        total = hl + rr
+        flags = cpu.f & FLAG_Z
+        if (hl & 0xFFF) + (rr & 0xFFF) > 0xFFF:
+            flags |= FLAG_H
+        if total > 0xFFFF:
+            flags |= FLAG_C
+        cpu.hl = total & 0xFFFF
+        cpu.f = flags
+        return 2
+
+    return op
+
+
+def _indirect_addr(idx):
+    """Address and HL adjustment for LD (BC)/(DE)/(HL+)/(HL-) forms."""
+
+    def addr(cpu):
+        if idx == 0:
+            return cpu.bc
+        if idx == 1:
+            return cpu.de
+        hl = cpu.hl
+        cpu.hl = (hl + (1 if idx == 2 else -1)) & 0xFFFF
+        return hl
+
+    return addr
+
+
+def _op_ld_ind_a(idx):
+    addr = _indirect_addr(idx)
+
+    def op(cpu):
+        cpu.mem[addr(cpu)] = cpu.r[7]
+        return 2
+
+    return op
+
+
+def _op_ld_a_ind(idx):
+    addr = _indirect_addr(idx)
+
+    def op(cpu):
+        cpu.r[7] = cpu.mem[addr(cpu)]
+        return 2
+
+    return op
+
+
+def _op_rotate_a(shift_op):
+    def op(cpu):
+        c = (cpu.f >> 4) & 1
+        v = SHIFT_LUT[(shift_op << 9) | (c << 8) | cpu.r[7]]
+        cpu.r[7] = v & 0xFF
+        cpu.f = (v >> 8) & FLAG_C
+        return 1
+
+    return op
+
+
+def _op_nop(cpu):
+    return 1
+
+
+def _op_ld_nn_sp(cpu):
+    addr = cpu.fetch16()
+    cpu.mem[addr] = cpu.sp & 0xFF
+    cpu.mem[(addr + 1) & 0xFFFF] = cpu.sp >> 8
+    return 5
+
+
+def _op_stop(cpu):
+    # STOP is two bytes long; there is no low-power mode to model here
+    cpu.fetch8()
+    return 1
+
+
+def _op_jr(cpu):
+    e = cpu.fetch8()
+    cpu.pc = (cpu.pc + e - ((e & 0x80) << 1)) & 0xFFFF
+    return 3
+
+
+def _op_jr_cc(cc):
+    def op(cpu):
+        e = cpu.fetch8()
+        if not cpu.cond(cc):
+            return 2
+        cpu.pc = (cpu.pc + e - ((e & 0x80) << 1)) & 0xFFFF
+        return 3
+
+    return op
+
+
+def _op_daa(cpu):
+    v = DAA_LUT[((cpu.f >> 4) << 8) | cpu.r[7]]
+    cpu.r[7] = v & 0xFF
+    cpu.f = v >> 8
+    return 1
+
+
+def _op_cpl(cpu):
+    cpu.r[7] ^= 0xFF
+    cpu.f |= FLAG_N | FLAG_H
+    return 1
+
+
+def _op_scf(cpu):
+    cpu.f = (cpu.f & FLAG_Z) | FLAG_C
+    return 1
+
+
+def _op_ccf(cpu):
+    cpu.f = (cpu.f & (FLAG_Z | FLAG_C)) ^ FLAG_C
+    return 1
+
+
+def _op_halt(cpu):
+    cpu.halted = True
+    return 1
+
+
+def _op_ret_cc(cc):
+    def op(cpu):
+        if not cpu.cond(cc):
+            return 2
+        cpu.pc = cpu.pop()
+        return 5
+
+    return op
+
+
+def _op_ret(cpu):
+    cpu.pc = cpu.pop()
+    return 4
+
+
+def _op_reti(cpu):
+    cpu.pc = cpu.pop()
+    cpu.ime = True
+    return 4
+
+
+def _op_pop(idx):
+    def op(cpu):
+        value = cpu.pop()
+        if idx == 3:
+            cpu.af = value
+        else:
+            cpu.set_rr(idx, value)
+        return 3
+
+    return op
+
+
+def _op_push(idx):
+    def op(cpu):
+        cpu.push(cpu.af if idx == 3 else cpu.get_rr(idx))
+        return 4
+
+    return op
+
+
+def _op_jp(cpu):
+    cpu.pc = cpu.fetch16()
+    return 4
+
+
+def _op_jp_cc(cc):
+    def op(cpu):
+        addr = cpu.fetch16()
+        if not cpu.cond(cc):
+            return 3
+        cpu.pc = addr
+        return 4
+
+    return op
+
+
+def _op_jp_hl(cpu):
+    cpu.pc = cpu.hl
+    return 1
+
+
+def _op_call(cpu):
+    addr = cpu.fetch16()
+    cpu.push(cpu.pc)
+    cpu.pc = addr
+    return 6
+
+
+def _op_call_cc(cc):
+    def op(cpu):
+        addr = cpu.fetch16()
+        if not cpu.cond(cc):
+            return 3
+        cpu.push(cpu.pc)
+        cpu.pc = addr
+        return 6
+
+    return op
+
+
+def _op_rst(vector):
+    def op(cpu):
+        cpu.push(cpu.pc)
+        cpu.pc = vector
+        return 4
+
+    return op
+
+
+def _op_ldh_n_a(cpu):
+    cpu.mem[0xFF00 | cpu.fetch8()] = cpu.r[7]
+    return 3
+
+
+def _op_ldh_a_n(cpu):
+    cpu.r[7] = cpu.mem[0xFF00 | cpu.fetch8()]
+    return 3
+
+
+def _op_ldh_c_a(cpu):
+    cpu.mem[0xFF00 | cpu.r[1]] = cpu.r[7]
+    return 2
+
+
+def _op_ldh_a_c(cpu):
+    cpu.r[7] = cpu.mem[0xFF00 | cpu.r[1]]
+    return 2
+
+
+def _op_ld_nn_a(cpu):
+    cpu.mem[cpu.fetch16()] = cpu.r[7]
+    return 4
+
+
+def _op_ld_a_nn(cpu):
+    cpu.r[7] = cpu.mem[cpu.fetch16()]
+    return 4
+
+
+def _sp_plus_e(cpu):
+    """SP + signed immediate, with the flags of ADD SP,e / LD HL,SP+e."""
+    e = cpu.fetch8()
+    sp = cpu.sp
+    flags = 0
+    if (sp & 0xF) + (e & 0xF) > 0xF:
+        flags |= FLAG_H
+    if (sp & 0xFF) + e > 0xFF:
+        flags |= FLAG_C
+    cpu.f = flags
+    return (sp + e - ((e & 0x80) << 1)) & 0xFFFF
+
+
+def _op_add_sp_e(cpu):
+    cpu.sp = _sp_plus_e(cpu)
+    return 4
+
+
+def _op_ld_hl_sp_e(cpu):
+    cpu.hl = _sp_plus_e(cpu)
+    return 3
+
+
+def _op_ld_sp_hl(cpu):
+    cpu.sp = cpu.hl
+    return 2
+
+
+def _op_di(cpu):
+    cpu.ime = False
+    cpu._ime_pending = False
+    return 1
+
+
+def _op_ei(cpu):
+    cpu._ime_pending = True
+    return 1
+
+
+def _op_illegal(cpu):
+    cpu.locked = True
+    cpu.pc = (cpu.pc - 1) & 0xFFFF
+    return 1
+
+
+def _op_cb(cpu):
+    return CB_OPS[cpu.fetch8()](cpu)
+
+
+# CB-prefixed handlers return the cycles of the whole instruction, prefix included
+
+
+def _cb_shift_r(shift_op, dst):
+    base = shift_op << 9
+
+    def op(cpu):
+        v = SHIFT_LUT[base | ((cpu.f & FLAG_C) << 4) | cpu.r[dst]]
+        cpu.r[dst] = v & 0xFF
+        cpu.f = v >> 8
+        return 2
+
+    return op
+
+
+def _cb_shift_hl(shift_op):
+    base = shift_op << 9
+
+    def op(cpu):
+        hl = cpu.hl
+        v = SHIFT_LUT[base | ((cpu.f & FLAG_C) << 4) | cpu.mem[hl]]
+        cpu.mem[hl] = v & 0xFF
+        cpu.f = v >> 8
+        return 4
+
+    return op
+
+
+def _cb_bit_r(bit, src):
+    mask = 1 << bit
+
+    def op(cpu):
+        cpu.f = (0 if cpu.r[src] & mask else FLAG_Z) | FLAG_H | (cpu.f & FLAG_C)
+        return 2
+
+    return op
+
+
+def _cb_bit_hl(bit):
+    mask = 1 << bit
+
+    def op(cpu):
+        cpu.f = (0 if cpu.mem[cpu.hl] & mask else FLAG_Z) | FLAG_H | (cpu.f & FLAG_C)
+        return 3
+
+    return op
+
+
+def _cb_res_r(bit, dst):
+    mask = ~(1 << bit) & 0xFF
+
+    def op(cpu):
+        cpu.r[dst] &= mask
+        return 2
+
+    return op
+
+
+def _cb_res_hl(bit):
+    mask = ~(1 << bit) & 0xFF
+
+    def op(cpu):
+        cpu.mem[cpu.hl] &= mask
+        return 4
+
+    return op
+
+
+def _cb_set_r(bit, dst):
+    mask = 1 << bit
+
+    def op(cpu):
+        cpu.r[dst] |= mask
+        return 2
+
+    return op
+
+
+def _cb_set_hl(bit):
+    mask = 1 << bit
+
+    def op(cpu):
+        cpu.mem[cpu.hl] |= mask
+        return 4
+
+    return op
+
+
+def _build_ops():
+    ops = [None] * 256
+
+    # 0x00-0x3F
+    for idx in range(4):
+        ops[0x01 | idx << 4] = _op_ld_rr_nn(idx)
+        ops[0x02 | idx << 4] = _op_ld_ind_a(idx)
+        ops[0x03 | idx << 4] = _op_inc_rr(idx)
+        ops[0x09 | idx << 4] = _op_add_hl_rr(idx)
+        ops[0x0A | idx << 4] = _op_ld_a_ind(idx)
+        ops[0x0B | idx << 4] = _op_dec_rr(idx)
+        ops[0x07 | idx << 3] = _op_rotate_a(idx)
+        ops[0x20 | idx << 3] = _op_jr_cc(idx)
+    for reg in range(8):
+        if reg == 6:
+            ops[0x34] = _op_inc_hl_ind
+            ops[0x35] = _op_dec_hl_ind
+            ops[0x36] = _op_ld_hl_n
+        else:
+            ops[0x04 | reg << 3] = _op_inc_r(reg)
+            ops[0x05 | reg << 3] = _op_dec_r(reg)
+            ops[0x06 | reg << 3] = _op_ld_r_n(reg)
+    ops[0x00] = _op_nop
+    ops[0x08] = _op_ld_nn_sp
+    ops[0x10] = _op_stop
+    ops[0x18] = _op_jr
+    ops[0x27] = _op_daa
+    ops[0x2F] = _op_cpl
+    ops[0x37] = _op_scf
+    ops[0x3F] = _op_ccf
+
+    # 0x40-0x7F
+    for dst in range(8):
+        for src in range(8):
+            opcode = 0x40 | dst << 3 | src
+            if dst == 6 and src == 6:
+                ops[opcode] = _op_halt
+            elif dst == 6:
+                ops[opcode] = _op_ld_hl_r(src)
+            elif src == 6:
+                ops[opcode] = _op_ld_r_hl(dst)
+            else:
+                ops[opcode] = _op_ld_r_r(dst, src)
+
+    # 0x80-0xBF and ALU A,n
+    for op_idx in range(8):
+        apply = _alu_apply(op_idx)
+        for src in range(8):
+            opcode = 0x80 | op_idx << 3 | src
+            ops[opcode] = _op_alu_hl(apply) if src == 6 else _op_alu_r(apply, src)
+        ops[0xC6 | op_idx << 3] = _op_alu_n(apply)
+        ops[0xC7 | op_idx << 3] = _op_rst(op_idx << 3)
+
+    # 0xC0-0xFF
+    for idx in range(4):
+        ops[0xC0 | idx << 3] = _op_ret_cc(idx)
+        ops[0xC2 | idx << 3] = _op_jp_cc(idx)
+        ops[0xC4 | idx << 3] = _op_call_cc(idx)
+        ops[0xC1 | idx << 4] = _op_pop(idx)
+        ops[0xC5 | idx << 4] = _op_push(idx)
+    ops[0xC3] = _op_jp
+    ops[0xC9] = _op_ret
+    ops[0xCB] = _op_cb
+    ops[0xCD] = _op_call
+    ops[0xD9] = _op_reti
+    ops[0xE0] = _op_ldh_n_a
+    ops[0xE2] = _op_ldh_c_a
+    ops[0xE8] = _op_add_sp_e
+    ops[0xE9] = _op_jp_hl
+    ops[0xEA] = _op_ld_nn_a
+    ops[0xF0] = _op_ldh_a_n
+    ops[0xF2] = _op_ldh_a_c
+    ops[0xF3] = _op_di
+    ops[0xF8] = _op_ld_hl_sp_e
+    ops[0xF9] = _op_ld_sp_hl
+    ops[0xFA] = _op_ld_a_nn
+    ops[0xFB] = _op_ei
+    for opcode in ILLEGAL_OPCODES:
+        ops[opcode] = _op_illegal
+
+    assert all(ops), "unhandled opcodes"
+    return ops
+
+
+def _build_cb_ops():
+    ops = [None] * 256
+    for sub in range(8):
+        for reg in range(8):
+            hl = reg == 6
+            ops[sub << 3 | reg] = _cb_shift_hl(sub) if hl else _cb_shift_r(sub, reg)
+            ops[0x40 | sub << 3 | reg] = _cb_bit_hl(sub) if hl else _cb_bit_r(sub, reg)
+            ops[0x80 | sub << 3 | reg] = _cb_res_hl(sub) if hl else _cb_res_r(sub, reg)
+            ops[0xC0 | sub << 3 | reg] = _cb_set_hl(sub) if hl else _cb_set_r(sub, reg)
+    return ops
+
+
+OPS = _build_ops()
+CB_OPS = _build_cb_ops()
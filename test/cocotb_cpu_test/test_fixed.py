@@ -11,8 +11,8 @@ async def test_nop(dut):
     await reset_cpu(dut)
     await do_cycles(dut, 0)
     assert (
-        dut.reg_file.PC_reg.value.to_unsigned() == 1
-    ), f"PC should be 0, got {dut.reg_file.PC_reg.value.to_unsigned()}"
+        dut.uut.reg_file.PC_reg.value.to_unsigned() == 1
+    ), f"PC should be 0, got {dut.uut.reg_file.PC_reg.value.to_unsigned()}"
 
 
 
@@ -21,7 +21,7 @@ async def test_ld_a16_sp(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x08, 0x34, 0x12])
     await reset_cpu(dut)
-    dut.reg_file.SP_reg.value = 0xABCD
+    dut.uut.reg_file.SP_reg.value = 0xABCD
     await do_cycles(dut, 5)
     actual_low = mem.data.get(0x1234, 0)
     actual_high = mem.data.get(0x1235, 0)
@@ -34,8 +34,8 @@ async def test_ld_bc_ind_a(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x02])
     await reset_cpu(dut)
-    dut.reg_file.BC_reg.value = 0x8000
-    dut.reg_file.AF_reg.value = 0x4200
+    dut.uut.reg_file.BC_reg.value = 0x8000
+    dut.uut.reg_file.AF_reg.value = 0x4200
     await do_cycles(dut, 2)
     actual = mem.data.get(0x8000, 0)
     assert actual == 0x42, f"LD (BC), A failed: expected 0x42, got {hex(actual)}"
@@ -46,8 +46,8 @@ async def test_ld_de_ind_a(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x12])
     await reset_cpu(dut)
-    dut.reg_file.DE_reg.value = 0x8000
-    dut.reg_file.AF_reg.value = 0x4200
+    dut.uut.reg_file.DE_reg.value = 0x8000
+    dut.uut.reg_file.AF_reg.value = 0x4200
     await do_cycles(dut, 2)
     actual = mem.data.get(0x8000, 0)
     assert actual == 0x42, f"LD (DE), A failed: expected 0x42, got {hex(actual)}"
@@ -58,10 +58,10 @@ async def test_ld_a_bc_ind(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x0A], data={0x8000: 0x42})
     await reset_cpu(dut)
-    dut.reg_file.BC_reg.value = 0x8000
-    dut.reg_file.AF_reg.value = 0
+    dut.uut.reg_file.BC_reg.value = 0x8000
+    dut.uut.reg_file.AF_reg.value = 0
     await do_cycles(dut, 2)
-    actual = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
+    actual = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
     assert actual == 0x42, f"LD A, (BC) failed: expected 0x42, got {hex(actual)}"
 
 
@@ -70,10 +70,10 @@ async def test_ld_a_de_ind(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x1A], data={0x8000: 0x42})
     await reset_cpu(dut)
-    dut.reg_file.DE_reg.value = 0x8000
-    dut.reg_file.AF_reg.value = 0
+    dut.uut.reg_file.DE_reg.value = 0x8000
+    dut.uut.reg_file.AF_reg.value = 0
     await do_cycles(dut, 2)
-    actual = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
+    actual = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
     assert actual == 0x42, f"LD A, (DE) failed: expected 0x42, got {{hex(actual)}}"
 
 
@@ -82,11 +82,11 @@ async def test_ld_hl_inc_ind_a(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x22])
     await reset_cpu(dut)
-    dut.reg_file.HL_reg.value = 0x8000
-    dut.reg_file.AF_reg.value = 0x4200
+    dut.uut.reg_file.HL_reg.value = 0x8000
+    dut.uut.reg_file.AF_reg.value = 0x4200
     await do_cycles(dut, 2)
     actual = mem.data.get(0x8000, 0)
-    actual_hl = dut.reg_file.HL_reg.value.to_unsigned()
+    actual_hl = dut.uut.reg_file.HL_reg.value.to_unsigned()
     assert (
         actual == 0x42
     ), f"LD (HL+), A failed: expected memory == 0x42, got {{hex(actual)}}"
@@ -100,11 +100,11 @@ async def test_ld_hl_dec_ind_a(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x32])
     await reset_cpu(dut)
-    dut.reg_file.HL_reg.value = 0x8000
-    dut.reg_file.AF_reg.value = 0x4200
+    dut.uut.reg_file.HL_reg.value = 0x8000
+    dut.uut.reg_file.AF_reg.value = 0x4200
     await do_cycles(dut, 2)
     actual = mem.data.get(0x8000, 0)
-    actual_hl = dut.reg_file.HL_reg.value.to_unsigned()
+    actual_hl = dut.uut.reg_file.HL_reg.value.to_unsigned()
     assert (
         actual == 0x42
     ), f"LD (HL-), A failed: expected memory == 0x42, got {{hex(actual)}}"
@@ -118,11 +118,11 @@ async def test_ld_a_hl_inc_ind(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x2A], data={0x8000: 0x42})
     await reset_cpu(dut)
-    dut.reg_file.HL_reg.value = 0x8000
-    dut.reg_file.AF_reg.value = 0
+    dut.uut.reg_file.HL_reg.value = 0x8000
+    dut.uut.reg_file.AF_reg.value = 0
     await do_cycles(dut, 2)
-    actual = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
-    actual_hl = dut.reg_file.HL_reg.value.to_unsigned()
+    actual = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
+    actual_hl = dut.uut.reg_file.HL_reg.value.to_unsigned()
     assert (
         actual == 0x42
     ), f"LD A, (HL+) failed: expected A == 0x42, got {{hex(actual)}}"
@@ -136,11 +136,11 @@ async def test_ld_a_hl_dec_ind(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x3A], data={0x8000: 0x42})
     await reset_cpu(dut)
-    dut.reg_file.HL_reg.value = 0x8000
-    dut.reg_file.AF_reg.value = 0
+    dut.uut.reg_file.HL_reg.value = 0x8000
+    dut.uut.reg_file.AF_reg.value = 0
     await do_cycles(dut, 2)
-    actual = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
-    actual_hl = dut.reg_file.HL_reg.value.to_unsigned()
+    actual = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
+    actual_hl = dut.uut.reg_file.HL_reg.value.to_unsigned()
     assert (
         actual == 0x42
     ), f"LD A, (HL-) failed: expected A == 0x42, got {{hex(actual)}}"
@@ -154,10 +154,10 @@ async def test_ld_sp_hl(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0xF9])
     await reset_cpu(dut)
-    dut.reg_file.HL_reg.value = 0xBEEF
-    dut.reg_file.SP_reg.value = 0x0000
+    dut.uut.reg_file.HL_reg.value = 0xBEEF
+    dut.uut.reg_file.SP_reg.value = 0x0000
     await do_cycles(dut, 2)
-    actual = dut.reg_file.SP_reg.value.to_unsigned()
+    actual = dut.uut.reg_file.SP_reg.value.to_unsigned()
     assert actual == 0xBEEF, f"LD SP, HL failed: expected 0xBEEF, got {hex(actual)}"
 
 
@@ -168,13 +168,13 @@ async def _run_add_sp_e8_case(
     mem = CPUMemory(dut, [0xE8, imm8, 0x00])
     await reset_cpu(dut)
 
-    dut.reg_file.SP_reg.value = sp_start
-    dut.reg_file.AF_reg.value = 0x00F0  # ensure flags are overwritten
+    dut.uut.reg_file.SP_reg.value = sp_start
+    dut.uut.reg_file.AF_reg.value = 0x00F0  # ensure flags are overwritten
 
     await do_cycles(dut, 3)
 
-    actual_sp = dut.reg_file.SP_reg.value.to_unsigned()
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
+    actual_sp = dut.uut.reg_file.SP_reg.value.to_unsigned()
+    actual_f = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
     assert (
         actual_sp == expected_sp
     ), f"ADD SP,e8 failed: expected SP={hex(expected_sp)}, got {hex(actual_sp)}"
@@ -208,15 +208,15 @@ async def _run_ld_hl_sp_e8_case(
     mem = CPUMemory(dut, [0xF8, imm8, 0x00])
     await reset_cpu(dut)
 
-    dut.reg_file.SP_reg.value = sp_start
-    dut.reg_file.HL_reg.value = 0x0000
-    dut.reg_file.AF_reg.value = 0x00F0  # ensure flags are overwritten
+    dut.uut.reg_file.SP_reg.value = sp_start
+    dut.uut.reg_file.HL_reg.value = 0x0000
+    dut.uut.reg_file.AF_reg.value = 0x00F0  # ensure flags are overwritten
 
     await do_cycles(dut, 3)
 
-    actual_hl = dut.reg_file.HL_reg.value.to_unsigned()
-    actual_sp = dut.reg_file.SP_reg.value.to_unsigned()
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
+    actual_hl = dut.uut.reg_file.HL_reg.value.to_unsigned()
+    actual_sp = dut.uut.reg_file.SP_reg.value.to_unsigned()
+    actual_f = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
 
     assert (
         actual_hl == expected_hl
@@ -247,10 +247,10 @@ async def test_rlca_carry_0(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x07])
     await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = 0x8500
+    dut.uut.reg_file.AF_reg.value = 0x8500
     await do_cycles(dut, 1)
-    actual_a = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
+    actual_a = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
+    actual_f = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
     assert actual_a == 0x0B, f"RLCA failed: expected A=0x0B, got {{hex(actual_a)}}"
     assert (
         actual_f & 0x1
@@ -262,10 +262,10 @@ async def test_rlca_carry_1(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x07])
     await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = 0x4210  # carry initially set
+    dut.uut.reg_file.AF_reg.value = 0x4210  # carry initially set
     await do_cycles(dut, 1)
-    actual_a = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
+    actual_a = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
+    actual_f = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
     assert actual_a == 0x84, f"RLCA failed: expected A=0x84, got {{hex(actual_a)}}"
     assert (
         actual_f & 0x1
@@ -277,10 +277,10 @@ async def test_rrca_carry_0(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x0F])
     await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = 0x8500
+    dut.uut.reg_file.AF_reg.value = 0x8500
     await do_cycles(dut, 1)
-    actual_a = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
+    actual_a = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
+    actual_f = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
     assert actual_a == 0xC2, f"RRCA failed: expected A=0xC2, got {{hex(actual_a)}}"
     assert (
         actual_f & 0x1
@@ -292,10 +292,10 @@ async def test_rrca_carry_1(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x0F])
     await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = 0x8410  # carry initially set
+    dut.uut.reg_file.AF_reg.value = 0x8410  # carry initially set
     await do_cycles(dut, 1)
-    actual_a = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
+    actual_a = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
+    actual_f = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
     assert actual_a == 0x42, f"RRCA failed: expected A=0x42, got {{hex(actual_a)}}"
     assert (
         actual_f & 0x1
@@ -307,10 +307,10 @@ async def test_rla_carry_0(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x17])
     await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = 0x8500
+    dut.uut.reg_file.AF_reg.value = 0x8500
     await do_cycles(dut, 1)
-    actual_a = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
+    actual_a = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
+    actual_f = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
     assert actual_a == 0x0A, f"RLA failed: expected A=0x0A, got {{hex(actual_a)}}"
     assert (
         actual_f & 0x1
@@ -322,10 +322,10 @@ async def test_rla_carry_1(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x17])
     await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = 0x8510
+    dut.uut.reg_file.AF_reg.value = 0x8510
     await do_cycles(dut, 1)
-    actual_a = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
+    actual_a = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
+    actual_f = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
     assert actual_a == 0x0B, f"RLA failed: expected A=0x0B, got {{hex(actual_a)}}"
     assert (
         actual_f & 0x1
@@ -337,10 +337,10 @@ async def test_rra_carry_0(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x1F])
     await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = 0x8500
+    dut.uut.reg_file.AF_reg.value = 0x8500
     await do_cycles(dut, 1)
-    actual_a = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
+    actual_a = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
+    actual_f = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
     assert actual_a == 0x42, f"RRA failed: expected A=0x42, got {{hex(actual_a)}}"
     assert (
         actual_f & 0x1
@@ -352,10 +352,10 @@ async def test_rra_carry_1(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x1F])
     await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = 0x8510
+    dut.uut.reg_file.AF_reg.value = 0x8510
     await do_cycles(dut, 1)
-    actual_a = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
+    actual_a = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
+    actual_f = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
     assert actual_a == 0xC2, f"RRA failed: expected A=0xC2, got {{hex(actual_a)}}"
     assert (
         actual_f & 0x1
@@ -370,10 +370,10 @@ async def test_daa_1(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x27])
     await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = 0x7D00
+    dut.uut.reg_file.AF_reg.value = 0x7D00
     await do_cycles(dut, 1)
-    actual_a = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
+    actual_a = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
+    actual_f = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
     assert actual_a == 0x83, f"DAA 1 failed: expected A=0x83, got {{hex(actual_a)}}"
     assert actual_f == 0x00, f"DAA 1 failed: expected F=0x00, got {{hex(actual_f)}}"
 
@@ -385,10 +385,10 @@ async def test_daa_2(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x27])
     await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = 0x4B60  # N (0x40) + H (0x20)
+    dut.uut.reg_file.AF_reg.value = 0x4B60  # N (0x40) + H (0x20)
     await do_cycles(dut, 1)
-    actual_a = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
+    actual_a = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
+    actual_f = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
     assert actual_a == 0x45, f"DAA 2 failed: expected A=0x45, got {{hex(actual_a)}}"
     assert (
         actual_f == 0x04
@@ -400,10 +400,10 @@ async def test_cpl(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x2F])
     await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = 0xAA00
+    dut.uut.reg_file.AF_reg.value = 0xAA00
     await do_cycles(dut, 1)
-    actual_a = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
+    actual_a = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
+    actual_f = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
     assert actual_a == 0x55, f"CPL failed: expected A=0x55, got {{hex(actual_a)}}"
     assert (
         actual_f & 0x6
@@ -415,9 +415,9 @@ async def test_scf(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x37])
     await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = 0x0000
+    dut.uut.reg_file.AF_reg.value = 0x0000
     await do_cycles(dut, 1)
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
+    actual_f = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
     assert (
         actual_f & 0x1
     ) == 0x01, f"SCF failed: expected CY=1, got F={{hex(actual_f)}}"
@@ -428,9 +428,9 @@ async def test_ccf_0(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x3F])
     await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = 0x0010
+    dut.uut.reg_file.AF_reg.value = 0x0010
     await do_cycles(dut, 1)
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
+    actual_f = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
     assert (
         actual_f & 0x1
     ) == 0x00, f"CCF failed: expected CY=0, got F={{hex(actual_f)}}"
@@ -441,9 +441,9 @@ async def test_ccf_1(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [0x3F])
     await reset_cpu(dut)
-    dut.reg_file.AF_reg.value = 0x0000
+    dut.uut.reg_file.AF_reg.value = 0x0000
     await do_cycles(dut, 1)
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
+    actual_f = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
     assert (
         actual_f & 0x1
     ) == 0x01, f"CCF failed: expected CY=1, got F={{hex(actual_f)}}"
@@ -455,15 +455,15 @@ async def test_add_hl_bc_no_carry_no_halfcarry(dut):
     mem = CPUMemory(dut, [0x09])  # ADD HL,BC
     await reset_cpu(dut)
 
-    dut.reg_file.HL_reg.value = 0x1234
-    dut.reg_file.BC_reg.value = 0x1111
-    dut.reg_file.AF_reg.value = 0x5580  # A=0x55, Z=1 (should be preserved)
+    dut.uut.reg_file.HL_reg.value = 0x1234
+    dut.uut.reg_file.BC_reg.value = 0x1111
+    dut.uut.reg_file.AF_reg.value = 0x5580  # A=0x55, Z=1 (should be preserved)
 
     await do_cycles(dut, 2)
 
-    actual_hl = dut.reg_file.HL_reg.value.to_unsigned()
-    actual_a = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
+    actual_hl = dut.uut.reg_file.HL_reg.value.to_unsigned()
+    actual_a = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
+    actual_f = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
 
     assert (
         actual_hl == 0x2345
@@ -491,14 +491,14 @@ async def test_add_hl_bc_halfcarry(dut):
     mem = CPUMemory(dut, [0x09])  # ADD HL,BC
     await reset_cpu(dut)
 
-    dut.reg_file.HL_reg.value = 0x0FFF
-    dut.reg_file.BC_reg.value = 0x0001
-    dut.reg_file.AF_reg.value = 0x0080  # Z=1 (should be preserved)
+    dut.uut.reg_file.HL_reg.value = 0x0FFF
+    dut.uut.reg_file.BC_reg.value = 0x0001
+    dut.uut.reg_file.AF_reg.value = 0x0080  # Z=1 (should be preserved)
 
     await do_cycles(dut, 2)
 
-    actual_hl = dut.reg_file.HL_reg.value.to_unsigned()
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
+    actual_hl = dut.uut.reg_file.HL_reg.value.to_unsigned()
+    actual_f = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
 
     assert (
         actual_hl == 0x1000
@@ -523,14 +523,14 @@ async def test_add_hl_de_carry_and_halfcarry(dut):
     mem = CPUMemory(dut, [0x19])  # ADD HL,DE
     await reset_cpu(dut)
 
-    dut.reg_file.HL_reg.value = 0xFFFF
-    dut.reg_file.DE_reg.value = 0x0001
-    dut.reg_file.AF_reg.value = 0x0080  # Z=1 (should be preserved)
+    dut.uut.reg_file.HL_reg.value = 0xFFFF
+    dut.uut.reg_file.DE_reg.value = 0x0001
+    dut.uut.reg_file.AF_reg.value = 0x0080  # Z=1 (should be preserved)
 
     await do_cycles(dut, 2)
 
-    actual_hl = dut.reg_file.HL_reg.value.to_unsigned()
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
+    actual_hl = dut.uut.reg_file.HL_reg.value.to_unsigned()
+    actual_f = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
 
     assert (
         actual_hl == 0x0000
@@ -555,13 +555,13 @@ async def test_add_hl_hl_carry_only(dut):
     mem = CPUMemory(dut, [0x29])  # ADD HL,HL
     await reset_cpu(dut)
 
-    dut.reg_file.HL_reg.value = 0x8000
-    dut.reg_file.AF_reg.value = 0x0000
+    dut.uut.reg_file.HL_reg.value = 0x8000
+    dut.uut.reg_file.AF_reg.value = 0x0000
 
     await do_cycles(dut, 2)
 
-    actual_hl = dut.reg_file.HL_reg.value.to_unsigned()
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
+    actual_hl = dut.uut.reg_file.HL_reg.value.to_unsigned()
+    actual_f = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
 
     assert (
         actual_hl == 0x0000
@@ -583,14 +583,14 @@ async def test_add_hl_sp_halfcarry(dut):
     mem = CPUMemory(dut, [0x39])  # ADD HL,SP
     await reset_cpu(dut)
 
-    dut.reg_file.HL_reg.value = 0x8FFF
-    dut.reg_file.SP_reg.value = 0x0001
-    dut.reg_file.AF_reg.value = 0x0000
+    dut.uut.reg_file.HL_reg.value = 0x8FFF
+    dut.uut.reg_file.SP_reg.value = 0x0001
+    dut.uut.reg_file.AF_reg.value = 0x0000
 
     await do_cycles(dut, 2)
 
-    actual_hl = dut.reg_file.HL_reg.value.to_unsigned()
-    actual_f = (dut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
+    actual_hl = dut.uut.reg_file.HL_reg.value.to_unsigned()
+    actual_f = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 4) & 0x0F
 
     assert (
         actual_hl == 0x9000
@@ -615,12 +615,12 @@ async def test_push_bc(dut):
     mem = CPUMemory(dut, [0xC5])  # PUSH BC
     await reset_cpu(dut)
 
-    dut.reg_file.BC_reg.value = 0x1234
-    dut.reg_file.SP_reg.value = 0xC010
+    dut.uut.reg_file.BC_reg.value = 0x1234
+    dut.uut.reg_file.SP_reg.value = 0xC010
 
     await do_cycles(dut, 4)
 
-    sp = dut.reg_file.SP_reg.value.to_unsigned()
+    sp = dut.uut.reg_file.SP_reg.value.to_unsigned()
     low = mem.data.get(0xC00E, 0)
     high = mem.data.get(0xC00F, 0)
 
@@ -635,12 +635,12 @@ async def test_push_af(dut):
     mem = CPUMemory(dut, [0xF5])  # PUSH AF
     await reset_cpu(dut)
 
-    dut.reg_file.AF_reg.value = 0x42B0
-    dut.reg_file.SP_reg.value = 0xC100
+    dut.uut.reg_file.AF_reg.value = 0x42B0
+    dut.uut.reg_file.SP_reg.value = 0xC100
 
     await do_cycles(dut, 4)
 
-    sp = dut.reg_file.SP_reg.value.to_unsigned()
+    sp = dut.uut.reg_file.SP_reg.value.to_unsigned()
     low = mem.data.get(0xC0FE, 0)
     high = mem.data.get(0xC0FF, 0)
 
@@ -655,13 +655,13 @@ async def test_pop_de(dut):
     mem = CPUMemory(dut, [0xD1], data={0xC000: 0x78, 0xC001: 0x56})  # POP DE
     await reset_cpu(dut)
 
-    dut.reg_file.SP_reg.value = 0xC000
-    dut.reg_file.DE_reg.value = 0x0000
+    dut.uut.reg_file.SP_reg.value = 0xC000
+    dut.uut.reg_file.DE_reg.value = 0x0000
 
     await do_cycles(dut, 3)
 
-    de = dut.reg_file.DE_reg.value.to_unsigned()
-    sp = dut.reg_file.SP_reg.value.to_unsigned()
+    de = dut.uut.reg_file.DE_reg.value.to_unsigned()
+    sp = dut.uut.reg_file.SP_reg.value.to_unsigned()
 
     assert de == 0x5678, f"POP DE failed: expected DE=0x5678, got {hex(de)}"
     assert sp == 0xC002, f"POP DE failed: expected SP=0xC002, got {hex(sp)}"
@@ -673,13 +673,13 @@ async def test_pop_hl(dut):
     mem = CPUMemory(dut, [0xE1], data={0xBFFE: 0xCD, 0xBFFF: 0xAB})  # POP HL
     await reset_cpu(dut)
 
-    dut.reg_file.SP_reg.value = 0xBFFE
-    dut.reg_file.HL_reg.value = 0x0000
+    dut.uut.reg_file.SP_reg.value = 0xBFFE
+    dut.uut.reg_file.HL_reg.value = 0x0000
 
     await do_cycles(dut, 3)
 
-    hl = dut.reg_file.HL_reg.value.to_unsigned()
-    sp = dut.reg_file.SP_reg.value.to_unsigned()
+    hl = dut.uut.reg_file.HL_reg.value.to_unsigned()
+    sp = dut.uut.reg_file.SP_reg.value.to_unsigned()
 
     assert hl == 0xABCD, f"POP HL failed: expected HL=0xABCD, got {hex(hl)}"
     assert sp == 0xC000, f"POP HL failed: expected SP=0xC000, got {hex(sp)}"
@@ -691,15 +691,15 @@ async def test_pop_af_masks_low_nibble_of_f(dut):
     mem = CPUMemory(dut, [0xF1], data={0xC000: 0xFF, 0xC001: 0x12})  # POP AF
     await reset_cpu(dut)
 
-    dut.reg_file.SP_reg.value = 0xC000
-    dut.reg_file.AF_reg.value = 0x0000
+    dut.uut.reg_file.SP_reg.value = 0xC000
+    dut.uut.reg_file.AF_reg.value = 0x0000
 
     await do_cycles(dut, 3)
 
-    af = dut.reg_file.AF_reg.value.to_unsigned()
+    af = dut.uut.reg_file.AF_reg.value.to_unsigned()
     a = (af >> 8) & 0xFF
     f = af & 0xFF
-    sp = dut.reg_file.SP_reg.value.to_unsigned()
+    sp = dut.uut.reg_file.SP_reg.value.to_unsigned()
 
     assert a == 0x12, f"POP AF failed: expected A=0x12, got {hex(a)}"
     assert f == 0xF0, f"POP AF failed: expected F lower nibble masked, got {hex(f)}"
@@ -712,13 +712,13 @@ async def test_push_then_pop_roundtrip_bc_to_de(dut):
     mem = CPUMemory(dut, [0xC5, 0xD1])  # PUSH BC; POP DE
     await reset_cpu(dut)
 
-    dut.reg_file.BC_reg.value = 0x9A31
-    dut.reg_file.DE_reg.value = 0x0000
-    dut.reg_file.SP_reg.value = 0xC200
+    dut.uut.reg_file.BC_reg.value = 0x9A31
+    dut.uut.reg_file.DE_reg.value = 0x0000
+    dut.uut.reg_file.SP_reg.value = 0xC200
 
     await do_cycles(dut, 4)  # PUSH BC
 
-    sp_mid = dut.reg_file.SP_reg.value.to_unsigned()
+    sp_mid = dut.uut.reg_file.SP_reg.value.to_unsigned()
     low_mid = mem.data.get(0xC1FE, 0)
     high_mid = mem.data.get(0xC1FF, 0)
     assert sp_mid == 0xC1FE, f"PUSH phase failed: expected SP=0xC1FE, got {hex(sp_mid)}"
@@ -731,8 +731,8 @@ async def test_push_then_pop_roundtrip_bc_to_de(dut):
 
     await do_cycles(dut, 3)  # POP DE
 
-    de = dut.reg_file.DE_reg.value.to_unsigned()
-    sp = dut.reg_file.SP_reg.value.to_unsigned()
+    de = dut.uut.reg_file.DE_reg.value.to_unsigned()
+    sp = dut.uut.reg_file.SP_reg.value.to_unsigned()
 
     assert de == 0x9A31, f"PUSH/POP roundtrip failed: expected DE=0x9A31, got {hex(de)}"
     assert (
@@ -746,7 +746,7 @@ async def test_ldh_a8_ind_a(dut):
     mem = CPUMemory(dut, [0xE0, 0x42])  # LDH (0xFF00+0x42),A
     await reset_cpu(dut)
 
-    dut.reg_file.AF_reg.value = 0xAB00  # A=0xAB
+    dut.uut.reg_file.AF_reg.value = 0xAB00  # A=0xAB
 
     await do_cycles(dut, 3)
 
@@ -762,11 +762,11 @@ async def test_ldh_a_ind_a8(dut):
     mem = CPUMemory(dut, [0xF0, 0x80], data={0xFF80: 0x5E})  # LDH A,(0xFF00+0x80)
     await reset_cpu(dut)
 
-    dut.reg_file.AF_reg.value = 0x0000
+    dut.uut.reg_file.AF_reg.value = 0x0000
 
     await do_cycles(dut, 3)
 
-    actual_a = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
+    actual_a = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
     assert actual_a == 0x5E, f"LDH A,(a8) failed: expected A=0x5E, got {hex(actual_a)}"
 
 
@@ -776,8 +776,8 @@ async def test_ldh_c_ind_a(dut):
     mem = CPUMemory(dut, [0xE2])  # LDH (C),A  -> [0xFF00 + C] = A
     await reset_cpu(dut)
 
-    dut.reg_file.AF_reg.value = 0x7700  # A=0x77
-    dut.reg_file.BC_reg.value = 0x0033  # C=0x33
+    dut.uut.reg_file.AF_reg.value = 0x7700  # A=0x77
+    dut.uut.reg_file.BC_reg.value = 0x0033  # C=0x33
 
     await do_cycles(dut, 2)
 
@@ -793,12 +793,12 @@ async def test_ldh_a_ind_c(dut):
     mem = CPUMemory(dut, [0xF2], data={0xFF10: 0xC4})  # LDH A,(C)
     await reset_cpu(dut)
 
-    dut.reg_file.AF_reg.value = 0x0000
-    dut.reg_file.BC_reg.value = 0x0010  # C=0x10
+    dut.uut.reg_file.AF_reg.value = 0x0000
+    dut.uut.reg_file.BC_reg.value = 0x0010  # C=0x10
 
     await do_cycles(dut, 2)
 
-    actual_a = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
+    actual_a = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
     assert actual_a == 0xC4, f"LDH A,(C) failed: expected A=0xC4, got {hex(actual_a)}"
 
 
@@ -809,12 +809,12 @@ async def test_ld_a16_ind_a(dut):
     mem = CPUMemory(dut, [0xEA, 0x34, 0x12])
     await reset_cpu(dut)
 
-    dut.reg_file.AF_reg.value = 0x9B00  # A=0x9B
+    dut.uut.reg_file.AF_reg.value = 0x9B00  # A=0x9B
 
     await do_cycles(dut, 4)
 
     actual = mem.data.get(0x1234, 0)
-    actual_a = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
+    actual_a = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
     assert (
         actual == 0x9B
     ), f"LD [a16],A failed: expected [0x1234]=0x9B, got {hex(actual)}"
@@ -830,11 +830,11 @@ async def test_ld_a_ind_a16(dut):
     mem = CPUMemory(dut, [0xFA, 0x78, 0x56], data={0x5678: 0x3C})
     await reset_cpu(dut)
 
-    dut.reg_file.AF_reg.value = 0x0000
+    dut.uut.reg_file.AF_reg.value = 0x0000
 
     await do_cycles(dut, 4)
 
-    actual_a = (dut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
+    actual_a = (dut.uut.reg_file.AF_reg.value.to_unsigned() >> 8) & 0xFF
     assert actual_a == 0x3C, f"LD A,[a16] failed: expected A=0x3C, got {hex(actual_a)}"
 
 
@@ -845,12 +845,12 @@ async def test_jr_e8_positive(dut):
     await reset_cpu(dut)
 
     await do_cycles(dut, 2)
-    actual_pc = dut.reg_file.PC_reg.value.to_unsigned()
+    actual_pc = dut.uut.reg_file.PC_reg.value.to_unsigned()
     assert (
         actual_pc == 0x0007
     ), f"JR e8 (+) failed: expected PC=0x0007, got {hex(actual_pc)}"
     await do_cycles(dut, 1)
-    actual_pc = dut.reg_file.PC_reg.value.to_unsigned()
+    actual_pc = dut.uut.reg_file.PC_reg.value.to_unsigned()
     assert (
         actual_pc == 0x0008
     ), f"JR e8 (+) failed: expected PC=0x0008, got {hex(actual_pc)}"
@@ -863,12 +863,12 @@ async def test_jr_e8_negative(dut):
     await reset_cpu(dut)
 
     await do_cycles(dut, 2)
-    actual_pc = dut.reg_file.PC_reg.value.to_unsigned()
+    actual_pc = dut.uut.reg_file.PC_reg.value.to_unsigned()
     assert (
         actual_pc == 0x0001
     ), f"JR e8 (-) failed: expected PC=0x0001, got {hex(actual_pc)}"
     await do_cycles(dut, 1)
-    actual_pc = dut.reg_file.PC_reg.value.to_unsigned()
+    actual_pc = dut.uut.reg_file.PC_reg.value.to_unsigned()
     assert (
         actual_pc == 0x0002
     ), f"JR e8 (+) failed: expected PC=0x0002, got {hex(actual_pc)}"
@@ -879,11 +879,11 @@ async def test_jr_e8_positive_with_carry(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [], data={0x00FE: 0x18, 0x00FF: 0x02})  # JR +2 at 0x00FE
     await reset_cpu(dut)
-    dut.reg_file.PC_reg.value = 0x00FE
+    dut.uut.reg_file.PC_reg.value = 0x00FE
 
     await do_cycles(dut, 3)
 
-    actual_pc = dut.reg_file.PC_reg.value.to_unsigned()
+    actual_pc = dut.uut.reg_file.PC_reg.value.to_unsigned()
     assert (
         actual_pc == 0x0102
     ), f"JR e8 (+ carry) failed: expected PC=0x0102, got {hex(actual_pc)}"
@@ -894,11 +894,11 @@ async def test_jr_e8_negative_with_carry(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
     mem = CPUMemory(dut, [], data={0x0100: 0x18, 0x0101: 0xFD})  # JR -3 at 0x0100
     await reset_cpu(dut)
-    dut.reg_file.PC_reg.value = 0x0100
+    dut.uut.reg_file.PC_reg.value = 0x0100
 
     await do_cycles(dut, 3) # we need 3 cycles cause nop is executed fist at PC: 0
 
-    actual_pc = dut.reg_file.PC_reg.value.to_unsigned()
+    actual_pc = dut.uut.reg_file.PC_reg.value.to_unsigned()
     assert (
         actual_pc == 0x00FF
     ), f"JR e8 (- carry) failed: expected PC=0x00FF, got {hex(actual_pc)}"
@@ -915,12 +915,12 @@ async def _run_jr_cc_case(
     mem = CPUMemory(dut, [opcode, 0x02, 0x00])
     await reset_cpu(dut)
 
-    dut.reg_file.AF_reg.value = flags
+    dut.uut.reg_file.AF_reg.value = flags
 
     await do_cycles(dut, 2 if should_jump else 1)
 
     expected_pc = 0x0004 if should_jump else 0x0002
-    actual_pc = dut.reg_file.PC_reg.value.to_unsigned()
+    actual_pc = dut.uut.reg_file.PC_reg.value.to_unsigned()
     assert (
         actual_pc == expected_pc
     ), f"JR {name},e8 failed: expected PC={hex(expected_pc)}, got {hex(actual_pc)}"
@@ -977,12 +977,12 @@ async def _run_jp_cc_nn_case(
     mem = CPUMemory(dut, [opcode, 0x34, 0x12, 0x00])
     await reset_cpu(dut)
 
-    dut.reg_file.AF_reg.value = flags
+    dut.uut.reg_file.AF_reg.value = flags
 
     await do_cycles(dut, 3 if should_jump else 2)
 
     expected_pc = 0x1234 if should_jump else 0x0003
-    actual_pc = dut.reg_file.PC_reg.value.to_unsigned()
+    actual_pc = dut.uut.reg_file.PC_reg.value.to_unsigned()
     assert (
         actual_pc == expected_pc
     ), f"JP {name},nn failed: expected PC={hex(expected_pc)}, got {hex(actual_pc)}"
@@ -1036,7 +1036,7 @@ async def test_jp_a16(dut):
 
     await do_cycles(dut, 3)
 
-    actual_pc = dut.reg_file.PC_reg.value.to_unsigned()
+    actual_pc = dut.uut.reg_file.PC_reg.value.to_unsigned()
     assert (
         actual_pc == 0x1234
     ), f"JP a16 failed: expected PC=0x1234, got {hex(actual_pc)}"
@@ -1049,7 +1049,7 @@ async def test_jp_hl(dut):
     mem.data[0x1234] = 0x80
     await reset_cpu(dut)
 
-    dut.reg_file.HL_reg.value = 0x1234
+    dut.uut.reg_file.HL_reg.value = 0x1234
 
     await do_cycles(dut, 0)
     assert (
@@ -1057,12 +1057,12 @@ async def test_jp_hl(dut):
     ), f"JP HL failed: expected address bus to read 0x1234, got {hex(dut.addr_out.value.to_unsigned())}"
 
     await FallingEdge(dut.clk)  # Wait for IF to complete
-    actual_pc = dut.reg_file.PC_reg.value.to_unsigned()
+    actual_pc = dut.uut.reg_file.PC_reg.value.to_unsigned()
     assert (
         actual_pc == 0x1235
     ), f"JP HL failed: expected PC=0x1235, got {hex(actual_pc)}"
     assert (
-        dut.opcode.value.to_unsigned() == 0x80
+        dut.uut.opcode.value.to_unsigned() == 0x80
     ), f"JP HL failed: expected opcode to still be 0x80 during execution"
 
 
@@ -1072,12 +1072,12 @@ async def test_call_a16(dut):
     mem = CPUMemory(dut, [0xCD, 0x34, 0x12, 0x00])
     await reset_cpu(dut)
 
-    dut.reg_file.SP_reg.value = 0xBFFE
+    dut.uut.reg_file.SP_reg.value = 0xBFFE
 
     await do_cycles(dut, 5)  # 6 cycles but check before IF
 
-    actual_pc = dut.reg_file.PC_reg.value.to_unsigned()
-    actual_sp = dut.reg_file.SP_reg.value.to_unsigned()
+    actual_pc = dut.uut.reg_file.PC_reg.value.to_unsigned()
+    actual_sp = dut.uut.reg_file.SP_reg.value.to_unsigned()
     stacked_pcl = mem.data.get(0xBFFC, 0)
     stacked_pch = mem.data.get(0xBFFD, 0)
 
@@ -1106,8 +1106,8 @@ async def _run_call_cc_nn_case(
     mem = CPUMemory(dut, [opcode, 0x34, 0x12, 0x00], data={0xBFFC: 0xAA, 0xBFFD: 0xBB})
     await reset_cpu(dut)
 
-    dut.reg_file.AF_reg.value = flags
-    dut.reg_file.SP_reg.value = 0xBFFE
+    dut.uut.reg_file.AF_reg.value = flags
+    dut.uut.reg_file.SP_reg.value = 0xBFFE
 
     await do_cycles(dut, 5 if should_call else 2)
 
@@ -1116,8 +1116,8 @@ async def _run_call_cc_nn_case(
     expected_pcl = 0x03 if should_call else 0xAA
     expected_pch = 0x00 if should_call else 0xBB
 
-    actual_pc = dut.reg_file.PC_reg.value.to_unsigned()
-    actual_sp = dut.reg_file.SP_reg.value.to_unsigned()
+    actual_pc = dut.uut.reg_file.PC_reg.value.to_unsigned()
+    actual_sp = dut.uut.reg_file.SP_reg.value.to_unsigned()
     stacked_pcl = mem.data.get(0xBFFC, 0)
     stacked_pch = mem.data.get(0xBFFD, 0)
 
@@ -1181,12 +1181,12 @@ async def test_ret(dut):
     mem = CPUMemory(dut, [0xC9], data={0xBFFC: 0x34, 0xBFFD: 0x12})
     await reset_cpu(dut)
 
-    dut.reg_file.SP_reg.value = 0xBFFC
+    dut.uut.reg_file.SP_reg.value = 0xBFFC
 
     await do_cycles(dut, 3)
 
-    actual_pc = dut.reg_file.PC_reg.value.to_unsigned()
-    actual_sp = dut.reg_file.SP_reg.value.to_unsigned()
+    actual_pc = dut.uut.reg_file.PC_reg.value.to_unsigned()
+    actual_sp = dut.uut.reg_file.SP_reg.value.to_unsigned()
     assert actual_pc == 0x1234, f"RET failed: expected PC=0x1234, got {hex(actual_pc)}"
     assert actual_sp == 0xBFFE, f"RET failed: expected SP=0xBFFE, got {hex(actual_sp)}"
 
@@ -1202,15 +1202,15 @@ async def _run_ret_cc_case(
     mem = CPUMemory(dut, [opcode, 0x00], data={0xBFFC: 0x34, 0xBFFD: 0x12})
     await reset_cpu(dut)
 
-    dut.reg_file.AF_reg.value = flags
-    dut.reg_file.SP_reg.value = 0xBFFC
+    dut.uut.reg_file.AF_reg.value = flags
+    dut.uut.reg_file.SP_reg.value = 0xBFFC
 
     await do_cycles(dut, 4 if should_return else 1)
 
     expected_pc = 0x1234 if should_return else 0x0001
     expected_sp = 0xBFFE if should_return else 0xBFFC
-    actual_pc = dut.reg_file.PC_reg.value.to_unsigned()
-    actual_sp = dut.reg_file.SP_reg.value.to_unsigned()
+    actual_pc = dut.uut.reg_file.PC_reg.value.to_unsigned()
+    actual_sp = dut.uut.reg_file.SP_reg.value.to_unsigned()
 
     assert (
         actual_pc == expected_pc
@@ -1265,12 +1265,12 @@ async def _run_rst_vector_case(dut, opcode: int, expected_vector: int):
     mem = CPUMemory(dut, [opcode, 0x00])
     await reset_cpu(dut)
 
-    dut.reg_file.SP_reg.value = 0xBFFE
+    dut.uut.reg_file.SP_reg.value = 0xBFFE
 
     await do_cycles(dut, 3)  # 4 cycles but check before IF
 
-    actual_pc = dut.reg_file.PC_reg.value.to_unsigned()
-    actual_sp = dut.reg_file.SP_reg.value.to_unsigned()
+    actual_pc = dut.uut.reg_file.PC_reg.value.to_unsigned()
+    actual_sp = dut.uut.reg_file.SP_reg.value.to_unsigned()
     stacked_pcl = mem.data.get(0xBFFC, 0)
     stacked_pch = mem.data.get(0xBFFD, 0)
 
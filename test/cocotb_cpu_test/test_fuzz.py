@@ -0,0 +1,26 @@
+import os
+
+import cocotb
+import fuzz
+from test_utils import run_vectors, vectors_from_table
+
+# FUZZ_SEED=S FUZZ_INDEX=I replays the single case reported as "seed=S index=I"
+FUZZ_SEED = int(os.getenv("FUZZ_SEED", "1"))
+FUZZ_COUNT = int(os.getenv("FUZZ_COUNT", "500"))
+FUZZ_LENGTH = int(os.getenv("FUZZ_LENGTH", "16"))
+FUZZ_INDEX = os.getenv("FUZZ_INDEX")
+
+
+@cocotb.test()
+async def test_fuzz(dut):
+    """Random instruction sequences against the ISS, all in one simulator session."""
+    if FUZZ_INDEX is not None:
+        indices = [int(FUZZ_INDEX)]
+    else:
+        indices = range(FUZZ_COUNT)
+
+    dut._log.info(
+        f"Fuzzing seed={FUZZ_SEED}: {len(indices)} cases of {FUZZ_LENGTH} instructions"
+    )
+    vectors = vectors_from_table(fuzz.fuzz_vectors(FUZZ_SEED, indices, FUZZ_LENGTH))
+    await run_vectors(dut, vectors)
@@ -0,0 +1,51 @@
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import FallingEdge, RisingEdge, with_timeout
+from test_utils import HDLMemory, reset_cpu
+
+# Tests for the cpu_mem_cocotb_dut toplevel: programs run entirely against the
+# HDL memory and Python only loads the image up front and dumps it at the end.
+
+
+async def run_until_halt(dut, mem, program, timeout_us=1000):
+    cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
+    await FallingEdge(dut.clk)
+    await mem.load_image(program)
+    await reset_cpu(dut)
+    await with_timeout(RisingEdge(dut.halted), timeout_us, "us")
+    await FallingEdge(dut.clk)
+
+
+@cocotb.test()
+async def test_fill_loop(dut):
+    mem = HDLMemory(dut)
+    # fmt: off
+    program = [
+        0x21, 0x00, 0xC0,  # LD HL, 0xC000
+        0x06, 0x00,        # LD B, 0 (256 iterations)
+        0xAF,              # XOR A
+        0x22,              # loop: LD (HL+), A
+        0x3C,              # INC A
+        0x05,              # DEC B
+        0x20, 0xFB,        # JR NZ, loop
+        0x76,              # HALT
+    ]
+    # fmt: on
+    await run_until_halt(dut, mem, program)
+
+    actual = await mem.dump(0xC000, 0xC100)
+    assert actual == bytes(range(256)), f"fill loop mismatch: {actual.hex()}"
+
+
+@cocotb.test()
+async def test_long_straight_line_program(dut):
+    mem = HDLMemory(dut)
+    count = 4000
+    program = [0x21, 0x00, 0xC0, 0xAF]  # LD HL, 0xC000; XOR A
+    program += [0x22, 0x3C] * count  # LD (HL+), A; INC A
+    program += [0x76]  # HALT
+    await run_until_halt(dut, mem, program)
+
+    actual = await mem.dump(0xC000, 0xC000 + count)
+    expected = bytes(i & 0xFF for i in range(count))
+    assert actual == expected, "straight-line store sequence mismatch"
@@ -1,35 +1,143 @@
+import json
+from typing import NamedTuple
+
 import cocotb
-from cocotb.triggers import RisingEdge, FallingEdge
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, FallingEdge, ReadOnly, Timer
+
+REGS_16 = ("AF", "BC", "DE", "HL", "SP", "PC")
+REGS_8 = {
+    "A": ("AF", 8),
+    "F": ("AF", 0),
+    "B": ("BC", 8),
+    "C": ("BC", 0),
+    "D": ("DE", 8),
+    "E": ("DE", 0),
+    "H": ("HL", 8),
+    "L": ("HL", 0),
+}
+
+
+MEM_SIZE = 0x10000
+
+
+class MemoryImage(bytearray):
+    """64 KiB flat memory that also answers the dict-style ``get`` older tests use."""
+
+    def get(self, addr, default=0):
+        return self[addr] if 0 <= addr < len(self) else default
 
 
 class CPUMemory:
+    """Flat 64 KiB memory for the CPU bus, serviced on every falling clock edge."""
+
     def __init__(self, dut, program, data=None):
         self.dut = dut
-        self.program = program
-        self.data = data if data is not None else {}
+        self.data = MemoryImage(MEM_SIZE)
+        self._view = memoryview(self.data)
+        self.load_image(program, data)
         self._coro = cocotb.start_soon(self._run())
 
+    def load(self, addr, data):
+        """Copy *data* into memory starting at *addr*."""
+        self._view[addr : addr + len(data)] = bytes(data)
+
+    def dump(self, start=0, end=MEM_SIZE):
+        """Return the memory contents in ``[start, end)`` as bytes."""
+        return bytes(self._view[start:end])
+
+    def clear(self):
+        self._view[:] = bytes(MEM_SIZE)
+
+    def load_image(self, program, data=None):
+        """Replace the whole memory with *program* at 0x0000 plus *data* ``{addr: value}``."""
+        self.clear()
+        self.load(0, program)
+        for addr, value in (data or {}).items():
+            self.data[addr] = value
+
     async def _run(self):
+        dut = self.dut
+        mem = self.data
+        clk_fall = FallingEdge(dut.clk)
+
         while True:
-            await FallingEdge(self.dut.clk)
+            await clk_fall
 
-            if self.dut.rd_en.value == 1:
+            if dut.rd_en.value == 1:
                 try:
-                    addr = self.dut.addr_out.value.to_unsigned()
-                    if addr < len(self.program):
-                        self.dut.data_in.value = self.program[addr]
-                    else:
-                        self.dut.data_in.value = self.data.get(addr, 0)
+                    dut.data_in.value = mem[dut.addr_out.value.to_unsigned()]
                 except ValueError:
-                    self.dut.data_in.value = 0
-            elif self.dut.wr_en.value == 1:
+                    dut.data_in.value = 0
+            elif dut.wr_en.value == 1:
                 try:
-                    addr = self.dut.addr_out.value.to_unsigned()
-                    self.data[addr] = self.dut.data_out.value.to_unsigned()
+                    mem[dut.addr_out.value.to_unsigned()] = dut.data_out.value.to_unsigned()
                 except ValueError:
                     pass
 
 
+class HDLMemory:
+    """Bulk access to the HDL memory inside ``cpu_mem_cocotb_dut``.
+
+    Nothing runs per cycle in Python: contents are exchanged through the
+    $readmemh/$writememh files only when :meth:`load` or :meth:`dump` is
+    awaited, which must happen between clock edges (e.g. after a FallingEdge).
+    """
+
+    def __init__(self, dut, load_file="mem_load.hex", dump_file="mem_dump.hex"):
+        self.dut = dut
+        self.load_file = load_file
+        self.dump_file = dump_file
+        dut.mem_load.value = 0
+        dut.mem_dump.value = 0
+
+    async def _pulse(self, signal):
+        signal.value = 1
+        await Timer(1, unit="step")
+        signal.value = 0
+        await Timer(1, unit="step")
+
+    async def load(self, addr, data):
+        """Copy *data* into the HDL memory starting at *addr*."""
+        await self.load_segments({addr: bytes(data)})
+
+    async def load_segments(self, segments):
+        """Load several ``{addr: bytes}`` segments with a single $readmemh."""
+        with open(self.load_file, "w") as f:
+            for addr, data in segments.items():
+                f.write(f"@{addr:x}\n")
+                f.write("\n".join(f"{b:02x}" for b in data))
+                f.write("\n")
+        await self._pulse(self.dut.mem_load)
+
+    async def load_image(self, program, data=None):
+        """Replace the whole memory with *program* at 0x0000 plus *data* ``{addr: value}``."""
+        image = bytearray(MEM_SIZE)
+        image[: len(program)] = bytes(program)
+        for addr, value in (data or {}).items():
+            image[addr] = value
+        await self.load_segments({0: image})
+
+    async def dump(self, start=0, end=MEM_SIZE):
+        """Return the HDL memory contents in ``[start, end)`` as bytes."""
+        await self._pulse(self.dut.mem_dump)
+
+        image = bytearray(MEM_SIZE)
+        addr = 0
+        with open(self.dump_file) as f:
+            for line in f:
+                for word in line.split("//")[0].split():
+                    if word.startswith("@"):
+                        addr = int(word[1:], 16)
+                        continue
+                    try:
+                        image[addr] = int(word, 16)
+                    except ValueError:
+                        image[addr] = 0  # x/z bytes were never written
+                    addr += 1
+        return bytes(image[start:end])
+
+
 async def reset_cpu(dut):
     dut.rst.value = 1
     dut.data_in.value = 0
@@ -43,3 +151,157 @@ async def do_cycles(dut, c: int):
     for _ in range(c):
         await RisingEdge(dut.clk)
     await FallingEdge(dut.clk)
+
+
+async def step_instructions(dut, n: int = 1):
+    """Run *n* whole instructions and return the number of M-cycles consumed.
+
+    Same semantics as step_instruction() in the Verilator harnesses: clock
+    once, then keep going until m_cycle is back to 0. Instead of polling every
+    clock, multi-cycle instructions wait for a single rising edge of
+    control_unit.instr_start. Like do_cycles, returns after the falling edge.
+    """
+    instr_start = dut.uut.control_unit.instr_start
+    start = None
+
+    for _ in range(n):
+        await RisingEdge(dut.clk)
+        await ReadOnly()
+        if start is None:
+            # cpu.counter already includes this first cycle
+            start = dut.uut.counter.value.to_unsigned() - 1
+        if instr_start.value != 1:
+            await RisingEdge(instr_start)
+
+    await FallingEdge(dut.clk)
+    return dut.uut.counter.value.to_unsigned() - start
+
+
+class Vector(NamedTuple):
+    """One batched test case: run *steps* instructions of *program* from the given state.
+
+    *cycles* is the expected number of M-cycles those instructions take.
+    """
+
+    name: str
+    program: list
+    regs: dict
+    data: dict
+    expected: dict
+    cycles: int
+    steps: int = 1
+
+
+def load_vectors(path):
+    """Read a vector table written by the gen_*.py generators."""
+    with open(path) as f:
+        return vectors_from_table(json.load(f))
+
+
+def vectors_from_table(table):
+    """Turn ``make_vector`` dicts (from a file or built in memory) into Vectors."""
+    return [
+        Vector(
+            name=v["name"],
+            program=v["program"],
+            regs=v["regs"],
+            data=dict(v["data"]),
+            expected={
+                k: (dict(val) if k == "mem" else val) for k, val in v["expected"].items()
+            },
+            cycles=v["cycles"],
+            steps=v.get("steps", 1),
+        )
+        for v in table
+    ]
+
+
+def read_reg(dut, name):
+    if name in REGS_8:
+        reg16, shift = REGS_8[name]
+        value = getattr(dut.uut.reg_file, f"{reg16}_reg").value.to_unsigned() >> shift
+        return value & (0xF0 if name == "F" else 0xFF)
+    return getattr(dut.uut.reg_file, f"{name}_reg").value.to_unsigned()
+
+
+def load_state(dut, mem, vector):
+    """Backdoor-load *vector* into the CPU as if its first opcode was just fetched.
+
+    Must be called on an instruction boundary (after a FallingEdge). The opcode
+    register gets the first program byte and PC points past it, which is the
+    state the fetch overlapped with the previous instruction leaves behind.
+    """
+    mem.load_image(vector.program, vector.data)
+
+    regs = dict.fromkeys(REGS_16, 0)
+    for name, value in vector.regs.items():
+        if name in REGS_8:
+            reg16, shift = REGS_8[name]
+            regs[reg16] = (regs[reg16] & ~(0xFF << shift)) | ((value & 0xFF) << shift)
+        else:
+            regs[name] = value & 0xFFFF
+    start_pc = regs["PC"]
+    regs["PC"] = (start_pc + 1) & 0xFFFF
+
+    for name, value in regs.items():
+        getattr(dut.uut.reg_file, f"{name}_reg").value = value
+    dut.uut.reg_file.WZ_reg.value = 0
+
+    dut.uut.opcode.value = mem.data[start_pc]
+    dut.uut.control_unit.m_cycle.value = 0
+    dut.uut.control_unit.halt.value = 0
+    dut.uut.control_unit.locked.value = 0
+
+
+def check_state(dut, mem, vector):
+    """Return a list of mismatch strings for *vector* (empty on success)."""
+    errors = []
+    for name, expected in vector.expected.items():
+        if name == "mem":
+            for addr, value in expected.items():
+                actual = mem.data[addr]
+                if actual != value:
+                    errors.append(f"({addr:#06x})={actual:#04x} expected {value:#04x}")
+            continue
+        actual = read_reg(dut, name)
+        if name == "F":
+            expected &= 0xF0
+        if actual != expected:
+            errors.append(f"{name}={actual:#x} expected {expected:#x}")
+    return errors
+
+
+async def run_vectors(dut, vectors, max_report=20, group_by=None):
+    """Run every vector in one simulator session, resetting the CPU only once.
+
+    Between vectors the registers, PC and memory are loaded through the
+    backdoor instead of restarting the clock, memory model and reset sequence.
+    With *group_by* (a function of the vector name) the report starts with a
+    failure count per group, which keeps sweeps over large tables readable.
+    """
+    cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
+    mem = CPUMemory(dut, [0x00])
+    await reset_cpu(dut)
+    await FallingEdge(dut.clk)
+
+    failures = []
+    for vector in vectors:
+        load_state(dut, mem, vector)
+        cycles = await step_instructions(dut, vector.steps)
+        errors = check_state(dut, mem, vector)
+        if cycles != vector.cycles:
+            errors.append(f"took {cycles} M-cycles expected {vector.cycles}")
+        if errors:
+            failures.append(f"{vector.name}: {', '.join(errors)}")
+
+    report = "\n".join(failures[:max_report])
+    if len(failures) > max_report:
+        report += f"\n... and {len(failures) - max_report} more"
+    if group_by is not None and failures:
+        counts = {}
+        for failure in failures:
+            group = group_by(failure.split(": ", 1)[0])
+            counts[group] = counts.get(group, 0) + 1
+        summary = ", ".join(f"{group}: {count}" for group, count in counts.items())
+        report = f"failures per group: {summary}\n{report}"
+    assert not failures, f"{len(failures)}/{len(vectors)} vectors failed:\n{report}"
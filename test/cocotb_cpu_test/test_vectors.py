@@ -0,0 +1,28 @@
+import glob
+from pathlib import Path
+
+import cocotb
+import gen_cb
+from test_utils import load_vectors, run_vectors, vectors_from_table
+
+VECTOR_DIR = Path(__file__).resolve().parent
+
+# One test per vector table generated by gen_*.py (vectors_alu.json -> "alu")
+VECTOR_TABLES = sorted(
+    Path(f).stem.removeprefix("vectors_")
+    for f in glob.glob(str(VECTOR_DIR / "vectors_*.json"))
+)
+
+
+@cocotb.test(skip=not VECTOR_TABLES)
+@cocotb.parametrize(table=VECTOR_TABLES or [""])
+async def test_vectors(dut, table):
+    await run_vectors(dut, load_vectors(VECTOR_DIR / f"vectors_{table}.json"))
+
+
+@cocotb.test()
+async def test_cb_exhaustive(dut):
+    """All 256 CB opcodes x 256 operand values x both carry states."""
+    vectors = vectors_from_table(gen_cb.exhaustive_vectors())
+    # Names are "CB xx/val=..,c=.." - summarise failures per opcode
+    await run_vectors(dut, vectors, group_by=lambda name: name.split("/")[0])
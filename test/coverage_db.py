@@ -0,0 +1,294 @@
+"""Incremental handling of Verilator ``coverage.dat`` files.
+
+A coverage point is identified by its key string in the .dat file. Keys are
+interned once into dense integer IDs by :class:`CoverageIndex`, which also
+decodes the file, line, kind (line/toggle/branch/expr/user) and module of
+each point the first time it is seen. :class:`CoverageCounts` accumulates
+hit counts by ID, so merging another run costs time proportional to the
+points that run hit, not to everything merged before.
+
+:class:`CoverageStore` persists both in a directory, merging shard results
+as they arrive and reporting per-module summaries and LCOV. It also runs
+from the command line::
+
+    python3 coverage_db.py --store logs/coverage_store --lcov logs/coverage.info shard_*/coverage.dat
+"""
+
+import argparse
+import json
+from array import array
+from pathlib import Path
+from typing import NamedTuple
+
+
+class Point(NamedTuple):
+    file: str
+    line: int
+    kind: str
+    module: str
+    comment: str
+    hier: str
+
+
+def read_dat(path):
+    """Yield ``(key, count)`` for every point in a coverage.dat file."""
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.startswith(b"C '"):
+                continue
+            key, _, count = line.rstrip().rpartition(b"' ")
+            yield key[3:], int(count)
+
+
+def decode_key(key):
+    """Decode a point key into a :class:`Point`."""
+    fields = {}
+    for item in key.decode(errors="replace").split("\x01"):
+        name, _, value = item.partition("\x02")
+        if name:
+            fields[name] = value
+
+    # page is "v_<kind>/<module>"
+    kind, _, module = fields.get("page", "").partition("/")
+    return Point(
+        file=fields.get("f", ""),
+        line=int(fields.get("l", 0) or 0),
+        kind=kind.removeprefix("v_"),
+        module=module,
+        comment=fields.get("o", ""),
+        hier=fields.get("h", ""),
+    )
+
+
+class CoverageIndex:
+    """Interns coverage point keys to dense integer IDs."""
+
+    def __init__(self):
+        self.ids = {}
+        self.keys = []
+        self.points = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def intern(self, key):
+        point_id = self.ids.get(key)
+        if point_id is None:
+            point_id = len(self.keys)
+            self.ids[key] = point_id
+            self.keys.append(key)
+            self.points.append(decode_key(key))
+        return point_id
+
+    def read_hits(self, path):
+        """Return ``[(id, count)]`` for the points of *path* that were hit.
+
+        Points with a zero count are still interned, so the index knows the
+        full set of points even before they are covered.
+        """
+        intern = self.intern
+        hits = []
+        for key, count in read_dat(path):
+            point_id = intern(key)
+            if count:
+                hits.append((point_id, count))
+        return hits
+
+    def select(self, files=None, kinds=None):
+        """Return the set of IDs whose file basename is in *files* and kind in *kinds*."""
+        return {
+            point_id
+            for point_id, point in enumerate(self.points)
+            if (files is None or Path(point.file).name in files)
+            and (kinds is None or point.kind in kinds)
+        }
+
+
+class CoverageCounts:
+    """Hit counts by point ID."""
+
+    def __init__(self):
+        self.counts = array("Q")
+
+    def __len__(self):
+        return len(self.counts)
+
+    def merge(self, hits):
+        """Add ``(id, count)`` pairs; return the IDs that were not covered before."""
+        counts = self.counts
+        new = []
+        for point_id, count in hits:
+            if point_id >= len(counts):
+                counts.extend([0] * (point_id + 1 - len(counts)))
+            if not counts[point_id]:
+                new.append(point_id)
+            counts[point_id] += count
+        return new
+
+    def covered(self):
+        return sum(1 for count in self.counts if count)
+
+    def count(self, point_id):
+        return self.counts[point_id] if point_id < len(self.counts) else 0
+
+
+# Modules summarised first, in this order; any other module follows
+SUMMARY_MODULES = ("cpu", "control", "alu", "bus", "timer", "serial", "dma")
+SUMMARY_KINDS = ("line", "branch", "toggle", "expr")
+
+
+class CoverageStore:
+    """A persistent :class:`CoverageIndex` plus :class:`CoverageCounts`.
+
+    The store is a directory holding:
+
+    ``keys.bin``
+        Point keys, one per line, in ID order. Append-only: saving writes
+        only the keys interned since the last save.
+    ``counts.bin``
+        Hit counts as raw uint64, indexed by point ID.
+    ``merged.json``
+        The .dat files already merged, by path, size and mtime, so a file
+        is never counted twice and merging a new shard never re-reads old
+        ones.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.index = CoverageIndex()
+        self.counts = CoverageCounts()
+        self.merged = {}
+        self._saved_keys = 0
+
+        keys_file = self.path / "keys.bin"
+        if keys_file.is_file():
+            with open(keys_file, "rb") as f:
+                for line in f:
+                    self.index.intern(line.rstrip(b"\n"))
+            self._saved_keys = len(self.index)
+            counts_file = self.path / "counts.bin"
+            if counts_file.is_file():
+                self.counts.counts.frombytes(counts_file.read_bytes())
+            merged_file = self.path / "merged.json"
+            if merged_file.is_file():
+                self.merged = json.loads(merged_file.read_text())
+
+    @staticmethod
+    def _stamp(path):
+        st = Path(path).stat()
+        return [st.st_size, st.st_mtime_ns]
+
+    def merge(self, path):
+        """Merge one coverage.dat; return the newly covered IDs.
+
+        A file that was already merged and has not changed since is skipped.
+        """
+        name = str(Path(path).resolve())
+        stamp = self._stamp(path)
+        if self.merged.get(name) == stamp:
+            return []
+        new = self.counts.merge(self.index.read_hits(path))
+        self.merged[name] = stamp
+        return new
+
+    def merge_all(self, paths):
+        new = []
+        for path in paths:
+            new += self.merge(path)
+        return new
+
+    def save(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / "keys.bin", "ab") as f:
+            for key in self.index.keys[self._saved_keys :]:
+                f.write(key + b"\n")
+        self._saved_keys = len(self.index)
+
+        counts = self.counts.counts
+        if len(counts) < len(self.index):
+            counts.extend([0] * (len(self.index) - len(counts)))
+        tmp = self.path / "counts.bin.tmp"
+        tmp.write_bytes(counts.tobytes())
+        tmp.replace(self.path / "counts.bin")
+        (self.path / "merged.json").write_text(json.dumps(self.merged, indent=1))
+
+    def summary(self):
+        """Return ``{module: {kind: (covered, total)}}``, SUMMARY_MODULES first."""
+        table = {}
+        count = self.counts.count
+        for point_id, point in enumerate(self.index.points):
+            module = point.module.lower()
+            kinds = table.setdefault(module, {})
+            covered, total = kinds.get(point.kind, (0, 0))
+            kinds[point.kind] = (covered + (count(point_id) > 0), total + 1)
+
+        order = [m for m in SUMMARY_MODULES if m in table]
+        order += sorted(m for m in table if m not in SUMMARY_MODULES)
+        return {module: table[module] for module in order}
+
+    def format_summary(self):
+        summary = self.summary()
+        kinds = [k for k in SUMMARY_KINDS if any(k in v for v in summary.values())]
+        lines = [f"{'module':<16}" + "".join(f"{kind:>20}" for kind in kinds)]
+        for module, by_kind in summary.items():
+            row = f"{module or '?':<16}"
+            for kind in kinds:
+                covered, total = by_kind.get(kind, (0, 0))
+                cell = f"{covered}/{total} ({100 * covered / total:.1f}%)" if total else "-"
+                row += f"{cell:>20}"
+            lines.append(row)
+        return "\n".join(lines)
+
+    def write_lcov(self, path):
+        """Write line and branch coverage as an LCOV tracefile.
+
+        A line is reported with the smallest count of the line points on it,
+        so it only counts as hit when every block on the line was reached.
+        """
+        lines = {}
+        branches = {}
+        count = self.counts.count
+        for point_id, point in enumerate(self.index.points):
+            if not point.file:
+                continue
+            if point.kind == "line":
+                file_lines = lines.setdefault(point.file, {})
+                hits = count(point_id)
+                file_lines[point.line] = min(file_lines.get(point.line, hits), hits)
+            elif point.kind == "branch":
+                branches.setdefault(point.file, []).append((point.line, count(point_id)))
+
+        with open(path, "w") as f:
+            for file in sorted(set(lines) | set(branches)):
+                f.write(f"TN:\nSF:{file}\n")
+                file_branches = sorted(branches.get(file, []))
+                for n, (line, hits) in enumerate(file_branches):
+                    f.write(f"BRDA:{line},0,{n},{hits}\n")
+                if file_branches:
+                    f.write(f"BRF:{len(file_branches)}\n")
+                    f.write(f"BRH:{sum(1 for _, hits in file_branches if hits)}\n")
+                file_lines = sorted(lines.get(file, {}).items())
+                for line, hits in file_lines:
+                    f.write(f"DA:{line},{hits}\n")
+                f.write(f"LF:{len(file_lines)}\n")
+                f.write(f"LH:{sum(1 for _, hits in file_lines if hits)}\n")
+                f.write("end_of_record\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge Verilator coverage into a persistent store.")
+    parser.add_argument("dat", nargs="*", help="coverage.dat files to merge.")
+    parser.add_argument(
+        "-s", "--store", default="logs/coverage_store", help="Store directory (created if missing)."
+    )
+    parser.add_argument("--lcov", help="Also write an LCOV tracefile here.")
+    args = parser.parse_args()
+
+    store = CoverageStore(args.store)
+    new = store.merge_all(args.dat)
+    store.save()
+    print(f"{len(new)} points newly covered, {store.counts.covered()}/{len(store.index)} total")
+    print(store.format_summary())
+    if args.lcov:
+        store.write_lcov(args.lcov)
+        print(f"LCOV written to {args.lcov}")
@@ -1,10 +1,13 @@
 import os
+import sys
 from pathlib import Path
 
 import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import FallingEdge, RisingEdge
-from cocotb_tools.runner import get_runner
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from waves_on_failure import run_suite  # noqa: E402
 
 
 @cocotb.test()
@@ -66,21 +69,18 @@ def test_dma_single_transfer_pytest():
         proj_path / "rtl" / "dma.sv",
     ]
 
-    runner = get_runner(sim)
     build_args = ["-Wall"]
     if sim == "icarus":
         build_args = ["-g2012", "-Wall"]
 
-    runner.build(
-        sources=sources,
-        hdl_toplevel="dma",
-        always=False,
-        waves=True,
-        build_args=build_args,
-    )
-
-    runner.test(
-        hdl_toplevel="dma", test_module=Path(__file__).stem, waves=True, gui=False
+    run_suite(
+        sim,
+        "dma",
+        sources,
+        build_args,
+        Path(__file__).stem,
+        Path(__file__).resolve().parent / "sim_build",
+        gui=False,
     )
 
 
@@ -0,0 +1,201 @@
+"""Coverage-guided fuzzing of the CPU through the gbit Verilator harness.
+
+Each generation mutates inputs from the corpus and runs the whole batch in
+one harness process (``--fuzz``), which writes a coverage.dat per input.
+Inputs that reach a line, toggle or branch point in the target files
+(control.sv and alu.sv by default) that no earlier input covered are kept
+in the corpus and mutated further.
+
+An input is a program loaded at 0x0000 plus registers and data bytes, in the
+format read by ``read_fuzz_case`` in gbit_verilator_bridge.cpp. The corpus
+is written back to ``--corpus`` after every generation, so runs can resume.
+"""
+
+import argparse
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "cocotb_cpu_test"))
+from coverage_db import CoverageCounts, CoverageIndex  # noqa: E402
+from fuzz import random_case, random_instruction  # noqa: E402
+
+CASE_HEADER = struct.Struct("<9H")
+DATA_ENTRY = struct.Struct("<HB")
+
+TARGET_FILES = ("control.sv", "alu.sv")
+TARGET_KINDS = ("line", "toggle", "branch")
+
+DEFAULT_BINARY = Path(__file__).resolve().parent / "obj_dir" / "Vcpu_verilator_bridge"
+MAX_PROGRAM = 256
+
+
+class Case:
+    """One fuzzer input: registers (AF, BC, DE, HL, SP, PC), a program and data bytes."""
+
+    __slots__ = ("regs", "steps", "program", "data")
+
+    def __init__(self, regs, steps, program, data):
+        self.regs = list(regs)
+        self.steps = steps
+        self.program = bytearray(program)
+        self.data = dict(data)
+
+    def encode(self):
+        out = bytearray(
+            CASE_HEADER.pack(*self.regs, self.steps, len(self.program), len(self.data))
+        )
+        out += self.program
+        for addr, value in sorted(self.data.items()):
+            out += DATA_ENTRY.pack(addr, value)
+        return bytes(out)
+
+    @classmethod
+    def decode_all(cls, blob):
+        cases = []
+        pos = 0
+        while pos + CASE_HEADER.size <= len(blob):
+            *regs, steps, program_len, data_len = CASE_HEADER.unpack_from(blob, pos)
+            pos += CASE_HEADER.size
+            program = blob[pos : pos + program_len]
+            pos += program_len
+            data = {}
+            for _ in range(data_len):
+                addr, value = DATA_ENTRY.unpack_from(blob, pos)
+                pos += DATA_ENTRY.size
+                data[addr] = value
+            cases.append(cls(regs, steps, program, data))
+        return cases
+
+    def copy(self):
+        return Case(self.regs, self.steps, self.program, self.data)
+
+
+def seed_case(seed, index):
+    """Turn a random_case vector from the cocotb fuzzer into a harness input."""
+    vector = random_case(seed, index)
+    regs = vector["regs"]
+
+    def pair(hi, lo):
+        return (regs.get(hi, 0) << 8) | regs.get(lo, 0)
+
+    regs16 = [pair("A", "F"), pair("B", "C"), pair("D", "E"), pair("H", "L"), regs["SP"], 0]
+    # +1 for the NOP the CPU executes when it leaves reset
+    return Case(regs16, vector.get("steps", 1) + 1, vector["program"], vector["data"])
+
+
+def mutate(case, rng, corpus):
+    """Return a mutated copy of *case*."""
+    case = case.copy()
+    for _ in range(rng.randint(1, 4)):
+        choice = rng.randrange(6)
+        if choice == 0 and case.program:
+            case.program[rng.randrange(len(case.program))] = rng.randrange(256)
+        elif choice == 1 and len(case.program) < MAX_PROGRAM:
+            pos = rng.randrange(len(case.program) + 1)
+            case.program[pos:pos] = bytes(random_instruction(rng, pos))
+            case.steps += 1
+        elif choice == 2 and len(case.program) > 1:
+            pos = rng.randrange(len(case.program))
+            del case.program[pos : pos + rng.randint(1, 3)]
+        elif choice == 3:
+            case.regs[rng.randrange(5)] = rng.randrange(0x10000)
+        elif choice == 4 and case.data:
+            case.data[rng.choice(list(case.data))] = rng.randrange(256)
+        else:
+            # Splice the tail of another corpus entry
+            other = rng.choice(corpus)
+            cut = rng.randrange(len(case.program) + 1)
+            case.program = (case.program[:cut] + other.program[cut:])[:MAX_PROGRAM]
+    case.steps = max(1, min(case.steps, 64))
+    return case
+
+
+def run_batch(binary, cases, work_dir):
+    """Run *cases* in one harness process; return the coverage file of each."""
+    cov_dir = Path(work_dir) / "cov"
+    shutil.rmtree(cov_dir, ignore_errors=True)
+    cov_dir.mkdir(parents=True)
+
+    input_file = Path(work_dir) / "batch.bin"
+    input_file.write_bytes(b"".join(case.encode() for case in cases))
+
+    subprocess.run(
+        [str(binary), "--fuzz", str(input_file), "--coverage-dir", str(cov_dir)],
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    return [cov_dir / f"case_{i:06d}.dat" for i in range(len(cases))]
+
+
+def fuzz(binary, corpus_file, generations, batch_size, seed, targets=TARGET_FILES):
+    rng = random.Random(seed)
+    index = CoverageIndex()
+    total = CoverageCounts()
+
+    corpus_file = Path(corpus_file)
+    if corpus_file.is_file():
+        corpus = Case.decode_all(corpus_file.read_bytes())
+        print(f"Resuming with {len(corpus)} corpus entries")
+    else:
+        corpus = [seed_case(seed, i) for i in range(batch_size)]
+
+    with tempfile.TemporaryDirectory(prefix="cov_fuzz_") as work_dir:
+        # Generation 0 replays the corpus to rebuild the coverage it reached
+        batch = list(corpus)
+        for generation in range(generations + 1):
+            kept = []
+            for case, path in zip(batch, run_batch(binary, batch, work_dir)):
+                new = total.merge(index.read_hits(path))
+                if generation and any(
+                    Path(index.points[i].file).name in targets
+                    and index.points[i].kind in TARGET_KINDS
+                    for i in new
+                ):
+                    kept.append(case)
+
+            corpus += kept
+            corpus_file.write_bytes(b"".join(case.encode() for case in corpus))
+
+            target_ids = index.select(targets, TARGET_KINDS)
+            covered = sum(1 for i in target_ids if total.count(i))
+            print(
+                f"gen {generation}: +{len(kept)} inputs, corpus {len(corpus)}, "
+                f"target coverage {covered}/{len(target_ids)}"
+            )
+
+            batch = [mutate(rng.choice(corpus), rng, corpus) for _ in range(batch_size)]
+
+    return corpus
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Coverage-guided CPU fuzzer.")
+    parser.add_argument("--binary", default=str(DEFAULT_BINARY), help="Harness executable.")
+    parser.add_argument(
+        "--corpus", default="logs/fuzz_corpus.bin", help="Corpus file (read and updated)."
+    )
+    parser.add_argument("-g", "--generations", type=int, default=20)
+    parser.add_argument("-b", "--batch", type=int, default=200, help="Inputs per harness run.")
+    parser.add_argument("-s", "--seed", type=int, default=1)
+    parser.add_argument(
+        "--target",
+        action="append",
+        help="RTL file whose new coverage keeps an input (default: control.sv, alu.sv).",
+    )
+    args = parser.parse_args()
+
+    Path(args.corpus).parent.mkdir(parents=True, exist_ok=True)
+    fuzz(
+        args.binary,
+        args.corpus,
+        args.generations,
+        args.batch,
+        args.seed,
+        targets=tuple(args.target) if args.target else TARGET_FILES,
+    )
@@ -2,8 +2,9 @@
 #include "Vcpu_verilator_bridge___024root.h"
 #include "verilated.h"
 
-#if VM_TRACE
-    #include "verilated_vcd_c.h"
+#include "trace_window.h"
+#if VM_COVERAGE
+    #include "verilated_cov.h"
 #endif
 
 extern "C"
@@ -11,13 +12,73 @@ extern "C"
 #include "gbit/lib/tester.h"
 }
 
+#include <algorithm>
 #include <array>
 #include <cstdint>
+#include <cstdio>
 #include <cstdlib>
 #include <cstring>
+#include <utility>
+#include <vector>
 
 namespace {
 
+#if VM_TRACE
+// Set from the --trace-* options by bridge_trace_option()
+TraceOptions g_trace_options;
+#endif
+
+// One input of the coverage-guided fuzzer (cov_fuzz.py). On disk, little
+// endian: uint16 AF, BC, DE, HL, SP, PC, steps, program length, data count,
+// then the program bytes (loaded at 0x0000) and data count x {uint16 addr,
+// uint8 value}.
+struct FuzzCase
+{
+    uint16_t                                 regs[6];
+    uint16_t                                 steps;
+    std::vector<uint8_t>                     program;
+    std::vector<std::pair<uint16_t, uint8_t>> data;
+};
+
+bool read_u16(FILE *f, uint16_t &value)
+{
+    uint8_t bytes[2];
+    if (fread(bytes, 1, 2, f) != 2) {
+        return false;
+    }
+    value = static_cast<uint16_t>(bytes[0] | (bytes[1] << 8));
+    return true;
+}
+
+bool read_fuzz_case(FILE *f, FuzzCase &c)
+{
+    uint16_t program_len = 0;
+    uint16_t data_len = 0;
+    for (uint16_t &reg : c.regs) {
+        if (!read_u16(f, reg)) {
+            return false;
+        }
+    }
+    if (!read_u16(f, c.steps) || !read_u16(f, program_len) || !read_u16(f, data_len)) {
+        return false;
+    }
+
+    c.program.resize(program_len);
+    if (fread(c.program.data(), 1, program_len, f) != program_len) {
+        return false;
+    }
+
+    c.data.resize(data_len);
+    for (auto &entry : c.data) {
+        uint8_t value;
+        if (!read_u16(f, entry.first) || fread(&value, 1, 1, f) != 1) {
+            return false;
+        }
+        entry.second = value;
+    }
+    return true;
+}
+
 class CpuTopRunner
 {
   public:
@@ -26,12 +87,7 @@ class CpuTopRunner
     ~CpuTopRunner()
     {
 #if VM_TRACE
-        if (tfp_) {
-            tfp_->close();
-            delete tfp_;
-            tfp_ = nullptr;
-            printf("trace closed\n");
-        }
+        trace_.finish();
 #endif
         top_.final();
     }
@@ -42,14 +98,12 @@ class CpuTopRunner
         instruction_mem_ = instruction_mem;
 
 #if VM_TRACE
-        if (!tfp_) {
-            Verilated::traceEverOn(true);
-            tfp_ = new VerilatedVcdC();
-            top_.trace(tfp_, 99);
+        if (!trace_attached_) {
             const char *trace_file = std::getenv("GBIT_TRACE_FILE");
-            if (!trace_file)
-                trace_file = "gbit_out.vcd";
-            tfp_->open(trace_file);
+            if (trace_file && g_trace_options.file.empty())
+                g_trace_options.file = trace_file;
+            trace_.attach(top_, g_trace_options, "gbit_out");
+            trace_attached_ = true;
         }
 #endif
 
@@ -79,6 +133,41 @@ class CpuTopRunner
         top_.eval();
     }
 
+    void load_case(const FuzzCase &c)
+    {
+        num_mem_accesses_ = 0;
+        memory_.fill(0x00);
+        std::memcpy(memory_.data(), c.program.data(), std::min(c.program.size(), memory_.size()));
+        for (const auto &entry : c.data) {
+            memory_[entry.first] = entry.second;
+        }
+        hard_reset();
+
+        auto *root = top_.rootp;
+        root->cpu_verilator_bridge__DOT__uut__DOT__reg_file__DOT__AF_reg = c.regs[0];
+        root->cpu_verilator_bridge__DOT__uut__DOT__reg_file__DOT__BC_reg = c.regs[1];
+        root->cpu_verilator_bridge__DOT__uut__DOT__reg_file__DOT__DE_reg = c.regs[2];
+        root->cpu_verilator_bridge__DOT__uut__DOT__reg_file__DOT__HL_reg = c.regs[3];
+        root->cpu_verilator_bridge__DOT__uut__DOT__reg_file__DOT__SP_reg = c.regs[4];
+        root->cpu_verilator_bridge__DOT__uut__DOT__reg_file__DOT__PC_reg = c.regs[5];
+
+        top_.eval();
+    }
+
+    // Like step_instruction, but gives up on an instruction after
+    // kMaxInstructionTicks so a locked or confused CPU cannot hang the run
+    void run_case(int steps)
+    {
+        constexpr int kMaxInstructionTicks = 8;
+
+        for (int i = 0; i < steps; ++i) {
+            int ticks = 0;
+            do {
+                tick();
+            } while (static_cast<uint16_t>(top_.m_cycle_out) != 0 && ++ticks < kMaxInstructionTicks);
+        }
+    }
+
     void get_state(state *s)
     {
         s->PC = static_cast<uint16_t>(top_.PC_out);
@@ -109,9 +198,18 @@ class CpuTopRunner
             m_cycles += 4;
         } while (static_cast<uint16_t>(top_.m_cycle_out) != 0);
 
+        instructions_++;
+#if VM_TRACE
+        trace_.observe_instruction(static_cast<uint16_t>(top_.PC_current),
+                                   top_.rootp->cpu_verilator_bridge__DOT__uut__DOT__opcode);
+#endif
         return m_cycles;
     }
 
+    uint64_t instructions() const { return instructions_; }
+    // One tick is one clock (M-cycle) of the CPU
+    uint64_t ticks() const { return ticks_; }
+
   private:
     void hard_reset()
     {
@@ -136,15 +234,17 @@ class CpuTopRunner
     {
         top_.eval();
 #if VM_TRACE
-        if (tfp_) {
-            tfp_->dump(sim_time_);
-        }
+        trace_.dump(sim_time_);
 #endif
         sim_time_++;
     }
 
     void tick()
     {
+#if VM_TRACE
+        trace_.begin_cycle(ticks_);
+#endif
+        ticks_++;
         top_.clk = 0;
         eval_with_trace();
 
@@ -164,13 +264,19 @@ class CpuTopRunner
         if (write_en) {
             memory_[addr] = write_data;
             log_write(addr, write_data);
+#if VM_TRACE
+            trace_.observe_write(addr);
+#endif
         }
     }
 
     Vcpu_verilator_bridge top_;
     uint64_t              sim_time_ = 0;
+    uint64_t              ticks_ = 0;
+    uint64_t              instructions_ = 0;
 #if VM_TRACE
-    VerilatedVcdC *tfp_ = nullptr;
+    TraceWindow trace_;
+    bool        trace_attached_ = false;
 #endif
     std::array<uint8_t, 65536>        memory_{};
     std::array<struct mem_access, 16> mem_accesses_{};
@@ -204,6 +310,61 @@ int mycpu_step(void)
 
 } // namespace
 
+// Run every case in *input_path*, writing the coverage of case i to
+// <coverage_dir>/case_<i>.dat. Counters are zeroed between cases.
+extern "C" int bridge_run_fuzz(const char *input_path, const char *coverage_dir)
+{
+    FILE *in = fopen(input_path, "rb");
+    if (!in) {
+        perror(input_path);
+        return 1;
+    }
+
+    g_runner.initialize(0, nullptr);
+#if VM_COVERAGE
+    VerilatedCovContext *cov = Verilated::threadContextp()->coveragep();
+    cov->zero();
+#else
+    fprintf(stderr, "Built without --coverage; no coverage will be written\n");
+#endif
+
+    FuzzCase c;
+    int      index = 0;
+    while (read_fuzz_case(in, c)) {
+        g_runner.load_case(c);
+        g_runner.run_case(c.steps);
+#if VM_COVERAGE
+        char path[4096];
+        snprintf(path, sizeof(path), "%s/case_%06d.dat", coverage_dir, index);
+        cov->write(path);
+        cov->zero();
+#endif
+        index++;
+    }
+
+    fclose(in);
+    return 0;
+}
+
+// Apply a --trace-* option (see trace_window.h); returns 0 if it is unknown
+extern "C" int bridge_trace_option(const char *name, const char *value)
+{
+#if VM_TRACE
+    return g_trace_options.set(name, value) ? 1 : 0;
+#else
+    (void)value;
+    fprintf(stderr, "Built without --trace-fst/--trace; %s ignored\n", name);
+    return 1;
+#endif
+}
+
+// Print the totals benchmark.py reads, to stderr
+extern "C" void bridge_print_stats(void)
+{
+    fprintf(stderr, "sim stats: %llu instructions, %llu M-cycles\n", static_cast<unsigned long long>(g_runner.instructions()),
+            static_cast<unsigned long long>(g_runner.ticks()));
+}
+
 extern "C" struct tester_operations myops = {
     .init = mycpu_init,
     .set_state = mycpu_set_state,
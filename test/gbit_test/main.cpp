@@ -5,6 +5,15 @@
 #include "gbit/lib/tester.h"
 
 extern struct tester_operations myops;
+extern "C" int bridge_run_fuzz(const char *input_path, const char *coverage_dir);
+extern "C" void bridge_print_stats(void);
+extern "C" int bridge_trace_option(const char *name, const char *value);
+
+/* getopt_long value shared by the --trace-* options */
+#define TRACE_OPTION 256
+
+static const char *fuzz_input = NULL;
+static const char *coverage_dir = "logs/fuzz";
 
 static struct tester_flags flags = {
     .keep_going_on_mismatch = 0,
@@ -24,6 +33,17 @@ static void print_usage(char *progname)
             "instructions.\n");
     printf(" -p, --print-inst       Print instruction undergoing tests.\n");
     printf(" -v, --print-input      Print every inputstate that is tested.\n");
+    printf(" -f, --fuzz FILE        Run the fuzzer inputs in FILE instead of "
+            "the instruction tests.\n");
+    printf(" -o, --coverage-dir DIR Where --fuzz writes per-input coverage "
+            "(default logs/fuzz).\n");
+    printf(" --trace-start N, --trace-stop N\n"
+           "                        Only trace clock cycles [N, M).\n");
+    printf(" --trace-pc ADDR, --trace-opcode OP, --trace-write ADDR\n"
+           "                        Start tracing at this PC, opcode or write.\n");
+    printf(" --trace-after N        Trace N cycles after the trigger.\n");
+    printf(" --trace-ring N         Also keep the N cycles before the trigger.\n");
+    printf(" --trace-file FILE      Waveform file (default gbit_out.fst).\n");
     printf(" -h, --help             Show this help.\n");
 }
 
@@ -35,11 +55,22 @@ static int parse_args(int argc, char **argv)
             {"no-enable-cb", no_argument,        0,  'c'},
             {"print-inst",   no_argument,        0,  'p'},
             {"print-input",  no_argument,        0,  'v'},
+            {"fuzz",         required_argument,  0,  'f'},
+            {"coverage-dir", required_argument,  0,  'o'},
+            {"trace-start",  required_argument,  0,  TRACE_OPTION},
+            {"trace-stop",   required_argument,  0,  TRACE_OPTION},
+            {"trace-pc",     required_argument,  0,  TRACE_OPTION},
+            {"trace-opcode", required_argument,  0,  TRACE_OPTION},
+            {"trace-write",  required_argument,  0,  TRACE_OPTION},
+            {"trace-after",  required_argument,  0,  TRACE_OPTION},
+            {"trace-ring",   required_argument,  0,  TRACE_OPTION},
+            {"trace-file",   required_argument,  0,  TRACE_OPTION},
             {"help",         no_argument,        0,  'h'},
             {0, 0, 0, 0}
         };
 
-        char c = getopt_long(argc, argv, "kcpvh", long_options, NULL);
+        int option_index = 0;
+        int c = getopt_long(argc, argv, "kcpvf:o:h", long_options, &option_index);
 
         if (c == -1)
             break;
@@ -61,6 +92,21 @@ static int parse_args(int argc, char **argv)
                 flags.print_verbose_inputs = 1;
                 break;
 
+            case 'f':
+                fuzz_input = optarg;
+                break;
+
+            case 'o':
+                coverage_dir = optarg;
+                break;
+
+            case TRACE_OPTION: {
+                char name[32];
+                snprintf(name, sizeof(name), "--%s", long_options[option_index].name);
+                bridge_trace_option(name, optarg);
+                break;
+            }
+
             case 'h':
                 print_usage(argv[0]);
                 exit(0);
@@ -85,5 +131,10 @@ int main(int argc, char **argv)
     if (parse_args(argc, argv))
         return 1;
 
-    return tester_run(&flags, &myops);
+    if (fuzz_input)
+        return bridge_run_fuzz(fuzz_input, coverage_dir);
+
+    int ret = tester_run(&flags, &myops);
+    bridge_print_stats();
+    return ret;
 }
@@ -1,10 +1,13 @@
 import os
+import sys
 from pathlib import Path
 
 import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import FallingEdge, RisingEdge
-from cocotb_tools.runner import get_runner
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from waves_on_failure import run_suite  # noqa: E402
 
 CLK_PERIOD_NS = 40
 CLK4_PERIOD_NS = CLK_PERIOD_NS // 4
@@ -162,7 +165,6 @@ async def test_serial_master_internal_clock_send_hello(dut):
 
 def test_serial_pytest():
     sim = os.getenv("SIM", "verilator")
-    waves = os.getenv("WAVES", "0") == "1"
 
     proj_path = Path(__file__).resolve().parents[2]
     sources = [
@@ -171,25 +173,19 @@ def test_serial_pytest():
         proj_path / "test" / "serial_test" / "serial_cocotb_dut.sv",
     ]
 
-    runner = get_runner(sim)
     build_args = ["-Wall"]
     if sim == "icarus":
         build_args += ["-g2012"]
     elif sim == "verilator":
         build_args += ["-Wno-fatal"]
 
-    runner.build(
-        sources=sources,
-        hdl_toplevel="serial_cocotb_dut",
-        always=False,
-        waves=waves,
-        build_args=build_args,
-    )
-
-    runner.test(
-        hdl_toplevel="serial_cocotb_dut",
-        test_module=Path(__file__).stem,
-        waves=waves,
+    run_suite(
+        sim,
+        "serial_cocotb_dut",
+        sources,
+        build_args,
+        Path(__file__).stem,
+        Path(__file__).resolve().parent / "sim_build",
         gui=False,
     )
 
@@ -1,10 +1,13 @@
 import os
+import sys
 from pathlib import Path
 
 import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, Timer
-from cocotb_tools.runner import get_runner
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from waves_on_failure import run_suite  # noqa: E402
 
 DIV_REG = 0xFF04
 TIMA_REG = 0xFF05
@@ -225,25 +228,19 @@ def test_timer_pytest():
         proj_path / "test" / "timer_test" / "timer_cocotb_dut.sv",
     ]
 
-    runner = get_runner(sim)
     build_args = ["-Wall"]
     if sim == "icarus":
         build_args = ["-g2012", "-Wall"]
     elif sim == "verilator":
         build_args += ["-Wno-DECLFILENAME", "-Wno-IMPORTSTAR"]
 
-    runner.build(
-        sources=sources,
-        hdl_toplevel="timer_cocotb_dut",
-        always=True,
-        waves=False,
-        build_args=build_args,
-    )
-
-    runner.test(
-        hdl_toplevel="timer_cocotb_dut",
-        test_module=Path(__file__).stem,
-        waves=False,
+    run_suite(
+        sim,
+        "timer_cocotb_dut",
+        sources,
+        build_args,
+        Path(__file__).stem,
+        Path(__file__).resolve().parent / "sim_build",
         gui=False,
     )
 
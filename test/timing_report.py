@@ -0,0 +1,151 @@
+"""Per-test real time and sim time across the cocotb suites.
+
+cocotb records ``time`` (real seconds), ``sim_time_ns`` and ``ratio_time``
+(sim ns per real second) for every testcase in results.xml. This collects
+them for the cpu, timer, serial and dma suites, prints the slowest tests
+and the ones with the worst sim speed, and folds the real times into a
+history file. ``run_tests.py`` reads the history back through
+:func:`load_weights` to balance its shards.
+
+    python3 timing_report.py              # report and update the history
+    python3 timing_report.py -n 30 --no-update
+"""
+
+import argparse
+import json
+from pathlib import Path
+from xml.etree import ElementTree
+
+TEST_DIR = Path(__file__).resolve().parent
+
+SUITE_RESULTS = {
+    "cpu": [
+        TEST_DIR / "cocotb_cpu_test" / "sim_build" / "results.xml",
+        TEST_DIR / "cocotb_cpu_test" / "sim_build" / "hdl_mem" / "results.xml",
+    ],
+    "timer": [TEST_DIR / "timer_test" / "sim_build" / "results.xml"],
+    "serial": [TEST_DIR / "serial_test" / "sim_build" / "results.xml"],
+    "dma": [TEST_DIR / "dma_test" / "sim_build" / "results.xml"],
+}
+
+DEFAULT_HISTORY = TEST_DIR / "logs" / "test_times.json"
+# Weight of the newest run in the moving average kept in the history
+HISTORY_ALPHA = 0.5
+
+
+def read_results(results_file, suite):
+    """Return one dict per testcase of *results_file*."""
+    tests = []
+    for case in ElementTree.parse(results_file).getroot().iter("testcase"):
+        real = float(case.get("time", 0))
+        sim_ns = float(case.get("sim_time_ns", 0))
+        tests.append(
+            {
+                "suite": suite,
+                "name": case.get("name"),
+                "real_s": real,
+                "sim_ns": sim_ns,
+                "ratio": float(case.get("ratio_time", sim_ns / real if real else 0)),
+            }
+        )
+    return tests
+
+
+def collect(suite_results=SUITE_RESULTS):
+    tests = []
+    for suite, files in suite_results.items():
+        for results_file in files:
+            if Path(results_file).is_file():
+                tests += read_results(results_file, suite)
+    return tests
+
+
+def load_history(path=DEFAULT_HISTORY):
+    path = Path(path)
+    return json.loads(path.read_text()) if path.is_file() else {}
+
+
+def update_history(tests, path=DEFAULT_HISTORY):
+    """Fold the real times of *tests* into the history at *path*."""
+    history = load_history(path)
+    for test in tests:
+        entry = history.setdefault(test["suite"], {}).get(test["name"])
+        if entry is None:
+            entry = {"real_s": test["real_s"], "runs": 0}
+        else:
+            entry["real_s"] += HISTORY_ALPHA * (test["real_s"] - entry["real_s"])
+        entry["runs"] += 1
+        entry["sim_ns"] = test["sim_ns"]
+        history[test["suite"]][test["name"]] = entry
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(history, indent=1, sort_keys=True) + "\n")
+    return history
+
+
+def load_weights(suite, path=DEFAULT_HISTORY):
+    """Return ``{test name: average real seconds}`` for *suite*, for shard_tests.
+
+    Parametrized tests are recorded under their full cocotb names
+    (``test_vectors/table=alu``); their base name (``test_vectors``) is
+    added with the sum of them, so either form finds a weight.
+    """
+    weights = {}
+    bases = {}
+    for name, entry in load_history(path).get(suite, {}).items():
+        weights[name] = entry["real_s"]
+        if "/" in name:
+            base = name.split("/")[0]
+            bases[base] = bases.get(base, 0.0) + entry["real_s"]
+    for base, real_s in bases.items():
+        weights.setdefault(base, real_s)
+    return weights
+
+
+def format_report(tests, top=20):
+    out = []
+    by_suite = {}
+    for test in tests:
+        totals = by_suite.setdefault(test["suite"], [0, 0.0, 0.0])
+        totals[0] += 1
+        totals[1] += test["real_s"]
+        totals[2] += test["sim_ns"]
+
+    out.append(f"{'suite':<8} {'tests':>6} {'real s':>10} {'sim ms':>12} {'sim ns/s':>12}")
+    for suite, (count, real, sim_ns) in by_suite.items():
+        ratio = sim_ns / real if real else 0
+        out.append(f"{suite:<8} {count:>6} {real:>10.2f} {sim_ns / 1e6:>12.3f} {ratio:>12.0f}")
+
+    def rows(title, selected):
+        out.append("")
+        out.append(title)
+        for test in selected:
+            out.append(
+                f"  {test['real_s']:8.3f} s {test['sim_ns']:14.0f} ns {test['ratio']:12.0f} ns/s"
+                f"  {test['suite']}/{test['name']}"
+            )
+
+    rows(f"Slowest {top} tests (real time):", sorted(tests, key=lambda t: -t["real_s"])[:top])
+    # Tests that barely advance sim time say nothing about sim speed
+    timed = [t for t in tests if t["real_s"] > 0.01]
+    rows(f"Worst {top} sim-speed ratios:", sorted(timed, key=lambda t: t["ratio"])[:top])
+    return "\n".join(out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report per-test times from cocotb results.xml.")
+    parser.add_argument("-n", "--top", type=int, default=20, help="Rows per list.")
+    parser.add_argument("--history", default=str(DEFAULT_HISTORY), help="Duration history file.")
+    parser.add_argument(
+        "--no-update", action="store_true", help="Report only; leave the history unchanged."
+    )
+    args = parser.parse_args()
+
+    tests = collect()
+    if not tests:
+        raise SystemExit("No results.xml found; run the suites first.")
+    print(format_report(tests, args.top))
+    if not args.no_update:
+        update_history(tests, args.history)
+        print(f"\nHistory updated: {args.history}")
@@ -0,0 +1,124 @@
+"""Run cocotb suites without waves and re-run only the failures with them.
+
+With ``$WAVES`` unset, :func:`run_suite` builds and runs a suite with
+tracing off. Every test that failed is then run again on its own, from a
+build with tracing on, in ``<test_dir>/waves/<test>``, and the path of its
+dump is printed. ``WAVES=1`` traces every test as before and ``WAVES=0``
+never traces; ``WAVES_ON_FAILURE=0`` turns off the re-runs.
+"""
+
+import os
+from pathlib import Path
+from xml.etree import ElementTree
+
+from cocotb_tools.runner import get_runner
+
+from build_cache import cached_build
+
+
+def waves_setting():
+    """Return ``(waves, rerun)`` from $WAVES and $WAVES_ON_FAILURE."""
+    waves = os.getenv("WAVES")
+    if waves is not None:
+        # cocotb's runner reads $WAVES itself and overrides our argument
+        return waves == "1", False
+    return False, os.getenv("WAVES_ON_FAILURE", "1") == "1"
+
+
+def failed_tests(results_file):
+    """Return the names of the failed or errored testcases in *results_file*."""
+    if not Path(results_file).is_file():
+        return []
+    return [
+        case.get("name")
+        for case in ElementTree.parse(results_file).getroot().iter("testcase")
+        if case.find("failure") is not None or case.find("error") is not None
+    ]
+
+
+def wave_file(sim, test_dir, hdl_toplevel):
+    if sim == "icarus":
+        return Path(test_dir) / f"{hdl_toplevel}.fst"
+    if sim == "verilator":
+        return Path(test_dir) / "dump.vcd"
+    return None
+
+
+def rerun_failures(
+    sim, results_file, hdl_toplevel, sources, build_args, test_module, test_dir, **test_kwargs
+):
+    """Re-run each failed test of *results_file* alone with waves.
+
+    Returns ``{test name: dump path}``.
+    """
+    failures = failed_tests(results_file)
+    if not failures:
+        return {}
+
+    build_dir = cached_build(
+        sim, hdl_toplevel=hdl_toplevel, sources=sources, build_args=build_args, waves=True
+    )
+    runner = get_runner(sim)
+
+    dumps = {}
+    for name in failures:
+        wave_dir = (Path(test_dir) / "waves" / name).resolve()
+        dump = wave_file(sim, wave_dir, hdl_toplevel)
+        # Icarus writes to the build directory unless told otherwise
+        plusargs = [f"+dumpfile_path={dump}"] if sim == "icarus" else []
+        try:
+            runner.test(
+                hdl_toplevel=hdl_toplevel,
+                hdl_toplevel_lang="verilog",
+                test_module=test_module,
+                testcase=[name],
+                build_dir=build_dir,
+                test_dir=wave_dir,
+                results_xml=str(wave_dir / "results.xml"),
+                waves=True,
+                plusargs=plusargs,
+                **test_kwargs,
+            )
+        except SystemExit:
+            pass
+        dumps[name] = dump
+
+    for name, dump in dumps.items():
+        print(f"Waves for failed test {name}: {dump}")
+    return dumps
+
+
+def run_suite(sim, hdl_toplevel, sources, build_args, test_module, test_dir, **test_kwargs):
+    """Build and run a suite, re-running failures with waves; return results.xml."""
+    waves, rerun = waves_setting()
+    build_dir = cached_build(
+        sim, hdl_toplevel=hdl_toplevel, sources=sources, build_args=build_args, waves=waves
+    )
+    results_file = Path(test_dir).resolve() / "results.xml"
+
+    runner = get_runner(sim)
+    try:
+        runner.test(
+            hdl_toplevel=hdl_toplevel,
+            hdl_toplevel_lang="verilog",
+            test_module=test_module,
+            build_dir=build_dir,
+            test_dir=test_dir,
+            results_xml=str(results_file),
+            waves=waves,
+            **test_kwargs,
+        )
+    finally:
+        # Under pytest a failing run raises SystemExit; re-run before it propagates
+        if rerun:
+            rerun_failures(
+                sim,
+                results_file,
+                hdl_toplevel,
+                sources,
+                build_args,
+                test_module,
+                test_dir,
+                **test_kwargs,
+            )
+    return results_file